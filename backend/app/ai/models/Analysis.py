@@ -44,6 +44,8 @@ from google.generativeai import GenerationConfig
 from dotenv import load_dotenv
 
 from .promptStore import prompt_analysis, prompt_analysis_vi
+from .spell_lexicon import get_spell_lexicon
+from .term_detector import normalize_term_key
 from .term_normalizer import NormalizationResult, normalize_text
 
 # -------------------------------------------------------------------
@@ -54,6 +56,8 @@ load_dotenv()
 
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# true + có lexicon chính tả → chính tả xử lý local, bỏ subtask spelling khỏi prompt
+LOCAL_SPELLING = os.getenv("LOCAL_SPELLING", "true").lower() == "true"
 
 if not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY not found in environment variables")
@@ -241,6 +245,7 @@ def analyze_document(
     content: str,
     language: str = "en",
     mode: str = "fast",  # chỉ để log, không đổi model
+    known_terms: Optional[Dict[str, Dict[str, Any]]] = None,
 ) -> Dict[str, Any]:
     """
     Phân tích toàn diện văn bản với 5 subtasks trong một lần gọi.
@@ -250,6 +255,9 @@ def analyze_document(
     1) Spell & Term Normalization (rule-based) → phát hiện lỗi chính tả rõ ràng trước.
     2) Gọi Gemini unified analysis (5 subtasks).
     3) Merge lỗi chính tả rule-based vào block spelling_errors của kết quả cuối.
+
+    known_terms: glossary của user (GlossaryService.known_terms). Được gửi kèm prompt
+    và các undefined_terms trùng glossary bị loại khỏi kết quả.
     """
 
     selected_model = GEMINI_MODEL  # luôn dùng 1 model Gemini 2.5
@@ -322,14 +330,26 @@ def analyze_document(
         normalized_content_for_llm = content
 
         # -------- 2) Build prompt theo ngôn ngữ --------
+        llm_spelling = not (LOCAL_SPELLING and get_spell_lexicon() is not None)
         if language == "vi":
-            prompt = prompt_analysis_vi(context, normalized_content_for_llm)
+            prompt = prompt_analysis_vi(
+                context,
+                normalized_content_for_llm,
+                include_spelling=llm_spelling,
+                known_terms=known_terms,
+            )
             print("Sử dụng prompt tiếng Việt...")
         else:
-            prompt = prompt_analysis(context, normalized_content_for_llm)
+            prompt = prompt_analysis(
+                context,
+                normalized_content_for_llm,
+                include_spelling=llm_spelling,
+                known_terms=known_terms,
+            )
             print("Using English prompt...")
 
         result["analysis_metadata"]["language"] = language
+        result["metadata"]["normalization"]["spelling_engine"] = "llm" if llm_spelling else "local_lexicon"
 
         # -------- 3) Gọi Gemini với cấu hình phù hợp ngôn ngữ --------
         #
@@ -412,6 +432,15 @@ def analyze_document(
                 result["undefined_terms"]["total_found"] = len(
                     result["undefined_terms"].get("items", []) or []
                 )
+            # Thuật ngữ đã có trong glossary → coi là đã định nghĩa, kể cả khi LLM vẫn báo
+            if known_terms and result["undefined_terms"].get("items"):
+                items = [
+                    item
+                    for item in result["undefined_terms"]["items"]
+                    if normalize_term_key(item.get("term") or "") not in known_terms
+                ]
+                result["undefined_terms"]["items"] = items
+                result["undefined_terms"]["total_found"] = len(items)
 
         # unsupported_claims
         if "unsupported_claims" in llm_result:
@@ -0,0 +1,313 @@
+"""
+claim_classifier.py
+
+Phân loại câu claim / evidence / neutral chạy local trên CPU
+------------------------------------------------------------
+Cài đặt pipeline mô tả trong unsupportedClaims.py mà không cần gọi Gemini:
+    1. Encode tất cả câu 1 lần bằng embedding model nhỏ (MiniLM, dùng chung
+       registry với contradictions.py; có thể truyền sẵn Sentence.emb).
+    2. Chấm điểm theo prototype: cosine similarity tới tâm (centroid) của các câu
+       mẫu mỗi nhãn + điểm cue từ vựng (số liệu, trích dẫn, "theo ...", "ví dụ",
+       "chắc chắn", "luôn luôn", ...). Tất cả tính bằng 1 phép nhân ma trận.
+    3. Luật ±2 câu (vectorized): claim không có evidence trong cửa sổ ±2 câu
+       (cùng đoạn) → "unsupported".
+    4. Claim có điểm sát nhau giữa các nhãn / evidence yếu → "borderline",
+       chỉ những câu này mới cần LLM xác nhận.
+
+torch / sentence_transformers chỉ được import khi phải encode câu.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.nlp import extract_sentences, iter_paragraph_spans
+
+ENGINE_NAME = "local-claim-classifier"
+
+LABELS = ("claim", "evidence", "neutral")
+CLAIM, EVIDENCE, NEUTRAL = range(3)
+
+# Số câu trước/sau được xét khi tìm evidence cho một claim
+SUPPORT_WINDOW = 2
+# Chênh lệch điểm giữa nhãn cao nhất và nhãn thứ 2 dưới ngưỡng này → borderline
+BORDERLINE_MARGIN = 0.04
+
+# Câu mẫu cho từng nhãn (Việt + Anh); centroid được tính 1 lần / embedding model
+_PROTOTYPES: Dict[str, List[str]] = {
+    "claim": [
+        "Giải pháp này chắc chắn là tốt nhất cho mọi doanh nghiệp.",
+        "Trí tuệ nhân tạo sẽ thay thế hoàn toàn giáo viên trong tương lai.",
+        "Phương pháp của chúng tôi hiệu quả hơn hẳn các phương pháp khác.",
+        "Mạng xã hội là nguyên nhân chính khiến giới trẻ trầm cảm.",
+        "NoSQL luôn mở rộng tốt hơn cơ sở dữ liệu quan hệ.",
+        "This approach is clearly superior to all existing methods.",
+        "Remote work always increases employee productivity.",
+        "AI can perfectly predict human emotions.",
+    ],
+    "evidence": [
+        "Theo báo cáo của Tổng cục Thống kê năm 2023, tỷ lệ thất nghiệp là 2,3%.",
+        "Khảo sát trên 1.200 sinh viên cho thấy 68% sử dụng điện thoại hơn 5 giờ mỗi ngày.",
+        "Ví dụ, Netflix đã giảm 30% chi phí hạ tầng sau khi chuyển sang Cassandra.",
+        "Nghiên cứu của Nguyễn và cộng sự (2021) ghi nhận độ chính xác 92%.",
+        "Kết quả thực nghiệm trên tập XNLI đạt F1 là 0,87.",
+        "According to a 2022 Gartner survey, 45% of companies adopted cloud databases.",
+        "For example, the benchmark showed a 3x throughput improvement on 10 nodes.",
+        "Smith et al. (2020) reported an accuracy of 91% on the test set.",
+    ],
+    "neutral": [
+        "Bài viết gồm ba phần chính.",
+        "Phần tiếp theo trình bày phương pháp nghiên cứu.",
+        "Chúng tôi sẽ thảo luận về các hướng phát triển trong chương cuối.",
+        "Hệ thống được xây dựng bằng Python và PostgreSQL.",
+        "Cuộc họp diễn ra vào sáng thứ Hai.",
+        "This section describes the experimental setup.",
+        "The remainder of the paper is organized as follows.",
+        "We first introduce the dataset used in this work.",
+    ],
+}
+
+# Cue từ vựng: (regex, nhãn, trọng số)
+_CUES: List[Tuple[re.Pattern, int, float]] = [
+    (re.compile(r"\d+(?:[.,]\d+)?\s*%|\d+(?:[.,]\d+)*\s*(?:người|sinh viên|mẫu|doanh nghiệp|users?|samples?|participants?)", re.IGNORECASE), EVIDENCE, 0.12),
+    (re.compile(r"\(\s*[^()]*\b(?:19|20)\d{2}[a-z]?\s*\)|\bet al\.|\[\d+(?:[,–-]\s*\d+)*\]", re.IGNORECASE), EVIDENCE, 0.15),
+    (re.compile(r"^\s*(?:theo|dựa trên|số liệu|khảo sát|nghiên cứu|thống kê|báo cáo|kết quả)\b|\b(?:according to|survey|study|studies|reported|data show|statistics)\b", re.IGNORECASE), EVIDENCE, 0.1),
+    (re.compile(r"^\s*(?:ví dụ|chẳng hạn|cụ thể|minh chứng)\b|\b(?:for example|for instance|e\.g\.)", re.IGNORECASE), EVIDENCE, 0.1),
+    (re.compile(r"\b(?:chắc chắn|luôn luôn|luôn|hoàn toàn|tuyệt đối|tốt nhất|vượt trội|không thể phủ nhận|rõ ràng là|mọi|tất cả)\b|\b(?:always|never|clearly|obviously|undoubtedly|best|superior|must|will definitely|all)\b", re.IGNORECASE), CLAIM, 0.08),
+    (re.compile(r"\b(?:nên|cần phải|sẽ|là nguyên nhân|dẫn đến|giúp)\b|\b(?:should|will|leads? to|causes?|improves?)\b", re.IGNORECASE), CLAIM, 0.04),
+]
+
+_centroids: Dict[str, np.ndarray] = {}
+_centroids_lock = threading.Lock()
+
+
+def _get_centroids(embedding_model_name: str) -> np.ndarray:
+    """Ma trận (3, d) centroid đã normalize của câu mẫu, cache theo embedding model"""
+    with _centroids_lock:
+        centroids = _centroids.get(embedding_model_name)
+    if centroids is not None:
+        return centroids
+
+    from app.ai.models.contradictions import encode_sentences
+
+    rows = []
+    for label in LABELS:
+        embs = encode_sentences(_PROTOTYPES[label], embedding_model_name)
+        centroid = embs.mean(axis=0)
+        rows.append(centroid / (np.linalg.norm(centroid) or 1.0))
+    centroids = np.vstack(rows).astype(np.float32)
+
+    with _centroids_lock:
+        _centroids[embedding_model_name] = centroids
+    return centroids
+
+
+def _cue_scores(sentences: Sequence[str]) -> np.ndarray:
+    scores = np.zeros((len(sentences), len(LABELS)), dtype=np.float32)
+    for i, sentence in enumerate(sentences):
+        for pattern, label, weight in _CUES:
+            if pattern.search(sentence):
+                scores[i, label] += weight
+    return scores
+
+
+def classify_sentences(
+    sentences: Sequence[str],
+    embeddings: Optional[np.ndarray] = None,
+    embedding_model_name: Optional[str] = None,
+) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Gắn nhãn claim / evidence / neutral cho toàn bộ câu trong 1 lượt.
+
+    Args:
+        sentences: Danh sách câu
+        embeddings: Ma trận (n, d) đã normalize (vd. Sentence.emb); None → encode
+        embedding_model_name: Embedding model (mặc định như contradictions.py)
+
+    Returns:
+        (labels, scores (n, 3), margin (n,)) — margin = điểm nhãn cao nhất - nhãn thứ 2
+    """
+    n = len(sentences)
+    if n == 0:
+        return [], np.zeros((0, len(LABELS)), dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+    from app.ai.models.contradictions import DEFAULT_EMBEDDING_MODEL, encode_sentences
+
+    embedding_model_name = embedding_model_name or DEFAULT_EMBEDDING_MODEL
+    if embeddings is None or len(embeddings) != n:
+        embeddings = encode_sentences(list(sentences), embedding_model_name)
+
+    scores = np.asarray(embeddings, dtype=np.float32) @ _get_centroids(embedding_model_name).T
+    scores += _cue_scores(sentences)
+
+    ordered = np.sort(scores, axis=1)
+    margin = ordered[:, -1] - ordered[:, -2]
+    labels = [LABELS[k] for k in scores.argmax(axis=1)]
+    return labels, scores, margin
+
+
+def supported_mask(
+    labels: Sequence[str],
+    paragraph_ids: Optional[Sequence[Any]] = None,
+    window: int = SUPPORT_WINDOW,
+) -> np.ndarray:
+    """
+    Với mỗi câu: có evidence trong cửa sổ ±window câu (cùng đoạn) hay không.
+    Tính bằng các phép dịch mảng, không lặp qua từng cặp câu.
+    """
+    n = len(labels)
+    is_evidence = np.array([label == "evidence" for label in labels], dtype=bool)
+    if paragraph_ids is None:
+        paragraph = np.zeros(n, dtype=np.int64)
+    else:
+        _, paragraph = np.unique(np.asarray([str(p) for p in paragraph_ids]), return_inverse=True)
+
+    supported = np.zeros(n, dtype=bool)
+    for offset in range(-window, window + 1):
+        if offset == 0 or abs(offset) >= n:
+            continue
+        src = slice(max(offset, 0), n + min(offset, 0))
+        dst = slice(max(-offset, 0), n - max(offset, 0))
+        supported[dst] |= is_evidence[src] & (paragraph[src] == paragraph[dst])
+    return supported
+
+
+def _location(p_idx: int, s_idx: int) -> str:
+    return f"Paragraph {p_idx + 1}, Sentence {s_idx + 1}"
+
+
+def _window_text(sentences: Sequence[str], paragraph: np.ndarray, i: int, window: int = SUPPORT_WINDOW) -> str:
+    lo, hi = max(i - window, 0), min(i + window + 1, len(sentences))
+    return " ".join(sentences[k] for k in range(lo, hi) if paragraph[k] == paragraph[i])
+
+
+def analyze_claims(
+    sentences: Sequence[str],
+    paragraph_index: Sequence[int],
+    sentence_index: Sequence[int],
+    embeddings: Optional[np.ndarray] = None,
+    embedding_model_name: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Gắn nhãn + áp luật ±2 câu.
+
+    Returns:
+        {"labels", "unsupported_claims", "supported_claims"}; item có thêm
+        "borderline" và "sentence_position" (vị trí trong `sentences`).
+    """
+    labels, scores, margin = classify_sentences(sentences, embeddings, embedding_model_name)
+    paragraph = np.asarray(paragraph_index)
+    supported = supported_mask(labels, paragraph)
+    is_evidence = np.array([label == "evidence" for label in labels], dtype=bool)
+
+    unsupported_claims: List[Dict[str, Any]] = []
+    supported_claims: List[Dict[str, Any]] = []
+    for i in np.flatnonzero(np.array([label == "claim" for label in labels], dtype=bool)):
+        location = _location(int(paragraph[i]), int(sentence_index[i]))
+        borderline = bool(margin[i] < BORDERLINE_MARGIN)
+        if supported[i]:
+            lo, hi = max(i - SUPPORT_WINDOW, 0), min(i + SUPPORT_WINDOW + 1, len(sentences))
+            evidence_idx = [k for k in range(lo, hi) if is_evidence[k] and paragraph[k] == paragraph[i]]
+            best = max(evidence_idx, key=lambda k: margin[k])
+            supported_claims.append({
+                "claim": sentences[i],
+                "location": location,
+                "status": "supported",
+                "evidence_type": "nearby_evidence",
+                "evidence": sentences[best],
+                # Evidence gần nhất cũng không chắc chắn → vẫn nên kiểm tra lại
+                "borderline": borderline or bool(margin[best] < BORDERLINE_MARGIN),
+                "sentence_position": int(i),
+            })
+        else:
+            unsupported_claims.append({
+                "claim": sentences[i],
+                "location": location,
+                "status": "unsupported",
+                "reason": "No data, example or citation within two sentences of this claim.",
+                "surrounding_context": _window_text(sentences, paragraph, int(i)),
+                "suggestion": "Add source, data, or example to support this claim.",
+                "borderline": borderline,
+                "sentence_position": int(i),
+            })
+
+    return {
+        "labels": labels,
+        "scores": scores,
+        "unsupported_claims": unsupported_claims,
+        "supported_claims": supported_claims,
+    }
+
+
+def split_content(content: str) -> Tuple[List[str], List[int], List[int]]:
+    """
+    Tách văn bản → (câu, paragraph index, sentence index trong đoạn).
+    Văn bản không có dòng trống được coi là mỗi dòng một đoạn.
+    """
+    sentences: List[str] = []
+    p_index: List[int] = []
+    s_index: List[int] = []
+    for p_idx, (start, end) in enumerate(iter_paragraph_spans(content or "", split_lines=True)):
+        for s_idx, sentence in enumerate(extract_sentences(content[start:end])):
+            sentences.append(sentence)
+            p_index.append(p_idx)
+            s_index.append(s_idx)
+    return sentences, p_index, s_index
+
+
+def check_unsupported_claims_local(context: Optional[Dict[str, Any]], content: str) -> Dict[str, Any]:
+    """
+    Phiên bản local của check_unsupported_claims: cùng format kết quả.
+    Mỗi item có thêm "borderline" (nên được LLM xác nhận lại).
+    """
+    result = {
+        "success": False,
+        "content": content,
+        "context": context or {},
+        "total_claims_found": 0,
+        "total_unsupported": 0,
+        "unsupported_claims": [],
+        "supported_claims": [],
+        "metadata": {
+            "analyzed_at": datetime.utcnow().isoformat(),
+            "model": ENGINE_NAME,
+            "error": None
+        }
+    }
+
+    if not content or not content.strip():
+        result["metadata"]["error"] = "Content is empty"
+        return result
+
+    try:
+        sentences, p_index, s_index = split_content(content)
+        analysis = analyze_claims(sentences, p_index, s_index)
+        for item in analysis["unsupported_claims"] + analysis["supported_claims"]:
+            item.pop("sentence_position", None)
+
+        result["success"] = True
+        result["unsupported_claims"] = analysis["unsupported_claims"]
+        result["supported_claims"] = analysis["supported_claims"]
+        result["total_unsupported"] = len(analysis["unsupported_claims"])
+        result["total_claims_found"] = result["total_unsupported"] + len(analysis["supported_claims"])
+
+    except Exception as e:
+        result["metadata"]["error"] = f"Error during analysis: {str(e)}"
+        print(f"Error: {e}")
+
+    return result
+
+
+__all__ = [
+    "LABELS",
+    "analyze_claims",
+    "check_unsupported_claims_local",
+    "classify_sentences",
+    "split_content",
+    "supported_mask",
+]
@@ -1,109 +1,148 @@
 from typing import List, Dict, Any, Tuple, Optional
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
-import re, numpy as np, itertools, torch, gc
+import hashlib, os, re, threading, time, numpy as np, itertools, torch
 import torch.nn.functional as F
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from sentence_transformers import SentenceTransformer
-from app.utils.nlp import extract_sentences
+from app.utils.nlp import iter_sentences
+from app.ai.models.model_registry import estimate_module_bytes, model_registry
+from app.ai.models.fact_extractor import (
+    SentenceFacts,
+    extract_facts,
+    facts_conflict,
+    obvious_numeric_contradiction,
+)
 
 
 # Model paths
 BASE_MODEL = "MoritzLaurer/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7"
 FINETUNED_MODEL = "duowng/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7-for-vietnamese"
 
-# Global cache cho models
-_cached_embedding_model = None
-_cached_embedding_model_name = None
-_cached_nli_model = None
-_cached_nli_tokenizer = None
-_cached_nli_model_path = None
-_cached_nli_device = None
-_cached_contra_idx = None
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# Registry giữ nhiều model cùng lúc (LRU + RAM budget), thay cho cache 1 slot
+NLI_KIND = "nli"
+EMBEDDING_KIND = "embedding"
+
+# Cache điểm NLI theo (model_path, hash câu A, hash câu B) cho chế độ cross-document:
+# cặp câu đã chấm một lần thì các lần kiểm tra sau không phải chạy lại model.
+PAIR_SCORE_CACHE_SIZE = int(os.getenv("PAIR_SCORE_CACHE_SIZE", "100000"))
+_pair_score_cache: "OrderedDict[Tuple[str, str, str], Tuple[float, float]]" = OrderedDict()
+_pair_score_lock = threading.Lock()
+
+# Confidence gán cho mâu thuẫn số liệu phát hiện bằng luật (không qua NLI)
+NUMERIC_RULE_CONFIDENCE = 0.95
+
+# Cascade: student nhỏ (distill từ mDeBERTa, xem fineTune.py distill) chấm tất cả các cặp,
+# chỉ những cặp có điểm nằm trong "vùng không chắc chắn" mới được chấm lại bằng model đầy đủ.
+STUDENT_MODEL = os.getenv("NLI_STUDENT_MODEL") or None
+CASCADE_LOW = float(os.getenv("NLI_CASCADE_LOW", "0.2"))
+CASCADE_HIGH = float(os.getenv("NLI_CASCADE_HIGH", "0.9"))
 
 
 def clear_model_cache():
-    """Xóa toàn bộ cache models để giải phóng bộ nhớ"""
-    global _cached_embedding_model, _cached_embedding_model_name
-    global _cached_nli_model, _cached_nli_tokenizer, _cached_nli_model_path
-    global _cached_nli_device, _cached_contra_idx
-    
-    _cached_embedding_model = None
-    _cached_embedding_model_name = None
-    _cached_nli_model = None
-    _cached_nli_tokenizer = None
-    _cached_nli_model_path = None
-    _cached_nli_device = None
-    _cached_contra_idx = None
-    
-    # Force garbage collection
-    gc.collect()
-    if torch.cuda.is_available():
-        torch.cuda.empty_cache()
-    
+    """Xóa toàn bộ model không còn được dùng khỏi registry để giải phóng bộ nhớ"""
+    model_registry.clear()
+    with _pair_score_lock:
+        _pair_score_cache.clear()
     print("Model cache cleared")
 
 
-def _check_memory_and_clear_if_needed():
-    """Kiểm tra bộ nhớ GPU và tự động clear cache nếu cần"""
-    if torch.cuda.is_available():
-        # Lấy memory usage
-        allocated = torch.cuda.memory_allocated() / 1024**3  # GB
-        reserved = torch.cuda.memory_reserved() / 1024**3    # GB
-        total = torch.cuda.get_device_properties(0).total_memory / 1024**3  # GB
-        
-        usage_percent = (allocated / total) * 100
-        
-        # Nếu usage > 80%, clear cache
-        if usage_percent > 80:
-            print(f"GPU memory usage: {usage_percent:.1f}% - Clearing cache...")
-            torch.cuda.empty_cache()
-            gc.collect()
+def _default_device() -> str:
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _embedding_loader(model_name: str):
+    """Loader cho registry: trả về (embedding model, size_bytes)"""
+    def _load():
+        model = SentenceTransformer(model_name, device="cpu")
+        model.eval()
+        return model, estimate_module_bytes(model)
+    return _load
+
+
+def _nli_loader(model_path: str, device: str):
+    """Loader cho registry: trả về ((tokenizer, model, contra_idx), size_bytes)"""
+    def _load():
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+        model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        model.eval()
+        model.to(device)
+        contra_idx = _get_contradiction_idx_from_config(model)
+        return (tokenizer, model, contra_idx), estimate_module_bytes(model)
+    return _load
 
 
 def _load_embedding_model(model_name: str) -> SentenceTransformer:
-    """Cache và load embedding model"""
-    global _cached_embedding_model, _cached_embedding_model_name
-    
-    if _cached_embedding_model_name != model_name:
-        print(f"Loading embedding model: {model_name}")
-        _cached_embedding_model = SentenceTransformer(model_name, device="cpu")
-        _cached_embedding_model.eval()
-        _cached_embedding_model_name = model_name
-    
-    return _cached_embedding_model
+    """Lấy embedding model từ registry (load nếu chưa có)"""
+    return model_registry.get(EMBEDDING_KIND, model_name, "cpu", _embedding_loader(model_name))
 
 
 def _load_nli_model(model_path: str, device: Optional[str] = None):
-    """Cache và load NLI model + tokenizer"""
-    global _cached_nli_model, _cached_nli_tokenizer, _cached_nli_model_path
-    global _cached_nli_device, _cached_contra_idx
-    
-    if device is None:
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-    
-    # Nếu model đã load và đúng path + device → return cache
-    if (_cached_nli_model_path == model_path and 
-        _cached_nli_device == device and
-        _cached_nli_model is not None):
-        return _cached_nli_tokenizer, _cached_nli_model, _cached_contra_idx, device
-    
-    # Check memory trước khi load model mới
-    _check_memory_and_clear_if_needed()
-    
-    print(f"📦 Loading NLI model: {model_path} on {device}")
-    
-    # Load model mới
-    _cached_nli_tokenizer = AutoTokenizer.from_pretrained(model_path)
-    _cached_nli_model = AutoModelForSequenceClassification.from_pretrained(model_path)
-    _cached_nli_model.eval()
-    _cached_nli_model.to(device)
-    
-    # Lưu metadata
-    _cached_nli_model_path = model_path
-    _cached_nli_device = device
-    _cached_contra_idx = _get_contradiction_idx_from_config(_cached_nli_model)
+    """Lấy NLI model + tokenizer từ registry (load nếu chưa có)"""
+    device = device or _default_device()
+    tokenizer, model, contra_idx = model_registry.get(
+        NLI_KIND, model_path, device, _nli_loader(model_path, device)
+    )
+    return tokenizer, model, contra_idx, device
+
+
+@contextmanager
+def _use_nli_model(model_path: str, device: Optional[str] = None):
+    """Giữ reference tới NLI model trong suốt một lần phân tích"""
+    device = device or _default_device()
+    with model_registry.use(NLI_KIND, model_path, device, _nli_loader(model_path, device)) as value:
+        tokenizer, model, contra_idx = value
+        yield tokenizer, model, contra_idx, device
+
+
+@contextmanager
+def _use_embedding_model(model_name: str):
+    """Giữ reference tới embedding model trong suốt một lần phân tích"""
+    with model_registry.use(EMBEDDING_KIND, model_name, "cpu", _embedding_loader(model_name)) as model:
+        yield model
+
+
+# Câu giả dùng để làm nóng model lúc khởi động (JIT kernel, allocator, tokenizer cache)
+_WARMUP_PAIRS = [
+    ("Doanh thu quý 2 năm 2023 tăng 15%.", "Doanh thu quý 2 năm 2023 giảm 15%."),
+    ("Cuộc họp bắt đầu lúc 9:00 sáng thứ Hai.", "Cuộc họp bị hoãn sang tuần sau."),
+    ("The report was published in 2022.", "The report has never been published."),
+    ("Nghiên cứu khảo sát 1.200 sinh viên.", "Mẫu khảo sát gồm 1200 sinh viên đại học."),
+]
+
+
+def resolve_nli_model_path(mode: str) -> str:
+    """mode ("base" / "finetuned") → model path"""
+    return FINETUNED_MODEL if mode == "finetuned" else BASE_MODEL
+
+
+def warmup_nli_model(model_path: str, batch_size: int = 8, max_length: int = 128) -> float:
+    """
+    Load NLI model vào registry và chạy 1 batch giả có kích thước thật.
     
-    return _cached_nli_tokenizer, _cached_nli_model, _cached_contra_idx, device
+    Returns:
+        float: Thời gian chạy batch warmup (giây), không tính thời gian load
+    """
+    pairs = list(itertools.islice(itertools.cycle(_WARMUP_PAIRS), max(batch_size, 1)))
+    with _use_nli_model(model_path) as (tokenizer, model, contra_idx, device):
+        started = time.perf_counter()
+        _score_nli_batch(
+            [a for a, _ in pairs], [b for _, b in pairs],
+            tokenizer, model, device, contra_idx, max_length
+        )
+        return time.perf_counter() - started
+
+
+def warmup_embedding_model(model_name: str = DEFAULT_EMBEDDING_MODEL) -> float:
+    """Load embedding model vào registry và encode 1 batch giả; trả về thời gian encode (giây)"""
+    sentences = [s for pair in _WARMUP_PAIRS for s in pair]
+    with _use_embedding_model(model_name) as model:
+        started = time.perf_counter()
+        model.encode(sentences, convert_to_numpy=True, normalize_embeddings=True)
+        return time.perf_counter() - started
 
 
 def _get_contradiction_idx_from_config(model) -> int:
@@ -116,29 +155,47 @@ def _get_contradiction_idx_from_config(model) -> int:
     return 0
 
 
-def _contains_number_or_time_conflict(text1: str, text2: str) -> bool:
-    """Kiểm tra xung đột về số liệu hoặc thời gian"""
-    nums1 = set(re.findall(r"\b\d+(?:[.,]\d+)?\b", text1))
-    nums2 = set(re.findall(r"\b\d+(?:[.,]\d+)?\b", text2))
+def _contains_number_or_time_conflict(
+    text1: str,
+    text2: str,
+    facts1: Optional[SentenceFacts] = None,
+    facts2: Optional[SentenceFacts] = None,
+) -> bool:
+    """Kiểm tra xung đột về số liệu hoặc thời gian (dựa trên dữ kiện đã trích xuất sẵn)"""
+    facts1 = facts1 or extract_facts(text1)
+    facts2 = facts2 or extract_facts(text2)
+    return facts_conflict(facts1, facts2)
 
-    date_patterns = [
-        r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b",  # dd/mm/yyyy
-        r"\b\d{1,2}[/-]\d{1,2}\b",             # dd/mm
-        r"\b\d{1,2}:\d{2}(?::\d{2})?\b",       # HH:MM:SS
-        r"\bQ[1-4]\b",                          # Quarters
-        r"\b(?:20)?\d{2}\b"                     # Năm
-    ]
-    
-    def grab_dates(t: str):
-        s = set()
-        for p in date_patterns:
-            s.update(re.findall(p, t))
-        return s
 
-    dates1, dates2 = grab_dates(text1), grab_dates(text2)
-    has_both_nums = bool(nums1) and bool(nums2)
-    has_both_dates = bool(dates1) and bool(dates2)
-    return has_both_nums or has_both_dates
+def _rule_based_numeric_contradictions(
+    sentences: List[str],
+    facts: List[SentenceFacts],
+    threshold: float,
+) -> Tuple[List[Dict[str, Any]], set]:
+    """
+    Mâu thuẫn số liệu hiển nhiên (cùng khung câu, khác giá trị) → không cần NLI.
+    Chỉ so các câu có dữ kiện; trả về (danh sách mâu thuẫn, tập cặp (i, j) đã xử lý).
+    """
+    if NUMERIC_RULE_CONFIDENCE < threshold:
+        return [], set()
+    
+    with_facts = [i for i, f in enumerate(facts) if f.has_facts]
+    found, handled = [], set()
+    for i, j in itertools.combinations(with_facts, 2):
+        kind = obvious_numeric_contradiction(facts[i], facts[j])
+        if kind is None:
+            continue
+        handled.add((i, j))
+        found.append({
+            "sentence1_index": i,
+            "sentence2_index": j,
+            "sentence1": sentences[i],
+            "sentence2": sentences[j],
+            "confidence": NUMERIC_RULE_CONFIDENCE,
+            "boosted": False,
+            "rule": f"numeric_{kind}",
+        })
+    return found, handled
 
 
 def _model_supports_amp(model) -> bool:
@@ -154,12 +211,16 @@ def check_contradictions(
     mode: str = "finetuned",
     threshold: float = 0.75,
     use_embeddings_filter: bool = True,
-    embedding_model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+    embedding_model_name: str = DEFAULT_EMBEDDING_MODEL,
     top_k: int = 50,
     sim_min: float = 0.30,
     sim_max: float = 0.98,
     batch_size: int = 8,
     max_length: int = 128,
+    use_fact_rules: bool = True,
+    cascade: bool = False,
+    cascade_low: float = CASCADE_LOW,
+    cascade_high: float = CASCADE_HIGH,
 ) -> Dict[str, Any]:
     """
     Phân tích mâu thuẫn trong văn bản với 2 chế độ model
@@ -177,6 +238,11 @@ def check_contradictions(
         sim_max: Độ tương đồng tối đa
         batch_size: Kích thước batch
         max_length: Độ dài tối đa của câu
+        use_fact_rules: Phát hiện mâu thuẫn số liệu hiển nhiên bằng luật, không qua NLI
+        cascade: Chấm trước bằng student model (NLI_STUDENT_MODEL), chỉ chấm lại
+            bằng model của `mode` các cặp có điểm trong [cascade_low, cascade_high)
+        cascade_low: Dưới ngưỡng này coi là không mâu thuẫn, không chấm lại
+        cascade_high: Từ ngưỡng này giữ nguyên điểm của student
         
     Returns:
         Dict[str, Any]: Kết quả phân tích
@@ -187,11 +253,13 @@ def check_contradictions(
             "text": str,
             "total_sentences": int,
             "sentences": List[str],
+            "sentence_spans": List[[start, end]],  # offset của từng câu trong `text` gốc
             "total_contradictions": int,
             "contradictions": [...],
             "metadata": {
                 "analyzed_at": str,
                 "threshold": float,
+                "cascade": Optional[dict],  # chỉ có khi cascade=True
                 "error": Optional[str]
             }
         }
@@ -205,6 +273,13 @@ def check_contradictions(
             "mode": mode,
             "text": text
         }
+    if cascade and not (0.0 <= cascade_low <= cascade_high <= 1.0):
+        return {
+            "success": False,
+            "error": "Cần 0 <= cascade_low <= cascade_high <= 1.",
+            "mode": mode,
+            "text": text
+        }
     
     result = {
         "success": False,
@@ -213,6 +288,7 @@ def check_contradictions(
         "text": text,
         "total_sentences": 0,
         "sentences": [],
+        "sentence_spans": [],
         "total_contradictions": 0,
         "contradictions": [],
         "metadata": {
@@ -223,9 +299,11 @@ def check_contradictions(
     }
     
     try:
-        # Bước 1: Tách câu
-        sentences = extract_sentences(text)
+        # Bước 1: Tách câu (giữ offset trong văn bản gốc)
+        segments = list(iter_sentences(text, min_words=3))
+        sentences = [sentence for sentence, _, _ in segments]
         result["sentences"] = sentences
+        result["sentence_spans"] = [[start, end] for _, start, end in segments]
         result["total_sentences"] = len(sentences)
         if len(sentences) < 2:
             result["success"] = True
@@ -233,30 +311,37 @@ def check_contradictions(
             print("\nCần ít nhất 2 câu để phân tích mâu thuẫn")
             return result
         
-        # Bước 2: Chọn và load NLI model (cached)
-        model_path = FINETUNED_MODEL if mode == "finetuned" else BASE_MODEL
-        result["model_path"] = model_path
+        # Dữ kiện số/thời gian: trích xuất 1 lần cho mỗi câu
+        facts = [extract_facts(sent) for sent in sentences]
+        rule_contradictions, rule_pairs = (
+            _rule_based_numeric_contradictions(sentences, facts, threshold)
+            if use_fact_rules else ([], set())
+        )
         
-        tokenizer, model, contra_idx, device = _load_nli_model(model_path)
+        # Bước 2: Chọn NLI model (registry giữ sẵn cả base + finetuned nếu đủ budget)
+        model_path = resolve_nli_model_path(mode)
+        result["model_path"] = model_path
         
         # Bước 3: Lọc cặp câu bằng embedding (nếu bật)
         if use_embeddings_filter:
-            embedding_model = _load_embedding_model(embedding_model_name)
-            sentence_pairs = _filter_sentence_pairs_by_embedding(
-                sentences, embedding_model, sim_min, sim_max, top_k
-            )
+            with _use_embedding_model(embedding_model_name) as embedding_model:
+                sentence_pairs = _filter_sentence_pairs_by_embedding(
+                    sentences, embedding_model, sim_min, sim_max, top_k
+                )
         else:
             sentence_pairs = list(itertools.combinations(range(len(sentences)), 2))
         
-        if not sentence_pairs:
-            result["success"] = True
-            return result
+        # Cặp đã được luật số liệu xử lý thì không cần chạy NLI
+        sentence_pairs = [p for p in sentence_pairs if p not in rule_pairs]
         
         # Bước 4: Phân tích NLI cho từng batch
-        contradictions_list = _analyze_nli_batches(
-            sentences, sentence_pairs, tokenizer, model, device,
-            contra_idx, batch_size, max_length, threshold
+        nli_contradictions, cascade_stats = _score_candidate_pairs(
+            sentences, sentence_pairs, model_path, batch_size, max_length,
+            threshold, facts, cascade, cascade_low, cascade_high
         )
+        if cascade_stats is not None:
+            result["metadata"]["cascade"] = cascade_stats
+        contradictions_list = rule_contradictions + nli_contradictions
         
         # Bước 5: Loại bỏ trùng lặp và format kết quả
         final_contradictions = _deduplicate_and_format(contradictions_list)
@@ -265,9 +350,6 @@ def check_contradictions(
         result["total_contradictions"] = len(final_contradictions)
         result["contradictions"] = final_contradictions
         
-        # Check memory sau khi xử lý
-        _check_memory_and_clear_if_needed()
-        
     except Exception as e:
         result["metadata"]["error"] = str(e)
         print(f"Error: {e}")
@@ -275,14 +357,171 @@ def check_contradictions(
     return result
 
 
-def _filter_sentence_pairs_by_embedding(
-    sentences: List[str],
-    embedding_model: SentenceTransformer,
-    sim_min: float,
-    sim_max: float,
-    top_k: int
-) -> List[Tuple[int, int]]:
-    """Lọc cặp câu dựa trên embedding similarity"""
+def iter_contradictions(
+    text: str,
+    mode: str = "finetuned",
+    threshold: float = 0.75,
+    use_embeddings_filter: bool = True,
+    embedding_model_name: str = DEFAULT_EMBEDDING_MODEL,
+    top_k: int = 50,
+    sim_min: float = 0.30,
+    sim_max: float = 0.98,
+    batch_size: int = 8,
+    max_length: int = 128,
+    time_budget_s: Optional[float] = None,
+    max_pairs: Optional[int] = None,
+    max_hits: Optional[int] = None,
+    hit_confidence: float = 0.9,
+    use_fact_rules: bool = True,
+):
+    """
+    Phiên bản streaming của check_contradictions
+    
+    Mâu thuẫn số liệu hiển nhiên (luật, không qua NLI) được yield ngay đầu tiên.
+    Sau đó cặp câu được chấm theo thứ tự embedding similarity giảm dần, mỗi batch
+    xong thì yield ngay các mâu thuẫn tìm được. Dừng sớm khi:
+        - hết thời gian (time_budget_s, tính từ lúc bắt đầu, gồm cả tách câu/embedding;
+          kiểm tra trước mỗi batch nên không chấm thêm batch nào sau deadline)
+        - đã chấm đủ max_pairs cặp
+        - đã tìm đủ max_hits mâu thuẫn có confidence >= hit_confidence
+    
+    Args:
+        (các tham số giống check_contradictions)
+        time_budget_s: Giới hạn thời gian (giây), None = không giới hạn
+        max_pairs: Số cặp tối đa được chấm, None = không giới hạn
+        max_hits: Số mâu thuẫn "chắc chắn" cần tìm trước khi dừng, None = không dừng sớm
+        hit_confidence: Ngưỡng confidence để tính là 1 hit cho max_hits
+        
+    Yields:
+        Dict[str, Any]: các event
+        {"event": "start", "mode", "model_path", "total_sentences", "sentences", "total_pairs"}
+        {"event": "batch", "contradictions": [...], "pairs_scored": int, "elapsed_s": float}
+        {"event": "done", "total_contradictions", "pairs_scored", "total_pairs",
+         "stopped_reason": "completed" | "time_budget" | "pair_budget" | "enough_hits", "elapsed_s"}
+        {"event": "error", "error": str}
+    """
+    started = time.perf_counter()
+    
+    def elapsed() -> float:
+        return round(time.perf_counter() - started, 4)
+    
+    if mode not in ["base", "finetuned"]:
+        yield {
+            "event": "error",
+            "error": f"Mode '{mode}' không hợp lệ. Chỉ chấp nhận 'base' hoặc 'finetuned'.",
+        }
+        return
+    
+    try:
+        # Tách câu giống check_contradictions (bỏ câu quá ngắn)
+        sentences = [sentence for sentence, _, _ in iter_sentences(text, min_words=3)]
+        model_path = resolve_nli_model_path(mode)
+        facts = [extract_facts(sent) for sent in sentences]
+        rule_contradictions, rule_pairs = (
+            _rule_based_numeric_contradictions(sentences, facts, threshold)
+            if use_fact_rules else ([], set())
+        )
+        
+        with ExitStack() as stack:
+            if len(sentences) >= 2:
+                tokenizer, model, contra_idx, device = stack.enter_context(_use_nli_model(model_path))
+            
+            # Xếp cặp theo similarity giảm dần: cặp "gần nhau" nhất dễ mâu thuẫn nhất
+            if len(sentences) < 2:
+                sentence_pairs = []
+            elif use_embeddings_filter:
+                embedding_model = stack.enter_context(_use_embedding_model(embedding_model_name))
+                sim = _embedding_similarity(sentences, embedding_model)
+                sentence_pairs = _select_pairs_by_similarity(sim, sim_min, sim_max, top_k)
+                sentence_pairs.sort(key=lambda p: sim[p[0], p[1]], reverse=True)
+            else:
+                sentence_pairs = list(itertools.combinations(range(len(sentences)), 2))
+            sentence_pairs = [p for p in sentence_pairs if p not in rule_pairs]
+            
+            truncated = max_pairs is not None and len(sentence_pairs) > max_pairs
+            if truncated:
+                sentence_pairs = sentence_pairs[:max(max_pairs, 0)]
+            total_pairs = len(sentence_pairs)
+            
+            yield {
+                "event": "start",
+                "mode": mode,
+                "model_path": model_path,
+                "total_sentences": len(sentences),
+                "sentences": sentences,
+                "total_pairs": total_pairs,
+            }
+            
+            pairs_scored = 0
+            total_found = 0
+            hits = 0
+            stopped_reason = "completed"
+            
+            def _numbered(found: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                nonlocal total_found, hits
+                found.sort(key=lambda x: x["confidence"], reverse=True)
+                for item in found:
+                    total_found += 1
+                    item["id"] = total_found
+                hits += sum(1 for item in found if item["confidence"] >= hit_confidence)
+                return found
+            
+            if rule_contradictions:
+                yield {
+                    "event": "batch",
+                    "contradictions": _numbered(rule_contradictions),
+                    "pairs_scored": 0,
+                    "elapsed_s": elapsed(),
+                }
+                if max_hits is not None and hits >= max_hits:
+                    stopped_reason = "enough_hits"
+            
+            for b in range(0, total_pairs if stopped_reason == "completed" else 0, batch_size):
+                # Deadline kiểm tra trước khi chấm: batch đầu tiên cũng không vượt budget
+                if time_budget_s is not None and time.perf_counter() - started >= time_budget_s:
+                    stopped_reason = "time_budget"
+                    break
+                batch = sentence_pairs[b:b+batch_size]
+                scores = _score_nli_batch(
+                    [sentences[i] for (i, j) in batch], [sentences[j] for (i, j) in batch],
+                    tokenizer, model, device, contra_idx, max_length
+                )
+                pairs_scored += len(batch)
+                found = _numbered(
+                    _contradictions_from_scores(sentences, batch, scores, threshold, facts)
+                )
+                
+                if found:
+                    yield {
+                        "event": "batch",
+                        "contradictions": found,
+                        "pairs_scored": pairs_scored,
+                        "elapsed_s": elapsed(),
+                    }
+                
+                if max_hits is not None and hits >= max_hits and pairs_scored < total_pairs:
+                    stopped_reason = "enough_hits"
+                    break
+                
+            if stopped_reason == "completed" and truncated:
+                stopped_reason = "pair_budget"
+        
+        yield {
+            "event": "done",
+            "total_contradictions": total_found,
+            "pairs_scored": pairs_scored,
+            "total_pairs": total_pairs,
+            "stopped_reason": stopped_reason,
+            "elapsed_s": elapsed(),
+        }
+    
+    except Exception as e:
+        print(f"Error: {e}")
+        yield {"event": "error", "error": str(e)}
+
+
+def _embedding_similarity(sentences: List[str], embedding_model: SentenceTransformer) -> np.ndarray:
+    """Ma trận cosine similarity (n, n) giữa các câu, đường chéo = -1"""
     with torch.no_grad():
         embs = embedding_model.encode(
             sentences, convert_to_tensor=True,
@@ -292,9 +531,18 @@ def _filter_sentence_pairs_by_embedding(
     
     sim = torch.matmul(embs, embs.T).cpu().numpy()
     np.fill_diagonal(sim, -1.0)
-    
+    return sim
+
+
+def _select_pairs_by_similarity(
+    sim: np.ndarray,
+    sim_min: float,
+    sim_max: float,
+    top_k: int
+) -> List[Tuple[int, int]]:
+    """Chọn cặp (i < j) nằm trong [sim_min, sim_max], tối đa top_k cặp cho mỗi câu"""
     sentence_pairs = []
-    n = len(sentences)
+    n = sim.shape[0]
     for i in range(n):
         idxs = [j for j in range(n) if sim_min <= sim[i, j] <= sim_max]
         if len(idxs) > top_k:
@@ -306,6 +554,111 @@ def _filter_sentence_pairs_by_embedding(
     return sentence_pairs
 
 
+def _filter_sentence_pairs_by_embedding(
+    sentences: List[str],
+    embedding_model: SentenceTransformer,
+    sim_min: float,
+    sim_max: float,
+    top_k: int
+) -> List[Tuple[int, int]]:
+    """Lọc cặp câu dựa trên embedding similarity"""
+    sim = _embedding_similarity(sentences, embedding_model)
+    return _select_pairs_by_similarity(sim, sim_min, sim_max, top_k)
+
+
+def _score_nli_batch(
+    premises: List[str],
+    hyps: List[str],
+    tokenizer,
+    model,
+    device: str,
+    contra_idx: int,
+    max_length: int,
+) -> np.ndarray:
+    """Chấm điểm contradiction 2 chiều (A->B, B->A) cho 1 batch, trả về mảng (n, 2)"""
+    inputs_f = tokenizer(premises, hyps, return_tensors="pt",
+                        truncation=True, padding=True, max_length=max_length).to(device)
+    inputs_b = tokenizer(hyps, premises, return_tensors="pt",
+                        truncation=True, padding=True, max_length=max_length).to(device)
+    
+    with torch.no_grad():
+        use_amp = (device == "cuda") and _model_supports_amp(model)
+        if use_amp:
+            with torch.amp.autocast('cuda'):
+                logits_f = model(**inputs_f).logits
+                logits_b = model(**inputs_b).logits
+        else:
+            logits_f = model(**inputs_f).logits
+            logits_b = model(**inputs_b).logits
+    
+    probs_f = F.softmax(logits_f.float(), dim=-1).cpu().numpy()
+    probs_b = F.softmax(logits_b.float(), dim=-1).cpu().numpy()
+    return np.stack([probs_f[:, contra_idx], probs_b[:, contra_idx]], axis=1)
+
+
+def _iter_nli_scores(
+    sentences: List[str],
+    sentence_pairs: List[Tuple[int, int]],
+    tokenizer,
+    model,
+    device: str,
+    contra_idx: int,
+    batch_size: int,
+    max_length: int,
+):
+    """Generator: yield (batch_pairs, scores[n, 2]) cho từng batch cặp câu"""
+    for b in range(0, len(sentence_pairs), batch_size):
+        batch = sentence_pairs[b:b+batch_size]
+        premises = [sentences[i] for (i, j) in batch]
+        hyps = [sentences[j] for (i, j) in batch]
+        yield batch, _score_nli_batch(
+            premises, hyps, tokenizer, model, device, contra_idx, max_length
+        )
+
+
+def _contradictions_from_scores(
+    sentences: List[str],
+    batch: List[Tuple[int, int]],
+    scores: np.ndarray,
+    threshold: float,
+    facts: Optional[List[SentenceFacts]] = None,
+) -> List[Dict[str, Any]]:
+    """Áp ngưỡng + boost số/thời gian lên điểm NLI của 1 batch"""
+    contradictions_list = []
+    for (i, (si, sj)) in enumerate(batch):
+        conf, forward, boosted = _pair_confidence(
+            sentences[si], sentences[sj], float(scores[i, 0]), float(scores[i, 1]),
+            facts[si] if facts else None, facts[sj] if facts else None,
+        )
+        if conf >= threshold:
+            direction = (si, sj) if forward else (sj, si)
+            contradictions_list.append({
+                "sentence1_index": int(direction[0]),
+                "sentence2_index": int(direction[1]),
+                "sentence1": sentences[direction[0]],
+                "sentence2": sentences[direction[1]],
+                "confidence": round(conf, 4),
+                "boosted": boosted
+            })
+    return contradictions_list
+
+
+def _pair_confidence(
+    text1: str,
+    text2: str,
+    p1: float,
+    p2: float,
+    facts1: Optional[SentenceFacts] = None,
+    facts2: Optional[SentenceFacts] = None,
+) -> Tuple[float, bool, bool]:
+    """Gộp điểm 2 chiều → (confidence, chiều A->B mạnh hơn?, có boost không)"""
+    # Boost nếu có xung đột số/thời gian
+    boost = 0.05 if _contains_number_or_time_conflict(text1, text2, facts1, facts2) else 0.0
+    conf1 = min(p1 + boost, 1.0)
+    conf2 = min(p2 + boost, 1.0)
+    return max(conf1, conf2), conf1 >= conf2, boost > 0
+
+
 def _analyze_nli_batches(
     sentences: List[str],
     sentence_pairs: List[Tuple[int, int]],
@@ -315,64 +668,113 @@ def _analyze_nli_batches(
     contra_idx: int,
     batch_size: int,
     max_length: int,
-    threshold: float
+    threshold: float,
+    facts: Optional[List[SentenceFacts]] = None,
 ) -> List[Dict[str, Any]]:
     """Phân tích NLI cho các batches của sentence pairs"""
     contradictions_list = []
+    for batch, scores in _iter_nli_scores(
+        sentences, sentence_pairs, tokenizer, model, device,
+        contra_idx, batch_size, max_length
+    ):
+        contradictions_list.extend(
+            _contradictions_from_scores(sentences, batch, scores, threshold, facts)
+        )
+    return contradictions_list
+
+
+def _score_candidate_pairs(
+    sentences: List[str],
+    sentence_pairs: List[Tuple[int, int]],
+    model_path: str,
+    batch_size: int,
+    max_length: int,
+    threshold: float,
+    facts: Optional[List[SentenceFacts]] = None,
+    cascade: bool = False,
+    cascade_low: float = CASCADE_LOW,
+    cascade_high: float = CASCADE_HIGH,
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Chấm NLI cho các cặp ứng viên (trực tiếp hoặc qua cascade) → (contradictions, cascade stats)"""
+    if cascade and STUDENT_MODEL:
+        return _analyze_nli_cascade(
+            sentences, sentence_pairs, STUDENT_MODEL, model_path,
+            batch_size, max_length, threshold, cascade_low, cascade_high, facts
+        )
     
-    for b in range(0, len(sentence_pairs), batch_size):
-        batch = sentence_pairs[b:b+batch_size]
-        
-        # A->B
-        premises = [sentences[i] for (i, j) in batch]
-        hyps = [sentences[j] for (i, j) in batch]
-        inputs_f = tokenizer(premises, hyps, return_tensors="pt",
-                            truncation=True, padding=True, max_length=max_length).to(device)
-        # B->A
-        premises_r = hyps
-        hyps_r = premises
-        inputs_b = tokenizer(premises_r, hyps_r, return_tensors="pt",
-                            truncation=True, padding=True, max_length=max_length).to(device)
-        
-        with torch.no_grad():
-            use_amp = (device == "cuda") and _model_supports_amp(model)
-            if use_amp:
-                with torch.amp.autocast('cuda'):
-                    logits_f = model(**inputs_f).logits
-                    logits_b = model(**inputs_b).logits
-            else:
-                logits_f = model(**inputs_f).logits
-                logits_b = model(**inputs_b).logits
-        
-        probs_f = F.softmax(logits_f.float(), dim=-1).cpu().numpy()
-        probs_b = F.softmax(logits_b.float(), dim=-1).cpu().numpy()
-        
-        for (i, (si, sj)) in enumerate(batch):
-            p1 = float(probs_f[i, contra_idx])
-            p2 = float(probs_b[i, contra_idx])
-            
-            # Boost nếu có xung đột số/thời gian
-            boost = 0.05 if _contains_number_or_time_conflict(sentences[si], sentences[sj]) else 0.0
-            conf1 = min(p1 + boost, 1.0)
-            conf2 = min(p2 + boost, 1.0)
-            conf = max(conf1, conf2)
-            
-            if conf >= threshold:
-                direction = (si, sj) if conf1 >= conf2 else (sj, si)
-                contradictions_list.append({
-                    "sentence1_index": int(direction[0]),
-                    "sentence2_index": int(direction[1]),
-                    "sentence1": sentences[direction[0]],
-                    "sentence2": sentences[direction[1]],
-                    "confidence": round(conf, 4),
-                    "boosted": boost > 0
-                })
-        
-        # Clear GPU cache mỗi batch
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
+    cascade_stats = None
+    if cascade:
+        print("⚠️ NLI_STUDENT_MODEL chưa được cấu hình, bỏ qua cascade")
+        cascade_stats = {"student_model": None, "enabled": False}
+    with _use_nli_model(model_path) as (tokenizer, model, contra_idx, device):
+        contradictions_list = _analyze_nli_batches(
+            sentences, sentence_pairs, tokenizer, model, device,
+            contra_idx, batch_size, max_length, threshold, facts
+        )
+    return contradictions_list, cascade_stats
+
+
+def _score_all_pairs(
+    sentences: List[str],
+    sentence_pairs: List[Tuple[int, int]],
+    model_path: str,
+    batch_size: int,
+    max_length: int,
+) -> np.ndarray:
+    """Chấm điểm toàn bộ cặp câu bằng 1 model, trả về mảng (n, 2)"""
+    if not sentence_pairs:
+        return np.zeros((0, 2), dtype=np.float32)
+    with _use_nli_model(model_path) as (tokenizer, model, contra_idx, device):
+        return np.concatenate([
+            scores for _, scores in _iter_nli_scores(
+                sentences, sentence_pairs, tokenizer, model, device,
+                contra_idx, batch_size, max_length
+            )
+        ], axis=0)
+
+
+def _analyze_nli_cascade(
+    sentences: List[str],
+    sentence_pairs: List[Tuple[int, int]],
+    student_path: str,
+    teacher_path: str,
+    batch_size: int,
+    max_length: int,
+    threshold: float,
+    low: float,
+    high: float,
+    facts: Optional[List[SentenceFacts]] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Cascade student → teacher:
+    - student chấm tất cả các cặp
+    - điểm < low: bỏ qua, điểm >= high: giữ điểm student
+    - còn lại (vùng không chắc chắn): chấm lại bằng teacher
+    """
+    # Student nhỏ → batch lớn hơn vẫn vừa bộ nhớ
+    scores = _score_all_pairs(sentences, sentence_pairs, student_path, batch_size * 4, max_length)
+    peak = scores.max(axis=1) if len(scores) else np.zeros(0, dtype=np.float32)
     
-    return contradictions_list
+    uncertain = np.flatnonzero((peak >= low) & (peak < high))
+    if uncertain.size:
+        scores[uncertain] = _score_all_pairs(
+            sentences, [sentence_pairs[k] for k in uncertain],
+            teacher_path, batch_size, max_length
+        )
+    
+    keep = np.flatnonzero(peak >= low)
+    contradictions_list = _contradictions_from_scores(
+        sentences, [sentence_pairs[k] for k in keep], scores[keep], threshold, facts
+    )
+    stats = {
+        "enabled": True,
+        "student_model": student_path,
+        "band": [low, high],
+        "pairs_total": len(sentence_pairs),
+        "pairs_rescored": int(uncertain.size),
+    }
+    print(f"🔀 Cascade: {uncertain.size}/{len(sentence_pairs)} cặp chấm lại bằng {teacher_path}")
+    return contradictions_list, stats
 
 
 def _deduplicate_and_format(contradictions_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -389,3 +791,326 @@ def _deduplicate_and_format(contradictions_list: List[Dict[str, Any]]) -> List[D
         contradiction["id"] = idx + 1
     
     return final_contradictions
+
+
+# ============================================================================
+# DOCUMENT MODE (câu đã được lưu trong bảng SENTENCE)
+# ============================================================================
+
+def check_sentence_contradictions(
+    sentences: List[str],
+    embeddings: Optional[np.ndarray] = None,
+    hashes: Optional[List[str]] = None,
+    mode: str = "finetuned",
+    threshold: float = 0.75,
+    embedding_model_name: str = DEFAULT_EMBEDDING_MODEL,
+    top_k: int = 50,
+    sim_min: float = 0.30,
+    sim_max: float = 0.98,
+    batch_size: int = 8,
+    max_length: int = 128,
+    use_fact_rules: bool = True,
+    cascade: bool = False,
+    cascade_low: float = CASCADE_LOW,
+    cascade_high: float = CASCADE_HIGH,
+) -> Dict[str, Any]:
+    """
+    Phân tích mâu thuẫn trên danh sách câu đã tách sẵn (vd. Sentence rows của document),
+    không tách câu lại và dùng lại embedding đã lưu (Sentence.emb).
+    
+    Args:
+        sentences: Các câu theo thứ tự trong document
+        embeddings: Ma trận (n, d) đã normalize; None → encode bằng embedding_model_name
+        hashes: Sentence.hash tương ứng (dùng làm key cache dữ kiện số/thời gian)
+        (các tham số còn lại giống check_contradictions)
+        
+    Returns:
+        Dict[str, Any]: {"success", "mode", "model_path", "total_sentences",
+        "total_pairs_scored", "total_contradictions", "contradictions", "metadata"};
+        sentence1_index / sentence2_index là vị trí trong `sentences`.
+    """
+    if mode not in ["base", "finetuned"]:
+        return {
+            "success": False,
+            "error": f"Mode '{mode}' không hợp lệ. Chỉ chấp nhận 'base' hoặc 'finetuned'.",
+            "mode": mode,
+        }
+    
+    model_path = resolve_nli_model_path(mode)
+    result = {
+        "success": False,
+        "mode": mode,
+        "model_path": model_path,
+        "total_sentences": len(sentences),
+        "total_pairs_scored": 0,
+        "total_contradictions": 0,
+        "contradictions": [],
+        "metadata": {
+            "analyzed_at": datetime.utcnow().isoformat(),
+            "threshold": threshold,
+            "error": None
+        }
+    }
+    
+    try:
+        if len(sentences) < 2:
+            result["success"] = True
+            result["metadata"]["error"] = "Cần ít nhất 2 câu để phân tích"
+            return result
+        
+        facts = [
+            extract_facts(sent, hashes[i] if hashes else None)
+            for i, sent in enumerate(sentences)
+        ]
+        rule_contradictions, rule_pairs = (
+            _rule_based_numeric_contradictions(sentences, facts, threshold)
+            if use_fact_rules else ([], set())
+        )
+        
+        if embeddings is None or len(embeddings) != len(sentences):
+            embeddings = encode_sentences(sentences, embedding_model_name)
+        sim = np.asarray(embeddings, dtype=np.float32) @ np.asarray(embeddings, dtype=np.float32).T
+        np.fill_diagonal(sim, -1.0)
+        sentence_pairs = [
+            p for p in _select_pairs_by_similarity(sim, sim_min, sim_max, top_k)
+            if p not in rule_pairs
+        ]
+        
+        nli_contradictions, cascade_stats = _score_candidate_pairs(
+            sentences, sentence_pairs, model_path, batch_size, max_length,
+            threshold, facts, cascade, cascade_low, cascade_high
+        )
+        if cascade_stats is not None:
+            result["metadata"]["cascade"] = cascade_stats
+        
+        final_contradictions = _deduplicate_and_format(rule_contradictions + nli_contradictions)
+        result["success"] = True
+        result["total_pairs_scored"] = len(sentence_pairs)
+        result["total_contradictions"] = len(final_contradictions)
+        result["contradictions"] = final_contradictions
+        
+    except Exception as e:
+        result["metadata"]["error"] = str(e)
+        print(f"Error: {e}")
+    
+    return result
+
+
+# ============================================================================
+# CROSS-DOCUMENT MODE
+# ============================================================================
+
+def _text_hash(text: str) -> str:
+    """Cùng quy ước hash với Sentence.hash (md5 của text câu)"""
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def encode_sentences(
+    sentences: List[str],
+    embedding_model_name: str = DEFAULT_EMBEDDING_MODEL,
+    batch_size: int = 64,
+) -> np.ndarray:
+    """Encode danh sách câu → ma trận float32 (n, d) đã normalize"""
+    if not sentences:
+        return np.zeros((0, 0), dtype=np.float32)
+    with _use_embedding_model(embedding_model_name) as embedding_model:
+        with torch.no_grad():
+            embs = embedding_model.encode(
+                sentences, batch_size=batch_size,
+                convert_to_numpy=True, normalize_embeddings=True,
+                show_progress_bar=False, device="cpu"
+            )
+    return np.asarray(embs, dtype=np.float32)
+
+
+def _select_corpus_candidates(
+    query_embs: np.ndarray,
+    corpus_embs: np.ndarray,
+    sim_min: float,
+    sim_max: float,
+    top_k: int,
+    exclude_mask: Optional[np.ndarray] = None,
+) -> List[Tuple[int, int, float]]:
+    """Với mỗi câu query, lấy top_k câu corpus gần nhất trong khoảng [sim_min, sim_max]"""
+    if query_embs.size == 0 or corpus_embs.size == 0:
+        return []
+    sim = query_embs @ corpus_embs.T
+    if exclude_mask is not None:
+        sim[:, exclude_mask] = -np.inf
+    k = min(top_k, sim.shape[1])
+    top = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+
+    candidates = []
+    for i in range(sim.shape[0]):
+        for j in top[i]:
+            score = float(sim[i, j])
+            if sim_min <= score <= sim_max:
+                candidates.append((i, int(j), score))
+    return candidates
+
+
+def _score_pairs_cached(
+    model_path: str,
+    pairs: List[Tuple[str, str]],
+    tokenizer,
+    model,
+    device: str,
+    contra_idx: int,
+    batch_size: int,
+    max_length: int,
+) -> Tuple[np.ndarray, int]:
+    """Chấm điểm các cặp (text A, text B), dùng lại điểm đã cache theo hash câu"""
+    scores = np.zeros((len(pairs), 2), dtype=np.float32)
+    keys = [(model_path, _text_hash(a), _text_hash(b)) for a, b in pairs]
+
+    missing: List[int] = []
+    with _pair_score_lock:
+        for idx, key in enumerate(keys):
+            cached = _pair_score_cache.get(key)
+            if cached is None:
+                missing.append(idx)
+            else:
+                _pair_score_cache.move_to_end(key)
+                scores[idx] = cached
+
+    for b in range(0, len(missing), batch_size):
+        batch = missing[b:b+batch_size]
+        batch_scores = _score_nli_batch(
+            [pairs[idx][0] for idx in batch],
+            [pairs[idx][1] for idx in batch],
+            tokenizer, model, device, contra_idx, max_length,
+        )
+        with _pair_score_lock:
+            for row, idx in enumerate(batch):
+                scores[idx] = batch_scores[row]
+                _pair_score_cache[keys[idx]] = (float(batch_scores[row, 0]), float(batch_scores[row, 1]))
+            while len(_pair_score_cache) > PAIR_SCORE_CACHE_SIZE:
+                _pair_score_cache.popitem(last=False)
+
+    return scores, len(pairs) - len(missing)
+
+
+def check_cross_document_contradictions(
+    text: str,
+    corpus_sentences: List[Dict[str, Any]],
+    corpus_embeddings: np.ndarray,
+    mode: str = "finetuned",
+    threshold: float = 0.75,
+    embedding_model_name: str = DEFAULT_EMBEDDING_MODEL,
+    corpus_top_k: int = 5,
+    sim_min: float = 0.30,
+    sim_max: float = 0.98,
+    batch_size: int = 8,
+    max_length: int = 128,
+    exclude_mask: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    """
+    Phát hiện mâu thuẫn giữa văn bản hiện tại và các tài liệu khác của user
+
+    Chỉ các câu corpus gần nhất (theo embedding) với từng câu của văn bản
+    mới được đưa vào NLI model; điểm của từng cặp được cache theo hash câu.
+
+    Args:
+        text: Văn bản cần kiểm tra
+        corpus_sentences: Metadata các câu corpus, mỗi phần tử có ít nhất "text";
+            các khóa khác (document_id, paragraph_id, sentence_id, ...) được trả lại nguyên vẹn
+        corpus_embeddings: Ma trận (m, d) đã normalize, cùng thứ tự với corpus_sentences
+        corpus_top_k: Số câu corpus tối đa so với mỗi câu của văn bản
+        exclude_mask: Mask boolean (m,) các câu corpus cần bỏ qua (vd: chính tài liệu đang sửa)
+        (các tham số còn lại giống check_contradictions)
+
+    Returns:
+        Dict[str, Any]: giống check_contradictions (kể cả "sentence_spans"),
+        mỗi contradiction có thêm "similarity" và "source" (metadata câu corpus)
+    """
+    if mode not in ["base", "finetuned"]:
+        return {
+            "success": False,
+            "error": f"Mode '{mode}' không hợp lệ. Chỉ chấp nhận 'base' hoặc 'finetuned'.",
+            "mode": mode,
+            "text": text
+        }
+
+    result = {
+        "success": False,
+        "mode": mode,
+        "model_path": None,
+        "text": text,
+        "total_sentences": 0,
+        "sentences": [],
+        "sentence_spans": [],
+        "total_corpus_sentences": len(corpus_sentences),
+        "total_pairs_scored": 0,
+        "cached_pairs": 0,
+        "total_contradictions": 0,
+        "contradictions": [],
+        "metadata": {
+            "analyzed_at": datetime.utcnow().isoformat(),
+            "threshold": threshold,
+            "error": None
+        }
+    }
+
+    try:
+        segments = list(iter_sentences(text, min_words=3))
+        sentences = [sentence for sentence, _, _ in segments]
+        result["sentences"] = sentences
+        result["sentence_spans"] = [[start, end] for _, start, end in segments]
+        result["total_sentences"] = len(sentences)
+        if not sentences or not corpus_sentences:
+            result["success"] = True
+            return result
+
+        model_path = resolve_nli_model_path(mode)
+        result["model_path"] = model_path
+
+        query_embs = encode_sentences(sentences, embedding_model_name)
+        candidates = _select_corpus_candidates(
+            query_embs, corpus_embeddings, sim_min, sim_max, corpus_top_k, exclude_mask
+        )
+        if not candidates:
+            result["success"] = True
+            return result
+
+        pairs = [(sentences[i], corpus_sentences[j]["text"]) for i, j, _ in candidates]
+        query_facts = [extract_facts(sent) for sent in sentences]
+        with _use_nli_model(model_path) as (tokenizer, model, contra_idx, device):
+            scores, cached = _score_pairs_cached(
+                model_path, pairs, tokenizer, model, device,
+                contra_idx, batch_size, max_length
+            )
+
+        contradictions_list = []
+        for row, (i, j, similarity) in enumerate(candidates):
+            conf, _, boosted = _pair_confidence(
+                pairs[row][0], pairs[row][1], float(scores[row, 0]), float(scores[row, 1]),
+                query_facts[i], extract_facts(pairs[row][1], corpus_sentences[j].get("hash")),
+            )
+            if conf < threshold:
+                continue
+            source = {k: v for k, v in corpus_sentences[j].items() if k != "text"}
+            contradictions_list.append({
+                "sentence1_index": i,
+                "sentence1": sentences[i],
+                "sentence2": corpus_sentences[j]["text"],
+                "confidence": round(conf, 4),
+                "boosted": boosted,
+                "similarity": round(similarity, 4),
+                "source": source,
+            })
+
+        contradictions_list.sort(key=lambda x: x["confidence"], reverse=True)
+        for idx, contradiction in enumerate(contradictions_list):
+            contradiction["id"] = idx + 1
+
+        result["success"] = True
+        result["total_pairs_scored"] = len(pairs)
+        result["cached_pairs"] = cached
+        result["total_contradictions"] = len(contradictions_list)
+        result["contradictions"] = contradictions_list
+
+    except Exception as e:
+        result["metadata"]["error"] = str(e)
+        print(f"Error: {e}")
+
+    return result
@@ -0,0 +1,391 @@
+"""
+diacritics.py
+
+Khôi phục dấu tiếng Việt cho văn bản gõ không dấu ("tri tue nhan tao" → "trí tuệ nhân tạo")
+-----------------------------------------------------------------------------------------
+- Mô hình: bigram âm tiết (có dấu) học từ corpus tiếng Việt chuẩn, compile offline thành
+  1 file nhị phân gồm 3 bảng hash đã sort (tra bằng binary search trên mmap):
+    * unigram:  hash(âm tiết có dấu)            → count
+    * bigram:   hash("âm_tiết_1 âm_tiết_2")      → count
+    * ứng viên: hash(âm tiết không dấu)          → "trí|trị|tri|..." (top theo count)
+- Giải mã: mỗi chuỗi âm tiết không dấu liên tiếp → Viterbi trên lưới ứng viên
+  (stupid backoff bigram → unigram). Số ứng viên mỗi vị trí bị chặn bởi MAX_CANDIDATES
+  nên chi phí tuyến tính theo độ dài câu.
+- Chỉ sửa các đoạn ≥ 2 âm tiết mà phần lớn bigram trên đường tốt nhất có trong mô hình,
+  để không "thêm dấu" bừa vào từ tiếng Anh ("to", "an", "can", ...).
+
+Build:
+    python -m app.ai.models.diacritics build corpus_vi_1.txt corpus_vi_2.txt -o app/ai/data/vi_diacritics.bin
+
+Đường dẫn lúc chạy lấy từ env DIACRITIC_MODEL_PATH (mặc định app/ai/data/vi_diacritics.bin).
+Không có file → get_diacritic_model() trả về None, normalizer bỏ qua bước này.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .spell_lexicon import stable_hash
+
+load_dotenv()
+
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parents[1] / "data" / "vi_diacritics.bin"
+DIACRITIC_MODEL_PATH = os.getenv("DIACRITIC_MODEL_PATH", str(DEFAULT_MODEL_PATH))
+
+MAGIC = b"LGDIAC01"
+# magic, n_unigrams, n_bigrams, n_bases, total_count,
+# uni_hashes, uni_counts, bi_hashes, bi_counts, base_hashes, base_offsets, base_lengths, blob
+_HEADER = struct.Struct("<8sIIIQ8Q")
+
+# Số ứng viên có dấu tối đa cho 1 âm tiết không dấu
+MAX_CANDIDATES = 8
+BACKOFF = 0.4
+MIN_BIGRAM_COUNT = 2
+# Tỉ lệ bigram tối thiểu trên đường Viterbi phải có trong mô hình thì mới sửa đoạn đó
+MIN_KNOWN_BIGRAM_RATIO = 0.5
+
+_SYLLABLE_RE = re.compile(r"[^\W\d_]+")
+# Ranh giới câu/cụm khi học bigram
+_CLAUSE_SPLIT_RE = re.compile(r"[.,;:!?…()\[\]\"“”\n]+")
+
+
+def strip_diacritics(text: str) -> str:
+    """'Trí tuệ' → 'Tri tue' (giữ nguyên độ dài chuỗi với văn bản NFC)"""
+    decomposed = unicodedata.normalize("NFD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return unicodedata.normalize("NFC", stripped).replace("đ", "d").replace("Đ", "D")
+
+
+def _is_plain_ascii_word(word: str) -> bool:
+    return word.isascii() and word.isalpha()
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+def _pad(buffer: bytearray, alignment: int = 8) -> None:
+    buffer.extend(b"\0" * (-len(buffer) % alignment))
+
+
+def count_ngrams(lines: Iterable[str]) -> Tuple[Counter, Counter]:
+    """Đếm unigram/bigram âm tiết (lower, NFC) trong từng cụm câu"""
+    unigrams: Counter = Counter()
+    bigrams: Counter = Counter()
+    for line in lines:
+        for clause in _CLAUSE_SPLIT_RE.split(unicodedata.normalize("NFC", line).lower()):
+            syllables = _SYLLABLE_RE.findall(clause)
+            unigrams.update(syllables)
+            bigrams.update(f"{a} {b}" for a, b in zip(syllables, syllables[1:]))
+    return unigrams, bigrams
+
+
+def build_model(
+    unigrams: Counter,
+    bigrams: Counter,
+    output_path: str,
+    min_bigram_count: int = MIN_BIGRAM_COUNT,
+    max_candidates: int = MAX_CANDIDATES,
+) -> Dict[str, int]:
+    """Compile số đếm n-gram thành file mô hình; trả về kích thước các bảng."""
+    uni_table = sorted((stable_hash(w), min(c, 0xFFFFFFFF)) for w, c in unigrams.items())
+    bi_table = sorted(
+        (stable_hash(b), min(c, 0xFFFFFFFF)) for b, c in bigrams.items() if c >= min_bigram_count
+    )
+
+    by_base: Dict[str, List[Tuple[int, str]]] = {}
+    for word, count in unigrams.items():
+        base = strip_diacritics(word)
+        if _is_plain_ascii_word(base):
+            by_base.setdefault(base, []).append((count, word))
+
+    blob = bytearray()
+    base_table: List[Tuple[int, int, int]] = []
+    for base, forms in by_base.items():
+        forms.sort(key=lambda item: (-item[0], item[1]))
+        encoded = "|".join(word for _, word in forms[:max_candidates]).encode("utf-8")
+        base_table.append((stable_hash(base), len(blob), len(encoded)))
+        blob.extend(encoded)
+    base_table.sort()
+
+    body = bytearray(b"\0" * _HEADER.size)
+    _pad(body)
+    positions: List[int] = []
+
+    def _section(fmt: str, values: List[int]) -> None:
+        positions.append(len(body))
+        body.extend(struct.pack(f"<{len(values)}{fmt}", *values))
+        _pad(body)
+
+    _section("Q", [h for h, _ in uni_table])
+    _section("I", [c for _, c in uni_table])
+    _section("Q", [h for h, _ in bi_table])
+    _section("I", [c for _, c in bi_table])
+    _section("Q", [h for h, _, _ in base_table])
+    _section("I", [o for _, o, _ in base_table])
+    _section("I", [n for _, _, n in base_table])
+    positions.append(len(body))
+    body.extend(blob)
+
+    body[:_HEADER.size] = _HEADER.pack(
+        MAGIC, len(uni_table), len(bi_table), len(base_table), sum(unigrams.values()), *positions
+    )
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, output_path)
+    return {"unigrams": len(uni_table), "bigrams": len(bi_table), "bases": len(base_table)}
+
+
+# ---------------------------------------------------------------------------
+# Runtime (mmap)
+# ---------------------------------------------------------------------------
+class DiacriticModel:
+    """Bigram model read-only trên mmap; an toàn khi dùng chung giữa các thread."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(self._mm)
+        (magic, n_uni, n_bi, n_bases, self.total,
+         uni_h, uni_c, bi_h, bi_c, base_h, base_o, base_n, self._blob_pos) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a diacritic model file")
+
+        self._uni_hashes = view[uni_h:uni_h + 8 * n_uni].cast("Q")
+        self._uni_counts = view[uni_c:uni_c + 4 * n_uni].cast("I")
+        self._bi_hashes = view[bi_h:bi_h + 8 * n_bi].cast("Q")
+        self._bi_counts = view[bi_c:bi_c + 4 * n_bi].cast("I")
+        self._base_hashes = view[base_h:base_h + 8 * n_bases].cast("Q")
+        self._base_offsets = view[base_o:base_o + 4 * n_bases].cast("I")
+        self._base_lengths = view[base_n:base_n + 4 * n_bases].cast("I")
+
+    @staticmethod
+    def _lookup(hashes: memoryview, key: str) -> int:
+        h = stable_hash(key)
+        idx = bisect_left(hashes, h)
+        return idx if idx < len(hashes) and hashes[idx] == h else -1
+
+    def unigram(self, syllable: str) -> int:
+        idx = self._lookup(self._uni_hashes, syllable)
+        return self._uni_counts[idx] if idx >= 0 else 0
+
+    def bigram(self, first: str, second: str) -> int:
+        idx = self._lookup(self._bi_hashes, f"{first} {second}")
+        return self._bi_counts[idx] if idx >= 0 else 0
+
+    def candidates(self, base: str) -> List[str]:
+        """Các dạng có dấu của 1 âm tiết không dấu (lower), phổ biến nhất trước"""
+        idx = self._lookup(self._base_hashes, base)
+        if idx < 0:
+            return []
+        start = self._blob_pos + self._base_offsets[idx]
+        return self._mm[start:start + self._base_lengths[idx]].decode("utf-8").split("|")
+
+    def _log_prob(self, prev: Optional[str], word: str, prev_count: int) -> Tuple[float, bool]:
+        """log P(word | prev) theo stupid backoff; kèm cờ bigram có trong mô hình hay không"""
+        if prev is not None and prev_count:
+            pair = self.bigram(prev, word)
+            if pair:
+                return math.log(pair / prev_count), True
+        count = self.unigram(word) or 0.5
+        return math.log(BACKOFF * count / max(self.total, 1)), False
+
+    def restore(self, syllables: List[str]) -> Tuple[List[str], float]:
+        """
+        Viterbi trên chuỗi âm tiết không dấu (lower).
+
+        Returns:
+            (âm tiết có dấu, tỉ lệ bigram trên đường tốt nhất có trong mô hình)
+        """
+        lattice = [self.candidates(s) or [s] for s in syllables]
+        unigram_counts = [{w: self.unigram(w) for w in column} for column in lattice]
+
+        # scores[w] = (log_prob, known_bigrams, backpointer)
+        scores: List[Dict[str, Tuple[float, int, Optional[str]]]] = [{}]
+        for word in lattice[0]:
+            scores[0][word] = (self._log_prob(None, word, 0)[0], 0, None)
+
+        for i in range(1, len(lattice)):
+            column: Dict[str, Tuple[float, int, Optional[str]]] = {}
+            for word in lattice[i]:
+                best: Optional[Tuple[float, int, Optional[str]]] = None
+                for prev, (prev_score, prev_known, _) in scores[i - 1].items():
+                    log_prob, known = self._log_prob(prev, word, unigram_counts[i - 1][prev])
+                    candidate = (prev_score + log_prob, prev_known + int(known), prev)
+                    if best is None or candidate[0] > best[0]:
+                        best = candidate
+                column[word] = best
+            scores.append(column)
+
+        last_word, (_, known, _) = max(scores[-1].items(), key=lambda item: item[1][0])
+        path = [last_word]
+        for i in range(len(scores) - 1, 0, -1):
+            path.append(scores[i][path[-1]][2])
+        path.reverse()
+        ratio = known / (len(syllables) - 1) if len(syllables) > 1 else 0.0
+        return path, ratio
+
+    def close(self) -> None:
+        for view in (
+            self._uni_hashes, self._uni_counts, self._bi_hashes, self._bi_counts,
+            self._base_hashes, self._base_offsets, self._base_lengths,
+        ):
+            view.release()
+        self._mm.close()
+
+
+def _match_case(original: str, restored: str) -> str:
+    if original.isupper() and len(original) > 1:
+        return restored.upper()
+    if original[:1].isupper():
+        return restored[:1].upper() + restored[1:]
+    return restored
+
+
+def find_restorations(
+    text: str,
+    model: DiacriticModel,
+    taken: Optional[List[Tuple[int, int]]] = None,
+) -> List[Dict[str, object]]:
+    """
+    Tìm các đoạn tiếng Việt không dấu trong text và đề xuất bản có dấu.
+
+    Args:
+        taken: Các span (start, end) đã bị bước khác sửa → không đụng vào
+
+    Returns:
+        Record cùng format với term_normalizer ({original, normalized, start_pos, end_pos, reason}),
+        offset tính trên chuỗi gốc.
+    """
+    taken = sorted(taken or [])
+    records: List[Dict[str, object]] = []
+    run: List[re.Match] = []
+    taken_idx = 0
+
+    def _flush() -> None:
+        if len(run) < 2:
+            run.clear()
+            return
+        restored, ratio = model.restore([m.group().lower() for m in run])
+        if ratio >= MIN_KNOWN_BIGRAM_RATIO:
+            start, end = run[0].start(), run[-1].end()
+            pieces: List[str] = []
+            cursor = start
+            for m, word in zip(run, restored):
+                pieces.append(text[cursor:m.start()])
+                pieces.append(_match_case(m.group(), word))
+                cursor = m.end()
+            normalized = "".join(pieces)
+            if normalized != text[start:end]:
+                records.append(
+                    {
+                        "original": text[start:end],
+                        "normalized": normalized,
+                        "start_pos": start,
+                        "end_pos": end,
+                        "reason": "diacritic_restoration",
+                    }
+                )
+        run.clear()
+
+    for m in _SYLLABLE_RE.finditer(text):
+        start, end = m.span()
+        while taken_idx < len(taken) and taken[taken_idx][1] <= start:
+            taken_idx += 1
+        blocked = taken_idx < len(taken) and taken[taken_idx][0] < end
+        gap = text[run[-1].end():start] if run else ""
+        # Chỉ nối âm tiết cách nhau bởi khoảng trắng / gạch nối trong cùng 1 cụm
+        if run and (gap.strip(" -") or "\n" in gap):
+            _flush()
+        if blocked or not _is_plain_ascii_word(m.group()) or not model.candidates(m.group().lower()):
+            _flush()
+            continue
+        run.append(m)
+    _flush()
+    return records
+
+
+_model: Optional[DiacriticModel] = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def get_diacritic_model() -> Optional[DiacriticModel]:
+    """Mô hình dùng chung của process (mmap 1 lần); None nếu chưa build file."""
+    global _model, _model_loaded
+    if _model_loaded:
+        return _model
+    with _model_lock:
+        if not _model_loaded:
+            if os.path.exists(DIACRITIC_MODEL_PATH):
+                try:
+                    _model = DiacriticModel(DIACRITIC_MODEL_PATH)
+                    print(f"✅ Diacritic model loaded: {DIACRITIC_MODEL_PATH}")
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Cannot load diacritic model {DIACRITIC_MODEL_PATH}: {e}")
+            else:
+                print(f"⚠️ Diacritic model not found at {DIACRITIC_MODEL_PATH}; restoration disabled")
+            _model_loaded = True
+    return _model
+
+
+def _read_lines(paths: Iterable[str]) -> Iterable[str]:
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            yield from f
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vietnamese diacritic restoration tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Count n-grams in accented Vietnamese text and compile the model")
+    build.add_argument("inputs", nargs="+", help="UTF-8 text files with properly accented Vietnamese")
+    build.add_argument("-o", "--output", default=DIACRITIC_MODEL_PATH)
+    build.add_argument("--min-bigram-count", type=int, default=MIN_BIGRAM_COUNT)
+    build.add_argument("--max-candidates", type=int, default=MAX_CANDIDATES)
+
+    restore = sub.add_parser("restore", help="Restore diacritics of a sentence")
+    restore.add_argument("text")
+    restore.add_argument("-m", "--model", default=DIACRITIC_MODEL_PATH)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        unigrams, bigrams = count_ngrams(_read_lines(args.inputs))
+        sizes = build_model(unigrams, bigrams, args.output, args.min_bigram_count, args.max_candidates)
+        print(f"✅ Wrote {args.output}: {sizes}")
+    else:
+        model = DiacriticModel(args.model)
+        for record in find_restorations(args.text, model):
+            print(f"{record['original']} → {record['normalized']} [{record['start_pos']}:{record['end_pos']}]")
+
+
+if __name__ == "__main__":
+    main()
+
+
+__all__ = [
+    "DiacriticModel",
+    "build_model",
+    "count_ngrams",
+    "find_restorations",
+    "get_diacritic_model",
+    "strip_diacritics",
+]
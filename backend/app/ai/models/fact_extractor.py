@@ -0,0 +1,248 @@
+"""
+fact_extractor.py
+
+Trích xuất dữ kiện số / thời gian cho từng câu (chạy 1 lần / câu)
+-----------------------------------------------------------------
+- Dùng regex đã compile sẵn, kết quả cache theo hash câu (LRU).
+- Chuẩn hóa:
+    * numbers : "1.000" / "1,000" / "1000" → "1000", "3,5" → "3.5"
+    * dates   : "05/12/2023" → "2023-12-05", "5-12" → "????-12-05"
+    * times   : "9:05" → "09:05:00"
+    * quarters: "Q2", "quý 2", "quý II" → "Q2"
+    * years   : "năm 2023" → "2023" (chỉ 19xx / 20xx)
+- So sánh 2 câu chỉ còn là phép so sánh tập hợp, không chạy lại regex.
+- Một số mâu thuẫn số liệu "hiển nhiên" (cùng khung câu, khác đúng một con số)
+  được phát hiện luôn mà không cần NLI model.
+
+Module này không phụ thuộc torch để dùng được ở mọi nơi.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import FrozenSet, Optional, Tuple
+
+FACT_CACHE_SIZE = 50_000
+
+# Từ đứng ngay trước một số biến số đó thành số thứ tự ("chapter 2", "thí nghiệm 3"):
+# hai câu chỉ khác số thứ tự là dữ liệu theo chuỗi, không phải mâu thuẫn.
+ORDINAL_LABELS = frozenset({
+    "chapter", "section", "part", "experiment", "trial", "study", "phase", "stage", "step",
+    "round", "week", "day", "month", "table", "figure", "fig", "group", "case", "version",
+    "level", "grade", "class", "lesson", "unit", "module", "question", "item", "no",
+    "number", "scenario", "iteration", "epoch", "run", "batch", "layer", "sample",
+    "participant", "patient", "model", "team", "semester", "term", "year", "page",
+    "chương", "mục", "phần", "bài", "nghiệm", "bước", "đoạn", "tuần", "ngày", "tháng",
+    "nhóm", "bảng", "hình", "lần", "lớp", "bản", "câu", "điều", "khoản", "số", "thứ",
+    "kỳ", "học", "vòng", "trang",
+})
+
+# Loại slot được coi là "giá trị" của phát biểu; các loại còn lại (ngày, giờ, quý,
+# năm, số thứ tự) xác định phát biểu nói về thời điểm / đối tượng nào.
+VALUE_SLOT_KINDS = frozenset({"numbers"})
+
+_DATE_RE = re.compile(r"\b(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2,4}))?\b")
+_TIME_RE = re.compile(r"\b(\d{1,2}):(\d{2})(?::(\d{2}))?\b")
+_QUARTER_RE = re.compile(r"\b(?:Q([1-4])|qu[ýy]\s*([1-4]|IV|I{1,3}))\b", re.IGNORECASE)
+_YEAR_RE = re.compile(r"\b((?:19|20)\d{2})\b")
+_NUMBER_RE = re.compile(r"\b\d+(?:[.,]\d+)*\b")
+_THOUSANDS_RE = re.compile(r"^\d{1,3}(?:([.,])\d{3})+$")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+_ROMAN_QUARTERS = {"I": "1", "II": "2", "III": "3", "IV": "4"}
+
+
+@dataclass(frozen=True)
+class SentenceFacts:
+    """Dữ kiện đã chuẩn hóa của một câu."""
+
+    numbers: FrozenSet[str]
+    dates: FrozenSet[str]
+    times: FrozenSet[str]
+    quarters: FrozenSet[str]
+    years: FrozenSet[str]
+    # Token của câu, mỗi dữ kiện thay bằng "<loại>"; slots là (loại, giá trị) theo thứ tự
+    template: Tuple[str, ...]
+    slots: Tuple[Tuple[str, str], ...]
+
+    @property
+    def has_facts(self) -> bool:
+        return bool(self.numbers or self.dates or self.times or self.quarters or self.years)
+
+
+def _normalize_number(raw: str) -> str:
+    match = _THOUSANDS_RE.match(raw)
+    if match:
+        # "1.000.000" / "1,000,000" → nhóm hàng nghìn
+        return str(int(raw.replace(match.group(1), "")))
+    value = raw.replace(",", ".")
+    if value.count(".") > 1:
+        return raw
+    try:
+        number = float(value)
+    except ValueError:
+        return raw
+    return str(int(number)) if number.is_integer() else repr(number)
+
+
+def _normalize_year(raw: Optional[str]) -> str:
+    if not raw:
+        return "????"
+    if len(raw) == 2:
+        return f"20{raw}"
+    return raw.zfill(4)
+
+
+def _mask(text: str, spans: list) -> str:
+    """Thay các span đã nhận diện (ngày, giờ) bằng khoảng trắng để không đếm lại là số"""
+    if not spans:
+        return text
+    chars = list(text)
+    for start, end in spans:
+        chars[start:end] = " " * (end - start)
+    return "".join(chars)
+
+
+def _tokens(text: str, spans: list) -> Tuple[Tuple[str, ...], Tuple[Tuple[str, str], ...]]:
+    """Khung câu (từ thường + placeholder cho từng dữ kiện) và danh sách slot theo thứ tự"""
+    template, slots, cursor = [], [], 0
+    for start, end, kind, value in sorted(spans):
+        template.extend(_WORD_RE.findall(text[cursor:start].lower()))
+        if kind == "numbers" and template and template[-1] in ORDINAL_LABELS:
+            kind = "ordinals"
+        template.append(f"<{kind}>")
+        slots.append((kind, value))
+        cursor = end
+    template.extend(_WORD_RE.findall(text[cursor:].lower()))
+    return tuple(template), tuple(slots)
+
+
+def _extract(text: str) -> SentenceFacts:
+    spans = []
+
+    dates = set()
+    for m in _DATE_RE.finditer(text):
+        day, month, year = int(m.group(1)), int(m.group(2)), m.group(3)
+        if not (1 <= day <= 31 and 1 <= month <= 12):
+            continue
+        value = f"{_normalize_year(year)}-{month:02d}-{day:02d}"
+        dates.add(value)
+        spans.append((*m.span(), "dates", value))
+
+    times = set()
+    for m in _TIME_RE.finditer(text):
+        hour, minute, second = int(m.group(1)), int(m.group(2)), int(m.group(3) or 0)
+        if hour > 23 or minute > 59 or second > 59:
+            continue
+        value = f"{hour:02d}:{minute:02d}:{second:02d}"
+        times.add(value)
+        spans.append((*m.span(), "times", value))
+
+    quarters = set()
+    for m in _QUARTER_RE.finditer(text):
+        value = m.group(1) or m.group(2)
+        value = f"Q{_ROMAN_QUARTERS.get(value.upper(), value)}"
+        quarters.add(value)
+        spans.append((*m.span(), "quarters", value))
+
+    masked = _mask(text, [span[:2] for span in spans])
+    years = set(_YEAR_RE.findall(masked))
+    numbers = set()
+    for m in _NUMBER_RE.finditer(masked):
+        raw = m.group()
+        if raw in years:
+            spans.append((*m.span(), "years", raw))
+        else:
+            value = _normalize_number(raw)
+            numbers.add(value)
+            spans.append((*m.span(), "numbers", value))
+
+    template, slots = _tokens(text, spans)
+
+    return SentenceFacts(
+        numbers=frozenset(numbers),
+        dates=frozenset(dates),
+        times=frozenset(times),
+        quarters=frozenset(quarters),
+        years=frozenset(years),
+        template=template,
+        slots=slots,
+    )
+
+
+_fact_cache: "OrderedDict[str, SentenceFacts]" = OrderedDict()
+_fact_cache_lock = threading.Lock()
+
+
+def extract_facts(text: str, text_hash: Optional[str] = None) -> SentenceFacts:
+    """
+    Trích xuất dữ kiện của một câu. Kết quả được cache theo hash câu
+    (có thể truyền sẵn Sentence.hash để khỏi tính lại).
+    """
+    text = text or ""
+    if text_hash is None:
+        text_hash = hashlib.md5(text.encode("utf-8")).hexdigest()
+
+    with _fact_cache_lock:
+        facts = _fact_cache.get(text_hash)
+        if facts is not None:
+            _fact_cache.move_to_end(text_hash)
+            return facts
+
+    facts = _extract(text)
+    with _fact_cache_lock:
+        _fact_cache[text_hash] = facts
+        while len(_fact_cache) > FACT_CACHE_SIZE:
+            _fact_cache.popitem(last=False)
+    return facts
+
+
+_FACT_KINDS = ("numbers", "dates", "times", "quarters", "years")
+
+
+def facts_conflict(facts1: SentenceFacts, facts2: SentenceFacts) -> bool:
+    """Hai câu cùng nêu một loại dữ kiện (số, ngày, giờ, quý, năm) nhưng giá trị khác nhau"""
+    for kind in _FACT_KINDS:
+        values1, values2 = getattr(facts1, kind), getattr(facts2, kind)
+        if values1 and values2 and values1 != values2:
+            return True
+    return False
+
+
+def obvious_numeric_contradiction(facts1: SentenceFacts, facts2: SentenceFacts) -> Optional[str]:
+    """
+    Mâu thuẫn số liệu hiển nhiên: hai câu có cùng khung (giống hệt nhau sau khi
+    thay dữ kiện bằng placeholder) và chỉ khác đúng một slot giá trị (con số).
+
+    Năm, quý, ngày, giờ và số thứ tự ("chapter 2", "experiment 3") phải trùng nhau:
+    nếu slot khác nhau là một trong số đó thì đây là dữ liệu theo chuỗi
+    (2020 vs 2021, Q1 vs Q2, chương 1 vs chương 2) → trả None để cặp câu
+    được NLI chấm như bình thường.
+
+    Returns:
+        Tên loại dữ kiện bị lệch ("numbers") hoặc None.
+    """
+    if not (facts1.has_facts and facts2.has_facts):
+        return None
+    if len(facts1.template) < 3 or facts1.template != facts2.template:
+        return None
+    differing = [
+        slot1[0]
+        for slot1, slot2 in zip(facts1.slots, facts2.slots)
+        if slot1[1] != slot2[1]
+    ]
+    if len(differing) != 1 or differing[0] not in VALUE_SLOT_KINDS:
+        return None
+    return differing[0]
+
+
+__all__ = [
+    "SentenceFacts",
+    "extract_facts",
+    "facts_conflict",
+    "obvious_numeric_contradiction",
+]
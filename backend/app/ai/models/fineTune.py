@@ -1,11 +1,21 @@
 """
 Fine-tuning script cho mDeBERTa NLI model với dữ liệu tiếng Việt
 Sử dụng dataset XNLI Vietnamese để cải thiện khả năng phát hiện mâu thuẫn
+
+Ngoài ra có recipe distillation: train một student cỡ MiniLM từ teacher
+mDeBERTa đã fine-tune, dùng cho cascade inference trên CPU
+(xem check_contradictions(cascade=True) trong contradictions.py).
+
+Cách chạy:
+    python fineTune.py            # fine-tune teacher
+    python fineTune.py distill    # distill student từ teacher
 """
 
 import os
+import sys
 import pandas as pd
 import torch
+import torch.nn.functional as F
 import numpy as np
 from pathlib import Path
 from typing import Dict, List, Tuple
@@ -61,6 +71,29 @@ class FineTuneConfig:
     EARLY_STOPPING_THRESHOLD = 0.01
 
 
+class DistillConfig(FineTuneConfig):
+    """Cấu hình distillation: teacher mDeBERTa đã fine-tune → student cỡ MiniLM"""
+    
+    # Teacher: model fine-tune ở trên (hoặc bản đã publish trên Hugging Face)
+    TEACHER_MODEL = os.getenv(
+        "NLI_TEACHER_MODEL",
+        "duowng/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7-for-vietnamese",
+    )
+    # Student: multilingual MiniLM (12 layers, hidden 384) ~ 1/4 kích thước mDeBERTa-base
+    STUDENT_MODEL = "nreimers/mMiniLMv2-L12-H384-distilled-from-XLMR-Large"
+    OUTPUT_DIR = FineTuneConfig.BASE_DIR / "models" / "minilm-vi-nli-distilled"
+    
+    # Distillation loss = ALPHA * CE(nhãn thật) + (1 - ALPHA) * T^2 * KL(student || teacher)
+    TEMPERATURE = 2.0
+    ALPHA = 0.5
+    TEACHER_BATCH_SIZE = 64
+    
+    # Student nhỏ → học nhanh hơn, nhiều epoch hơn
+    BATCH_SIZE = 32
+    LEARNING_RATE = 5e-5
+    NUM_EPOCHS = 5
+
+
 # ============================================================================
 # DATA LOADING & PREPROCESSING
 # ============================================================================
@@ -124,8 +157,8 @@ def create_dataset(df: pd.DataFrame, tokenizer, config: FineTuneConfig) -> Datas
             max_length=config.MAX_LENGTH
         )
     
-    # Convert to HuggingFace Dataset
-    dataset = Dataset.from_pandas(df[['text_a', 'text_b', 'label_id']])
+    # Convert to HuggingFace Dataset (không giữ index của train_test_split thành cột __index_level_0__)
+    dataset = Dataset.from_pandas(df[['text_a', 'text_b', 'label_id']], preserve_index=False)
     dataset = dataset.rename_column('label_id', 'labels')
     
     # Tokenize
@@ -319,12 +352,194 @@ def train_model(config: FineTuneConfig):
     print(f"{'='*70}\n")
 
 
+# ============================================================================
+# DISTILLATION
+# ============================================================================
+
+def compute_teacher_logits(df: pd.DataFrame, config: DistillConfig) -> np.ndarray:
+    """
+    Chạy teacher 1 lần trên toàn bộ dữ liệu → logits (n, 3) theo thứ tự nhãn của config.
+    Teacher và student dùng tokenizer khác nhau nên soft label được tính trước (offline).
+    """
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    tokenizer = AutoTokenizer.from_pretrained(config.TEACHER_MODEL)
+    teacher = AutoModelForSequenceClassification.from_pretrained(config.TEACHER_MODEL)
+    teacher.eval().to(device)
+    
+    # Sắp lại cột logits của teacher theo LABEL2ID của config
+    teacher_label2id = {v.upper(): int(k) for k, v in teacher.config.id2label.items()}
+    order = [teacher_label2id[config.ID2LABEL[i]] for i in range(len(config.ID2LABEL))]
+    
+    logits = []
+    texts_a, texts_b = df['text_a'].tolist(), df['text_b'].tolist()
+    with torch.no_grad():
+        for b in range(0, len(df), config.TEACHER_BATCH_SIZE):
+            inputs = tokenizer(
+                texts_a[b:b + config.TEACHER_BATCH_SIZE],
+                texts_b[b:b + config.TEACHER_BATCH_SIZE],
+                truncation=True,
+                padding=True,
+                max_length=config.MAX_LENGTH,
+                return_tensors="pt",
+            ).to(device)
+            logits.append(teacher(**inputs).logits.float().cpu().numpy()[:, order])
+    
+    return np.concatenate(logits, axis=0)
+
+
+def create_distill_dataset(df: pd.DataFrame, tokenizer, teacher_logits: np.ndarray, config: DistillConfig) -> Dataset:
+    """
+    Dataset của student kèm cột teacher_logits (soft label)
+    """
+    def tokenize_function(examples):
+        return tokenizer(
+            examples['text_a'],
+            examples['text_b'],
+            truncation=True,
+            padding='max_length',
+            max_length=config.MAX_LENGTH
+        )
+    
+    dataset = Dataset.from_dict({
+        'text_a': df['text_a'].tolist(),
+        'text_b': df['text_b'].tolist(),
+        'labels': df['label_id'].tolist(),
+        'teacher_logits': teacher_logits.astype(np.float32).tolist(),
+    })
+    
+    dataset = dataset.map(tokenize_function, batched=True)
+    dataset = dataset.remove_columns(['text_a', 'text_b'])
+    dataset.set_format('torch')
+    
+    return dataset
+
+
+class DistillationTrainer(Trainer):
+    """Trainer với loss kết hợp nhãn thật + soft label của teacher"""
+    
+    def __init__(self, *args, temperature: float = 2.0, alpha: float = 0.5, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.temperature = temperature
+        self.alpha = alpha
+    
+    def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
+        # Tập test không có soft label → chỉ tính loss theo nhãn thật
+        teacher_logits = inputs.pop("teacher_logits", None)
+        outputs = model(**inputs)
+        student_logits = outputs.logits
+        
+        hard_loss = F.cross_entropy(student_logits, inputs["labels"])
+        if teacher_logits is None:
+            return (hard_loss, outputs) if return_outputs else hard_loss
+        t = self.temperature
+        soft_loss = F.kl_div(
+            F.log_softmax(student_logits / t, dim=-1),
+            F.softmax(teacher_logits / t, dim=-1),
+            reduction="batchmean",
+        ) * (t ** 2)
+        
+        loss = self.alpha * hard_loss + (1 - self.alpha) * soft_loss
+        return (loss, outputs) if return_outputs else loss
+
+
+def distill_model(config: DistillConfig):
+    """
+    Distill student cỡ MiniLM từ teacher mDeBERTa đã fine-tune
+    """
+    print(f"\n{'='*70}")
+    print("DISTILLING mDeBERTa → MiniLM FOR VIETNAMESE NLI")
+    print(f"{'='*70}")
+    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Teacher: {config.TEACHER_MODEL}")
+    print(f"Student: {config.STUDENT_MODEL}")
+    
+    config.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    config.LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    
+    train_df, val_df, test_df = load_and_preprocess_data(config)
+    
+    print(f"\n{'='*70}")
+    print("COMPUTING TEACHER SOFT LABELS")
+    print(f"{'='*70}")
+    train_logits = compute_teacher_logits(train_df, config)
+    val_logits = compute_teacher_logits(val_df, config)
+    
+    tokenizer = AutoTokenizer.from_pretrained(config.STUDENT_MODEL)
+    student = AutoModelForSequenceClassification.from_pretrained(
+        config.STUDENT_MODEL,
+        num_labels=3,
+        id2label=config.ID2LABEL,
+        label2id=config.LABEL2ID
+    )
+    
+    train_dataset = create_distill_dataset(train_df, tokenizer, train_logits, config)
+    val_dataset = create_distill_dataset(val_df, tokenizer, val_logits, config)
+    test_dataset = create_dataset(test_df, tokenizer, config)
+    
+    training_args = TrainingArguments(
+        output_dir=str(config.OUTPUT_DIR),
+        num_train_epochs=config.NUM_EPOCHS,
+        per_device_train_batch_size=config.BATCH_SIZE,
+        per_device_eval_batch_size=config.BATCH_SIZE,
+        learning_rate=config.LEARNING_RATE,
+        warmup_steps=config.WARMUP_STEPS,
+        weight_decay=config.WEIGHT_DECAY,
+        logging_dir=str(config.LOGS_DIR),
+        logging_steps=100,
+        eval_strategy="steps",
+        eval_steps=500,
+        save_strategy="steps",
+        save_steps=500,
+        save_total_limit=3,
+        load_best_model_at_end=True,
+        metric_for_best_model="f1",
+        greater_is_better=True,
+        push_to_hub=False,
+        report_to="none",
+        remove_unused_columns=False,  # giữ cột teacher_logits cho compute_loss
+    )
+    
+    trainer = DistillationTrainer(
+        model=student,
+        args=training_args,
+        train_dataset=train_dataset,
+        eval_dataset=val_dataset,
+        compute_metrics=compute_metrics,
+        temperature=config.TEMPERATURE,
+        alpha=config.ALPHA,
+        callbacks=[
+            EarlyStoppingCallback(
+                early_stopping_patience=config.EARLY_STOPPING_PATIENCE,
+                early_stopping_threshold=config.EARLY_STOPPING_THRESHOLD
+            )
+        ]
+    )
+    
+    print(f"\n{'='*70}")
+    print("TRAINING STUDENT")
+    print(f"{'='*70}")
+    trainer.train()
+    
+    # Lưu trước khi đánh giá: lỗi ở bước report không làm mất student đã train
+    final_model_path = config.OUTPUT_DIR / "final"
+    trainer.save_model(str(final_model_path))
+    tokenizer.save_pretrained(str(final_model_path))
+    
+    print(f"Student saved to: {final_model_path}")
+    print(f"Set NLI_STUDENT_MODEL={final_model_path} để bật cascade inference.")
+    
+    print_evaluation_report(trainer, test_dataset, config)
+    print(f"\nCompleted at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'='*70}\n")
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
 
 if __name__ == "__main__":
-    config = FineTuneConfig()
+    distill = len(sys.argv) > 1 and sys.argv[1] == "distill"
+    config = DistillConfig() if distill else FineTuneConfig()
     
     # Check CUDA
     if torch.cuda.is_available():
@@ -334,4 +549,7 @@ if __name__ == "__main__":
         print("CUDA not available. Training on CPU (will be slow!)")
     
     # Train
-    train_model(config)
+    if distill:
+        distill_model(config)
+    else:
+        train_model(config)
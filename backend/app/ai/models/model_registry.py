@@ -0,0 +1,277 @@
+"""
+model_registry.py
+
+Registry giữ nhiều model (NLI + embedding) thường trú trong RAM
+----------------------------------------------------------------
+- Mỗi model được định danh bằng (kind, name, device).
+- Tổng dung lượng model được giới hạn bởi một "RAM budget" cấu hình được
+  (biến môi trường MODEL_REGISTRY_BUDGET_MB).
+- Khi vượt budget → evict theo LRU, bỏ qua các model đang được dùng
+  (reference count > 0).
+- Ghi lại metrics lúc load (thời gian load, số lần hit/miss, evictions)
+  để debug hiện tượng "thrash" khi đổi qua lại giữa các mode.
+- Load chạy ngoài lock chung của registry: mỗi key có lock load riêng, nên
+  load model A không chặn lấy model B đã có sẵn (hay load model C song song).
+
+Module này KHÔNG import torch ở top-level để không kéo thư viện nặng vào
+RAM khi chỉ chạy Gemini (xem app/check_deps.py).
+"""
+
+from __future__ import annotations
+
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_BUDGET_MB = int(os.getenv("MODEL_REGISTRY_BUDGET_MB", "3072"))
+
+RegistryKey = Tuple[str, str, str]  # (kind, name, device)
+
+
+@dataclass
+class ModelEntry:
+    """Một model đang thường trú trong registry."""
+
+    key: RegistryKey
+    value: Any
+    size_bytes: int
+    load_seconds: float
+    loaded_at: float = field(default_factory=time.time)
+    last_used_at: float = field(default_factory=time.time)
+    refcount: int = 0
+    hits: int = 0
+
+
+def estimate_module_bytes(module: Any) -> int:
+    """Ước lượng dung lượng (bytes) của một torch.nn.Module: parameters + buffers."""
+    total = 0
+    for getter in ("parameters", "buffers"):
+        tensors = getattr(module, getter, None)
+        if tensors is None:
+            continue
+        for t in tensors():
+            total += t.numel() * t.element_size()
+    return total
+
+
+class ModelRegistry:
+    """
+    LRU registry có giới hạn RAM cho các model AI.
+
+    Cách dùng:
+        with model_registry.use("nli", path, device, loader) as value:
+            ...
+
+    `loader` là callable không tham số, trả về (value, size_bytes).
+    """
+
+    def __init__(self, budget_mb: int = DEFAULT_BUDGET_MB) -> None:
+        self.budget_bytes = max(int(budget_mb), 0) * 1024 ** 2
+        self._entries: "OrderedDict[RegistryKey, ModelEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        # Lock load theo key: chỉ 1 thread load một model, thread khác cùng key chờ kết quả
+        self._load_locks: Dict[RegistryKey, threading.Lock] = {}
+        self._stats: Dict[str, Any] = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "total_load_seconds": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def get(
+        self,
+        kind: str,
+        name: str,
+        device: str,
+        loader: Callable[[], Tuple[Any, int]],
+    ) -> Any:
+        """Lấy model (load nếu chưa có) mà không giữ reference."""
+        return self._get_or_load((kind, name, device), loader).value
+
+    @contextmanager
+    def use(
+        self,
+        kind: str,
+        name: str,
+        device: str,
+        loader: Callable[[], Tuple[Any, int]],
+    ) -> Iterator[Any]:
+        """Giữ reference tới model trong suốt khối `with` để không bị evict."""
+        entry = self._get_or_load((kind, name, device), loader, pin=True)
+        try:
+            yield entry.value
+        finally:
+            with self._lock:
+                entry.refcount -= 1
+                entry.last_used_at = time.time()
+                self._evict_over_budget()
+
+    def contains(self, kind: str, name: str, device: str) -> bool:
+        with self._lock:
+            return (kind, name, device) in self._entries
+
+    def evict(self, kind: str, name: str, device: str) -> bool:
+        """Evict thủ công một model (nếu không còn ai dùng)."""
+        with self._lock:
+            entry = self._entries.get((kind, name, device))
+            if entry is None or entry.refcount > 0:
+                return False
+            self._drop(entry.key)
+            self._release_memory()
+            return True
+
+    def clear(self) -> None:
+        """Xóa toàn bộ model không còn reference."""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.refcount == 0]:
+                self._drop(key)
+            self._release_memory()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot metrics của registry (dùng cho log / endpoint readiness)."""
+        with self._lock:
+            return {
+                **self._stats,
+                "budget_mb": round(self.budget_bytes / 1024 ** 2, 1),
+                "resident_mb": round(self._resident_bytes() / 1024 ** 2, 1),
+                "models": [
+                    {
+                        "kind": e.key[0],
+                        "name": e.key[1],
+                        "device": e.key[2],
+                        "size_mb": round(e.size_bytes / 1024 ** 2, 1),
+                        "load_seconds": round(e.load_seconds, 3),
+                        "refcount": e.refcount,
+                        "hits": e.hits,
+                        "loaded_at": e.loaded_at,
+                        "last_used_at": e.last_used_at,
+                    }
+                    for e in self._entries.values()
+                ],
+            }
+
+    # ------------------------------------------------------------------
+    # Load (self._lock chỉ giữ lúc tra cứu / thêm entry / evict, không giữ lúc load)
+    # ------------------------------------------------------------------
+    def _get_or_load(
+        self,
+        key: RegistryKey,
+        loader: Callable[[], Tuple[Any, int]],
+        pin: bool = False,
+    ) -> ModelEntry:
+        """Trả entry của `key`, load nếu chưa có; pin=True thì tăng refcount trước khi nhả lock."""
+        with self._lock:
+            entry = self._lookup(key, pin)
+            if entry is not None:
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # Thread khác có thể vừa load xong trong lúc chờ
+            with self._lock:
+                entry = self._lookup(key, pin)
+                if entry is not None:
+                    return entry
+                self._stats["misses"] += 1
+
+            try:
+                print(f"📦 [ModelRegistry] Loading {key[0]} model: {key[1]} on {key[2]}")
+                started = time.perf_counter()
+                value, size_bytes = loader()
+                elapsed = time.perf_counter() - started
+            except BaseException:
+                with self._lock:
+                    if self._load_locks.get(key) is load_lock:
+                        del self._load_locks[key]
+                raise
+
+            with self._lock:
+                if self._load_locks.get(key) is load_lock:
+                    del self._load_locks[key]
+                entry = ModelEntry(key=key, value=value, size_bytes=int(size_bytes), load_seconds=elapsed)
+                self._entries[key] = entry
+                self._stats["total_load_seconds"] += elapsed
+                print(
+                    f"✅ [ModelRegistry] Loaded {key[1]} in {elapsed:.2f}s "
+                    f"({entry.size_bytes / 1024 ** 2:.0f} MB)"
+                )
+
+                # Pin entry mới để vòng evict không loại chính nó
+                entry.refcount += 1
+                try:
+                    self._evict_over_budget()
+                finally:
+                    if not pin:
+                        entry.refcount -= 1
+                return entry
+
+    # ------------------------------------------------------------------
+    # Internal helpers (gọi khi đang giữ self._lock)
+    # ------------------------------------------------------------------
+    def _lookup(self, key: RegistryKey, pin: bool) -> Optional[ModelEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        entry.hits += 1
+        entry.last_used_at = time.time()
+        self._stats["hits"] += 1
+        if pin:
+            entry.refcount += 1
+        return entry
+
+    def _evict_over_budget(self) -> None:
+        if not self.budget_bytes:
+            return
+        evicted = False
+        while self._resident_bytes() > self.budget_bytes:
+            victim = next((k for k, e in self._entries.items() if e.refcount == 0), None)
+            if victim is None:
+                print("⚠️ [ModelRegistry] Over budget but every model is in use")
+                break
+            self._drop(victim)
+            evicted = True
+        if evicted:
+            self._release_memory()
+
+    def _drop(self, key: RegistryKey) -> None:
+        self._entries.pop(key, None)
+        self._stats["evictions"] += 1
+        print(f"🧹 [ModelRegistry] Evicted {key[0]} model: {key[1]} ({key[2]})")
+
+    def _resident_bytes(self) -> int:
+        return sum(e.size_bytes for e in self._entries.values())
+
+    @staticmethod
+    def _release_memory() -> None:
+        gc.collect()
+        try:
+            import torch
+        except ImportError:
+            return
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+# Singleton dùng chung cho toàn process
+model_registry = ModelRegistry()
+
+
+__all__ = [
+    "ModelEntry",
+    "ModelRegistry",
+    "estimate_module_bytes",
+    "model_registry",
+]
@@ -2,7 +2,7 @@
 promptStore.py
 
 Chứa các prompt dùng cho:
-- Undefined Terms (EN-only endpoint)
+- Undefined Terms (EN-only endpoint + xác nhận thuật ngữ mơ hồ từ term_detector)
 - Unsupported Claims (EN-only endpoint)
 - Unified Analysis EN (5 subtasks: spelling, unsupported claims,
   undefined terms, contradictions, logical jumps)
@@ -57,14 +57,18 @@ Mục tiêu thiết kế (theo A2):
    - Mọi trường total_found phải khớp với số lượng items.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 
 # ==============================
 # 1. UNDEFINED TERMS (EN ONLY)
 # ==============================
 
-def prompt_undefined_terms(context: Dict[str, Any], content: str) -> str:
+def prompt_undefined_terms(
+    context: Dict[str, Any],
+    content: str,
+    known_terms: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> str:
     """
     Prompt phân tích THUẬT NGỮ CHƯA ĐỊNH NGHĨA (Undefined Terms) – tiếng Anh.
     Dùng riêng khi muốn gọi API chỉ cho undefined terms.
@@ -91,6 +95,13 @@ def prompt_undefined_terms(context: Dict[str, Any], content: str) -> str:
     if constraints:
         ctx_lines.append("Constraints:")
         ctx_lines.extend(f"  - {c}" for c in constraints)
+    if known_terms:
+        # Glossary của user: chỉ gửi dạng rút gọn "term: definition"
+        ctx_lines.append("Already defined by this author (treat as defined, do not report):")
+        ctx_lines.extend(
+            f"  - {entry.get('term')}: {(entry.get('definition') or '')[:80]}"
+            for entry in list(known_terms.values())[:40]
+        )
     ctx_block = "\n".join(ctx_lines)
 
     prompt = f"""
@@ -183,6 +194,54 @@ Return ONLY the JSON object. No markdown, no extra commentary.
     return prompt
 
 
+def prompt_confirm_undefined_terms(context: Dict[str, Any], candidates: List[Dict[str, Any]]) -> str:
+    """
+    Prompt ngắn để LLM xác nhận các thuật ngữ mà bộ luật local (term_detector.py)
+    chưa chắc chắn. Chỉ gửi thuật ngữ + câu chứa nó, không gửi cả văn bản.
+    """
+
+    writing_type = context.get("writing_type", "Document")
+    main_goal = context.get("main_goal", "")
+
+    lines = []
+    for idx, c in enumerate(candidates, start=1):
+        lines.append(f'{idx}. term: "{c.get("term", "")}"')
+        lines.append(f'   first_appeared: {c.get("first_appeared", "")}')
+        lines.append(f'   snippet: "{c.get("context_snippet", "")}"')
+    candidates_block = "\n".join(lines)
+
+    prompt = f"""
+You are LogicGuard, an expert technical writing analyst.
+Document type: {writing_type}
+Main goal: {main_goal}
+
+A rule-based detector found these candidate terms at their FIRST appearance but could not decide
+whether they are real technical terms and whether the text defines them there.
+
+CANDIDATES
+{candidates_block}
+
+For each candidate decide:
+- is_term: true if it is a technical term, metric, acronym, product/system name or domain concept
+  the reader needs explained (false for common words, names of people/places, plain typos).
+- is_defined: true if the snippet defines or clearly explains it.
+
+Return ONLY valid JSON:
+{{
+  "confirmations": [
+    {{
+      "term": "<exactly as given>",
+      "is_term": true,
+      "is_defined": false,
+      "reason": "short reason",
+      "definition_found": "definition text if is_defined, else empty"
+    }}
+  ]
+}}
+"""
+    return prompt
+
+
 # =======================================
 # 2. UNSUPPORTED CLAIMS (EN ONLY)
 # =======================================
@@ -293,11 +352,124 @@ Rules:
     return prompt
 
 
+def prompt_confirm_unsupported_claims(context: Dict[str, Any], claims: List[Dict[str, Any]]) -> str:
+    """
+    Prompt ngắn để LLM xác nhận các claim "borderline" của claim_classifier.py.
+    Chỉ gửi claim + các câu trong cửa sổ ±2 câu, không gửi cả văn bản.
+    """
+
+    writing_type = context.get("writing_type", "Document")
+    main_goal = context.get("main_goal", "")
+
+    lines = []
+    for idx, c in enumerate(claims, start=1):
+        lines.append(f'{idx}. claim: "{c.get("claim", "")}"')
+        lines.append(f'   location: {c.get("location", "")}')
+        lines.append(f'   nearby_sentences: "{c.get("surrounding_context") or c.get("evidence") or ""}"')
+    claims_block = "\n".join(lines)
+
+    prompt = f"""
+You are LogicGuard, an expert argument analyst.
+Document type: {writing_type}
+Main goal: {main_goal}
+
+A local classifier was unsure about the following sentences. For each one decide:
+- is_claim: true if the sentence asserts something that needs support (not a neutral description).
+- status: "supported" if the nearby sentences give data, an example, a citation or reasoning for it,
+  otherwise "unsupported".
+
+CLAIMS
+{claims_block}
+
+Return ONLY valid JSON:
+{{
+  "confirmations": [
+    {{
+      "claim": "<exactly as given>",
+      "is_claim": true,
+      "status": "unsupported",
+      "reason": "short reason",
+      "evidence": "supporting sentence if supported, else empty"
+    }}
+  ]
+}}
+"""
+    return prompt
+
+
 # =======================================
 # 3. UNIFIED ANALYSIS – ENGLISH (A2)
 # =======================================
 
-def prompt_analysis(context: Dict[str, Any], content: str) -> str:
+# Bước chính tả của prompt unified; khi lexicon local đã lo phần này thì thay
+# bằng bản rút gọn để tiết kiệm output token.
+SPELLING_STEP_EN = """STEP 1 – SPELLING ERRORS (HIGHEST PRIORITY)
+
+Goal:
+- First, scan the entire content for obvious spelling mistakes in English AND Vietnamese.
+- This reduces noise so later tasks do not confuse typos with undefined terms or unsupported claims.
+
+Rules:
+- Only flag a spelling error if you are at least ~70% confident it is wrong in context.
+- Check at least 1–3 words before and after the token/phrase to understand context.
+- If the token is a proper noun, brand, or likely name → do NOT mark it as error.
+- If the token is a mixed EN+VI phrase but still makes sense for bilingual readers,
+  do NOT mark it as error unless it is clearly misspelled.
+
+Examples that SHOULD be flagged:
+- EN:
+    - "smple" → "simple"
+    - "speling" → "spelling"
+    - "erors" → "errors"
+- VI:
+    - "nghien cúu" → "nghiên cứu"
+    - "cơ thễ" → "cơ thể"
+    - "bằng trứng khoa học" → "bằng chứng khoa học"
+
+For each spelling error item:
+- original: exact substring from CONTENT (respect casing & accents).
+- suggested: the final corrected form (short phrase or word) → direct answer, no step-by-step.
+- start_pos, end_pos: character span in CONTENT.
+- language: "en" or "vi" (best guess).
+- reason: very short explanation why this is a spelling error in this context.
+
+IMPORTANT:
+- Perform spelling detection FIRST.
+- Later subtasks MUST NOT treat a substring already clearly handled as a spelling error
+  as an undefined term or part of unsupported_claims.
+
+"""
+
+SPELLING_STEP_LOCAL_EN = """STEP 1 – SPELLING ERRORS
+
+SKIP this step: spelling has already been checked locally before this call.
+Return "spelling_errors": {"total_found": 0, "items": []}.
+Do NOT treat misspelled words as undefined terms or unsupported claims.
+
+"""
+
+SPELLING_STEP_VI = """BƯỚC 1 – LỖI CHÍNH TẢ (QUÉT KỸ NHẤT)
+- Đóng vai một giáo viên ngữ văn khó tính. Quét toàn bộ văn bản để tìm các lỗi: gõ sai phím (typo), sai dấu, sai phụ âm/nguyên âm, hoặc lỗi ghép từ EN/VI.
+- VÍ DỤ CẦN BẮT: "phát chiển" -> "phát triển", "bèo vệ" -> "bảo vệ", "nghien cúu" -> "nghiên cứu".
+- BẮT BUỘC liệt kê tất cả các từ nghi ngờ sai chính tả. Tuyệt đối không được bỏ qua để nhường chỗ cho các lỗi khác.
+- Lưu ý: Không sửa tên riêng, tên thương hiệu (VD: Zindra, Gemini).
+
+"""
+
+SPELLING_STEP_LOCAL_VI = """BƯỚC 1 – LỖI CHÍNH TẢ
+- BỎ QUA bước này: chính tả đã được kiểm tra local trước khi gọi model.
+- Trả về "spelling_errors": {"total_found": 0, "items": []}.
+- KHÔNG coi từ sai chính tả là thuật ngữ chưa định nghĩa hay luận điểm thiếu chứng cứ.
+
+"""
+
+
+def prompt_analysis(
+    context: Dict[str, Any],
+    content: str,
+    include_spelling: bool = True,
+    known_terms: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> str:
     """
     Unified English prompt (A2):
     - Runs 5 subtasks in one call, với thứ tự ưu tiên:
@@ -311,6 +483,10 @@ def prompt_analysis(context: Dict[str, Any], content: str) -> str:
     - Ưu tiên phát hiện spelling chính xác và nhanh.
     - Sau đó lần lượt xử lý các lỗi logic khác.
     - Trả về JSON A2 (final answers, không hướng dẫn từng bước).
+
+    include_spelling=False: chính tả đã được sửa local (spell_lexicon) → bỏ subtask
+    spelling khỏi prompt, model chỉ trả spelling_errors rỗng.
+    known_terms: glossary của user, gửi dạng rút gọn như prompt_undefined_terms.
     """
 
     writing_type = context.get("writing_type", "Document")
@@ -327,8 +503,19 @@ def prompt_analysis(context: Dict[str, Any], content: str) -> str:
     if constraints:
         ctx_lines.append("Constraints:")
         ctx_lines.extend(f"  - {c}" for c in constraints)
+    if known_terms:
+        ctx_lines.append("Already defined by this author (treat as defined, do not report as undefined terms):")
+        ctx_lines.extend(
+            f"  - {entry.get('term')}: {(entry.get('definition') or '')[:80]}"
+            for entry in list(known_terms.values())[:40]
+        )
     ctx_block = "\n".join(ctx_lines)
 
+    if include_spelling:
+        spelling_step = SPELLING_STEP_EN
+    else:
+        spelling_step = SPELLING_STEP_LOCAL_EN
+
     prompt = f"""
 You are LogicGuard, an AI assistant specialized in logical and structural analysis of {writing_type} documents.
 
@@ -381,42 +568,7 @@ You MUST always refer to THIS exact content string for:
 - All sentences and paragraphs used in logical and factual analysis.
 
 ---------------------------
-STEP 1 – SPELLING ERRORS (HIGHEST PRIORITY)
-
-Goal:
-- First, scan the entire content for obvious spelling mistakes in English AND Vietnamese.
-- This reduces noise so later tasks do not confuse typos with undefined terms or unsupported claims.
-
-Rules:
-- Only flag a spelling error if you are at least ~70% confident it is wrong in context.
-- Check at least 1–3 words before and after the token/phrase to understand context.
-- If the token is a proper noun, brand, or likely name → do NOT mark it as error.
-- If the token is a mixed EN+VI phrase but still makes sense for bilingual readers,
-  do NOT mark it as error unless it is clearly misspelled.
-
-Examples that SHOULD be flagged:
-- EN:
-    - "smple" → "simple"
-    - "speling" → "spelling"
-    - "erors" → "errors"
-- VI:
-    - "nghien cúu" → "nghiên cứu"
-    - "cơ thễ" → "cơ thể"
-    - "bằng trứng khoa học" → "bằng chứng khoa học"
-
-For each spelling error item:
-- original: exact substring from CONTENT (respect casing & accents).
-- suggested: the final corrected form (short phrase or word) → direct answer, no step-by-step.
-- start_pos, end_pos: character span in CONTENT.
-- language: "en" or "vi" (best guess).
-- reason: very short explanation why this is a spelling error in this context.
-
-IMPORTANT:
-- Perform spelling detection FIRST.
-- Later subtasks MUST NOT treat a substring already clearly handled as a spelling error
-  as an undefined term or part of unsupported_claims.
-
----------------------------
+{spelling_step}---------------------------
 STEP 2 – UNSUPPORTED CLAIMS
 
 After spelling is identified:
@@ -620,7 +772,12 @@ Return ONLY this JSON object. No markdown, no extra text.
 # 4. UNIFIED ANALYSIS – VIETNAMESE (A2)
 # =======================================
 
-def prompt_analysis_vi(context: Dict[str, Any], content: str) -> str:
+def prompt_analysis_vi(
+    context: Dict[str, Any],
+    content: str,
+    include_spelling: bool = True,
+    known_terms: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> str:
     writing_type = context.get("writing_type", "Văn bản")
     main_goal = context.get("main_goal", "")
     criteria = context.get("criteria", [])
@@ -635,8 +792,19 @@ def prompt_analysis_vi(context: Dict[str, Any], content: str) -> str:
     if constraints:
         ctx_lines.append("Ràng buộc:")
         ctx_lines.extend(f"  - {c}" for c in constraints)
+    if known_terms:
+        ctx_lines.append("Tác giả đã định nghĩa trước đó (coi là đã định nghĩa, không báo undefined_terms):")
+        ctx_lines.extend(
+            f"  - {entry.get('term')}: {(entry.get('definition') or '')[:80]}"
+            for entry in list(known_terms.values())[:40]
+        )
     ctx_block = "\n".join(ctx_lines)
 
+    if include_spelling:
+        spelling_step = SPELLING_STEP_VI
+    else:
+        spelling_step = SPELLING_STEP_LOCAL_VI
+
     prompt = f"""
 Bạn là LogicGuard, một Biên tập viên và Chuyên gia Logic cực kỳ khắt khe, chuyên phân tích tài liệu {writing_type}.
 Nhiệm vụ của bạn là quét sạch mọi hạt sạn trong văn bản theo đúng 5 BƯỚC ƯU TIÊN sau. KHÔNG được phép bỏ sót.
@@ -658,13 +826,7 @@ VĂN BẢN GỐC (CONTENT)
 <<<KẾT THÚC VĂN BẢN>>>
 
 ---------------------------
-BƯỚC 1 – LỖI CHÍNH TẢ (QUÉT KỸ NHẤT)
-- Đóng vai một giáo viên ngữ văn khó tính. Quét toàn bộ văn bản để tìm các lỗi: gõ sai phím (typo), sai dấu, sai phụ âm/nguyên âm, hoặc lỗi ghép từ EN/VI.
-- VÍ DỤ CẦN BẮT: "phát chiển" -> "phát triển", "bèo vệ" -> "bảo vệ", "nghien cúu" -> "nghiên cứu".
-- BẮT BUỘC liệt kê tất cả các từ nghi ngờ sai chính tả. Tuyệt đối không được bỏ qua để nhường chỗ cho các lỗi khác.
-- Lưu ý: Không sửa tên riêng, tên thương hiệu (VD: Zindra, Gemini).
-
-BƯỚC 2 – LUẬN ĐIỂM THIẾU CHỨNG CỨ (UNSUPPORTED CLAIMS)
+{spelling_step}BƯỚC 2 – LUẬN ĐIỂM THIẾU CHỨNG CỨ (UNSUPPORTED CLAIMS)
 - Tìm các câu khẳng định mạnh (Tuyệt đối, Nhân quả, So sánh) nhưng thiếu cơ sở.
 - QUY TẮC ±2 CÂU: Nếu luận điểm KHÔNG CÓ số liệu, trích dẫn, hoặc ví dụ cụ thể nằm trong chính câu đó hoặc 2 câu liền kề -> BẮT BUỘC dán nhãn là "unsupported".
 - Đừng nhầm với lỗi Nhảy logic. Ở đây chỉ xét việc "Nói mà không có sách, mách không có chứng".
@@ -0,0 +1,354 @@
+"""
+spell_lexicon.py
+
+Từ điển chính tả EN + VI dạng memory-mapped + sửa lỗi kiểu SymSpell
+-------------------------------------------------------------------
+- Lexicon được compile offline (từ danh sách "từ<TAB>tần suất") thành 1 file nhị phân:
+    * header
+    * offsets (uint32) + blob UTF-8 của các từ đã sort theo byte → tra cứu bằng binary search
+    * tần suất (uint32) của từng từ
+    * chỉ mục symmetric-delete: (hash 64-bit của biến thể xóa ký tự, word_id), sort theo hash
+- Lúc chạy chỉ mmap file (ACCESS_READ): load tức thì, không parse, và các worker
+  uvicorn/gunicorn dùng chung page cache của OS thay vì mỗi process 1 bản copy.
+- Gợi ý sửa (SymSpell): sinh các biến thể xóa ≤ max_edit ký tự của từ nhập,
+  tra hash trong chỉ mục delete → ứng viên → kiểm tra lại bằng khoảng cách
+  Damerau-Levenshtein (OSA). Không cần duyệt toàn bộ từ điển.
+
+Build:
+    python -m app.ai.models.spell_lexicon build words_en.tsv words_vi.tsv -o app/ai/data/spell_lexicon.bin
+
+Đường dẫn lúc chạy lấy từ env SPELL_LEXICON_PATH (mặc định app/ai/data/spell_lexicon.bin).
+Không có file → get_spell_lexicon() trả về None, normalizer bỏ qua bước này.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import unicodedata
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_LEXICON_PATH = Path(__file__).resolve().parents[1] / "data" / "spell_lexicon.bin"
+SPELL_LEXICON_PATH = os.getenv("SPELL_LEXICON_PATH", str(DEFAULT_LEXICON_PATH))
+
+MAGIC = b"LGSPELL1"
+# magic, n_words, n_deletes, max_edit, prefix_len, offsets_pos, blob_pos, freqs_pos, hashes_pos, ids_pos
+_HEADER = struct.Struct("<8sIIII5Q")
+
+DEFAULT_MAX_EDIT = 2
+# Như SymSpell: chỉ sinh delete trên tiền tố → chỉ mục nhỏ hơn nhiều, độ chính xác gần như không đổi
+DEFAULT_PREFIX_LEN = 7
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    term: str
+    distance: int
+    frequency: int
+
+
+def normalize_word(word: str) -> str:
+    """NFC + lower: 'Nghiên' (dạng tổ hợp) và 'nghiên' (dựng sẵn) là cùng 1 key"""
+    return unicodedata.normalize("NFC", word).lower()
+
+
+def stable_hash(text: str) -> int:
+    # Hash ổn định giữa các process (khác hash() của Python)
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _deletes(word: str, max_edit: int, prefix_len: int) -> Set[str]:
+    """Mọi biến thể xóa 0..max_edit ký tự trên tiền tố prefix_len của word"""
+    prefix = word[:prefix_len]
+    result = {prefix}
+    frontier = {prefix}
+    for _ in range(max_edit):
+        next_frontier: Set[str] = set()
+        for item in frontier:
+            if len(item) <= 1:
+                continue
+            for i in range(len(item)):
+                candidate = item[:i] + item[i + 1:]
+                if candidate not in result:
+                    next_frontier.add(candidate)
+        result |= next_frontier
+        frontier = next_frontier
+    return result
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Damerau-Levenshtein (optimal string alignment), dừng sớm khi vượt max_distance.
+    Trả về max_distance + 1 nếu lớn hơn ngưỡng.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if a == b:
+        return 0
+
+    prev_prev: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, prev_prev[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, current
+    return prev[-1] if prev[-1] <= max_distance else max_distance + 1
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+def _pad(buffer: bytearray, alignment: int = 8) -> None:
+    buffer.extend(b"\0" * (-len(buffer) % alignment))
+
+
+def build_lexicon(
+    frequencies: Dict[str, int],
+    output_path: str,
+    max_edit: int = DEFAULT_MAX_EDIT,
+    prefix_len: int = DEFAULT_PREFIX_LEN,
+) -> int:
+    """
+    Compile {word: frequency} thành file lexicon. Trả về số từ đã ghi.
+    """
+    merged: Dict[bytes, int] = {}
+    for word, freq in frequencies.items():
+        key = normalize_word(word.strip())
+        if key:
+            encoded = key.encode("utf-8")
+            merged[encoded] = merged.get(encoded, 0) + max(int(freq), 1)
+
+    words = sorted(merged)
+    delete_pairs: Set[Tuple[int, int]] = set()
+    for word_id, encoded in enumerate(words):
+        for variant in _deletes(encoded.decode("utf-8"), max_edit, prefix_len):
+            delete_pairs.add((stable_hash(variant), word_id))
+    deletes = sorted(delete_pairs)
+
+    body = bytearray(b"\0" * _HEADER.size)
+    _pad(body)
+
+    offsets_pos = len(body)
+    offset = 0
+    offsets = [0]
+    for encoded in words:
+        offset += len(encoded)
+        offsets.append(offset)
+    body.extend(struct.pack(f"<{len(offsets)}I", *offsets))
+    _pad(body)
+
+    blob_pos = len(body)
+    body.extend(b"".join(words))
+    _pad(body)
+
+    freqs_pos = len(body)
+    body.extend(struct.pack(f"<{len(words)}I", *(min(merged[w], 0xFFFFFFFF) for w in words)))
+    _pad(body)
+
+    hashes_pos = len(body)
+    body.extend(struct.pack(f"<{len(deletes)}Q", *(h for h, _ in deletes)))
+    _pad(body)
+
+    ids_pos = len(body)
+    body.extend(struct.pack(f"<{len(deletes)}I", *(i for _, i in deletes)))
+    _pad(body)
+
+    body[:_HEADER.size] = _HEADER.pack(
+        MAGIC, len(words), len(deletes), max_edit, prefix_len,
+        offsets_pos, blob_pos, freqs_pos, hashes_pos, ids_pos,
+    )
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    # Ghi file tạm rồi rename → worker đang mmap bản cũ không bị hỏng
+    os.replace(tmp_path, output_path)
+    return len(words)
+
+
+def read_frequency_lists(paths: Iterable[str]) -> Dict[str, int]:
+    """Đọc file 'từ<TAB hoặc space>tần suất' (thiếu tần suất → 1), dòng '#' bỏ qua"""
+    frequencies: Dict[str, int] = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                parts = line.rsplit(None, 1)
+                if len(parts) == 2 and parts[1].isdigit():
+                    word, freq = parts[0], int(parts[1])
+                else:
+                    word, freq = line, 1
+                frequencies[word] = frequencies.get(word, 0) + freq
+    return frequencies
+
+
+# ---------------------------------------------------------------------------
+# Runtime (mmap)
+# ---------------------------------------------------------------------------
+class SpellLexicon:
+    """Lexicon read-only trên mmap; an toàn khi dùng chung giữa các thread."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(self._mm)
+        (magic, n_words, n_deletes, self.max_edit, self.prefix_len,
+         offsets_pos, blob_pos, freqs_pos, hashes_pos, ids_pos) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a spell lexicon file")
+
+        self.size = n_words
+        self._offsets = view[offsets_pos:offsets_pos + 4 * (n_words + 1)].cast("I")
+        self._blob_pos = blob_pos
+        self._freqs = view[freqs_pos:freqs_pos + 4 * n_words].cast("I")
+        self._hashes = view[hashes_pos:hashes_pos + 8 * n_deletes].cast("Q")
+        self._ids = view[ids_pos:ids_pos + 4 * n_deletes].cast("I")
+
+    def _word_bytes(self, word_id: int) -> bytes:
+        start = self._blob_pos + self._offsets[word_id]
+        end = self._blob_pos + self._offsets[word_id + 1]
+        return self._mm[start:end]
+
+    def _find(self, encoded: bytes) -> int:
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._word_bytes(mid) < encoded:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.size and self._word_bytes(lo) == encoded:
+            return lo
+        return -1
+
+    def frequency(self, word: str) -> int:
+        word_id = self._find(normalize_word(word).encode("utf-8"))
+        return self._freqs[word_id] if word_id >= 0 else 0
+
+    def __contains__(self, word: str) -> bool:
+        return self._find(normalize_word(word).encode("utf-8")) >= 0
+
+    def suggest(self, word: str, max_edit: Optional[int] = None, limit: int = 5) -> List[Suggestion]:
+        """
+        Gợi ý sửa cho word, sort theo (khoảng cách, -tần suất).
+        Từ có trong lexicon → trả về chính nó với distance 0.
+        """
+        key = normalize_word(word)
+        max_edit = self.max_edit if max_edit is None else min(max_edit, self.max_edit)
+
+        exact = self._find(key.encode("utf-8"))
+        if exact >= 0:
+            return [Suggestion(key, 0, self._freqs[exact])]
+
+        seen: Set[int] = set()
+        suggestions: List[Suggestion] = []
+        for variant in _deletes(key, max_edit, self.prefix_len):
+            h = stable_hash(variant)
+            idx = bisect_left(self._hashes, h)
+            while idx < len(self._hashes) and self._hashes[idx] == h:
+                word_id = self._ids[idx]
+                idx += 1
+                if word_id in seen:
+                    continue
+                seen.add(word_id)
+                term = self._word_bytes(word_id).decode("utf-8")
+                distance = edit_distance(key, term, max_edit)
+                if distance <= max_edit:
+                    suggestions.append(Suggestion(term, distance, self._freqs[word_id]))
+
+        suggestions.sort(key=lambda s: (s.distance, -s.frequency, s.term))
+        return suggestions[:limit]
+
+    def close(self) -> None:
+        for view in (self._offsets, self._freqs, self._hashes, self._ids):
+            view.release()
+        self._mm.close()
+
+
+_lexicon: Optional[SpellLexicon] = None
+_lexicon_loaded = False
+_lexicon_lock = threading.Lock()
+
+
+def get_spell_lexicon() -> Optional[SpellLexicon]:
+    """Lexicon dùng chung của process (mmap 1 lần); None nếu chưa build file."""
+    global _lexicon, _lexicon_loaded
+    if _lexicon_loaded:
+        return _lexicon
+    with _lexicon_lock:
+        if not _lexicon_loaded:
+            if os.path.exists(SPELL_LEXICON_PATH):
+                try:
+                    _lexicon = SpellLexicon(SPELL_LEXICON_PATH)
+                    print(f"✅ Spell lexicon loaded: {SPELL_LEXICON_PATH} ({_lexicon.size} words)")
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Cannot load spell lexicon {SPELL_LEXICON_PATH}: {e}")
+            else:
+                print(f"⚠️ Spell lexicon not found at {SPELL_LEXICON_PATH}; local spelling disabled")
+            _lexicon_loaded = True
+    return _lexicon
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Spell lexicon tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Compile frequency lists into a lexicon file")
+    build.add_argument("inputs", nargs="+", help="Files with 'word<TAB>frequency' per line (EN and/or VI)")
+    build.add_argument("-o", "--output", default=SPELL_LEXICON_PATH)
+    build.add_argument("--max-edit", type=int, default=DEFAULT_MAX_EDIT)
+    build.add_argument("--prefix-len", type=int, default=DEFAULT_PREFIX_LEN)
+
+    lookup = sub.add_parser("suggest", help="Print suggestions for words")
+    lookup.add_argument("words", nargs="+")
+    lookup.add_argument("-l", "--lexicon", default=SPELL_LEXICON_PATH)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        count = build_lexicon(read_frequency_lists(args.inputs), args.output, args.max_edit, args.prefix_len)
+        print(f"✅ Wrote {count} words to {args.output}")
+    else:
+        lexicon = SpellLexicon(args.lexicon)
+        for word in args.words:
+            print(word, "→", [(s.term, s.distance, s.frequency) for s in lexicon.suggest(word)])
+
+
+if __name__ == "__main__":
+    main()
+
+
+__all__ = [
+    "SpellLexicon",
+    "Suggestion",
+    "build_lexicon",
+    "edit_distance",
+    "get_spell_lexicon",
+    "normalize_word",
+    "read_frequency_lists",
+    "stable_hash",
+]
@@ -0,0 +1,518 @@
+"""
+term_detector.py
+
+Phát hiện thuật ngữ chưa định nghĩa bằng luật (chạy local, không gọi LLM)
+------------------------------------------------------------------------
+Cài đặt đúng thuật toán mô tả trong undefinedTerms.py:
+    1. Trích ứng viên thuật ngữ ở từng câu:
+        * acronym: "NLI", "GPT-4", "BERTs"
+        * token camelCase / có chữ hoa ở giữa: "mDeBERTa", "PyTorch", "ResNet50"
+        * cụm Title Case tiếng Anh ≥ 2 từ: "Quantum Efficiency Score"
+        * cụm tiếng Anh viết thường chen trong câu tiếng Việt: "gradient clipping"
+          (không chắc là thuật ngữ → đánh dấu ambiguous). Từ có dạng âm tiết tiếng
+          Việt ("theo", "khi", "nhanh", ...) hoặc có trong mô hình khôi phục dấu
+          không bao giờ thuộc cụm này và cắt cụm tại đó.
+    2. Ghi lại lần xuất hiện đầu tiên của mỗi thuật ngữ (paragraph, sentence).
+    3. Trong đoạn chứa lần xuất hiện đầu tiên, tìm pattern định nghĩa quanh thuật ngữ
+       ("là", "được hiểu là", "gọi là", "(viết tắt của …)", "X (Long Form)",
+       "Long Form (X)", "is defined as", "refers to", ...). Tất cả pattern được
+       compile sẵn thành vài regex alternation (1 automaton / vị trí).
+       Hệ từ trần ("is", "are") chỉ tính khi câu có dạng định nghĩa:
+       "X is a/an <cụm danh từ> that/which/used ..." với X đứng đầu câu.
+    4. Không thấy định nghĩa → flag "chưa được định nghĩa".
+
+Kết quả cùng format với check_undefined_terms (Gemini); mỗi item có thêm
+"ambiguous" để phía LLM chỉ phải xác nhận các trường hợp không chắc chắn.
+Thuật ngữ đã có trong glossary của user (known_terms) được coi là đã định nghĩa
+ngay, không kiểm tra lại và không bao giờ gửi cho LLM.
+
+Module này không phụ thuộc torch / Gemini.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.utils.nlp import extract_paragraphs, extract_sentences
+
+from .diacritics import get_diacritic_model
+
+ENGINE_NAME = "local-rules"
+
+# Acronym phổ biến, người đọc nào cũng hiểu → không flag
+COMMON_ACRONYMS = frozenset({
+    "AI", "API", "CEO", "CPU", "GPU", "RAM", "ROM", "USB", "PC", "IT", "TV", "OK",
+    "PDF", "URL", "HTTP", "HTTPS", "HTML", "CSS", "SQL", "JSON", "XML", "UI", "UX",
+    "USD", "VND", "EUR", "GDP", "UN", "EU", "USA", "UK", "ID", "FAQ", "PR", "HR",
+    "AM", "PM", "Q1", "Q2", "Q3", "Q4", "TP", "HCM", "VN",
+})
+
+# Từ tiếng Anh thông dụng trong văn bản trộn Việt–Anh, không coi là thuật ngữ
+COMMON_ENGLISH_WORDS = frozenset({
+    "the", "and", "for", "with", "from", "that", "this", "into", "over", "under",
+    "system", "model", "models", "data", "dataset", "accuracy", "team", "project",
+    "deadline", "feedback", "meeting", "online", "offline", "email", "website",
+    "app", "file", "report", "test", "design", "marketing", "sale", "sales",
+    "startup", "internet", "video", "game", "laptop", "smartphone", "software",
+    "hardware", "user", "users", "server", "code", "coding", "bug", "update",
+    "version", "plan", "idea", "style", "check", "list", "level", "top", "task",
+})
+
+# Cụm Title Case bắt đầu bằng các từ này (đầu câu tiếng Anh) thì bỏ từ đầu
+_LEADING_STOPWORDS = frozenset({
+    "The", "A", "An", "This", "That", "These", "Those", "In", "On", "At", "For",
+    "With", "Our", "We", "Its", "Their", "Each", "Every", "When", "While", "If",
+})
+
+# Ký tự tiếng Việt có dấu → nhận diện câu tiếng Việt
+_VI_CHARS = "ăâêôơưđàáảãạằắẳẵặầấẩẫậèéẻẽẹềếểễệìíỉĩịòóỏõọồốổỗộờớởỡợùúủũụừứửữựỳýỷỹỵ"
+
+# ---------------------------------------------------------------------------
+# Candidate extractor
+# ---------------------------------------------------------------------------
+_ACRONYM_RE = re.compile(r"(?<![\w-])([A-Z][A-Z0-9]{1,9}(?:-[A-Z0-9]{1,6})?)s?(?![\w-])")
+# Token có chữ thường + ít nhất 2 chữ hoa: mDeBERTa, PyTorch, RAGNet, ResNet50
+_MIXED_CASE_RE = re.compile(
+    r"(?<![\w-])(?=[A-Za-z0-9]*[a-z])(?=(?:[A-Za-z0-9]*[A-Z]){2})([A-Za-z][A-Za-z0-9]*(?:-[A-Za-z0-9]+)?)(?![\w-])"
+)
+_TITLE_NGRAM_RE = re.compile(
+    r"(?<![\w-])((?:[A-Z][a-z0-9]+(?:-[A-Za-z0-9]+)?)(?:\s+(?:of\s+|for\s+|and\s+)?[A-Z][a-z0-9]+(?:-[A-Za-z0-9]+)?){1,4})(?![\w-])"
+)
+_ASCII_WORD_RE = re.compile(r"(?<![\w-])[a-z]{3,}(?![\w-])")
+# Cụm tiếng Anh: 2-3 từ liền nhau, chỉ cách bởi 1 khoảng trắng hoặc gạch nối
+_PHRASE_GAP_RE = re.compile(r"[ -]")
+_MAX_PHRASE_WORDS = 3
+# Chính tả âm tiết tiếng Việt khi gõ không dấu: phụ âm đầu + vần + phụ âm cuối
+_VI_SYLLABLE_RE = re.compile(
+    r"(?:ngh|ng|nh|ch|gh|gi|kh|ph|qu|th|tr|[bcdghklmnprstvx])?"
+    r"(?:uye|uya|uyu|oai|oay|oeo|uay|uoi|ieu|yeu|uou|"
+    r"ai|ao|au|ay|eo|eu|ia|ie|iu|oa|oe|oi|ua|ue|ui|uo|uu|uy|ye|"
+    r"[aeiouy])"
+    r"(?:ng|nh|ch|[cmnpt])?"
+)
+
+# ---------------------------------------------------------------------------
+# Definition pattern automaton
+# ---------------------------------------------------------------------------
+# Cue ngay SAU thuật ngữ: "X là ...", "X (viết tắt của ...)", "X, which means ..."
+_DEFINITION_AFTER = [
+    "được hiểu là", "được định nghĩa là", "được định nghĩa như", "có nghĩa là",
+    "nghĩa là", "tức là", "hay còn gọi là", "còn gọi là", "hay còn được gọi là",
+    "là viết tắt của", "viết tắt của", "viết tắt cho", "là",
+    "is defined as", "is short for", "stands for", "refers to", "means",
+    "also known as", "short for",
+    "which means", "which refers to", "i.e.", "that is",
+]
+# "X is a/an <cụm danh từ ngắn> that/which/used ..." (X đứng đầu câu): hệ từ trần như
+# "GPUs are expensive" hay "X is the ..." không phải định nghĩa
+_COPULA_DEFINITION_RE = re.compile(
+    r"^\s*,?\s*(?:is|are)\s+(?:a|an)\s+(?:[\w-]+\s+){0,6}?"
+    r"(?:that|which|who|whose|where|used|designed|consisting|composed|built|trained)(?![\w])",
+    re.IGNORECASE,
+)
+_SENTENCE_START_RE = re.compile(r"^\W*(?:(?:the|a|an)\s+)?$", re.IGNORECASE)
+# Cue ngay TRƯỚC thuật ngữ: "... được gọi là X", "called X"
+_DEFINITION_BEFORE = [
+    "được gọi là", "gọi tắt là", "gọi là", "viết tắt là", "ký hiệu là", "kí hiệu là",
+    "called", "known as", "termed", "denoted as", "denoted by", "hereafter",
+]
+# Cue ở xa hơn trong cùng câu → có thể là định nghĩa, cần LLM xác nhận
+_WEAK_CUES = ["là", "nghĩa là", "is", "means", "refers to", "định nghĩa", "defined"]
+
+
+def _alternation(phrases: List[str]) -> str:
+    # Cụm dài trước để regex ưu tiên match dài nhất
+    return "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+
+
+_AFTER_RE = re.compile(
+    r"^\s*[\"”’)]?\s*(?:,\s*|:\s*|\s-\s|\s–\s)?(?:" + _alternation(_DEFINITION_AFTER) + r")(?![\w])",
+    re.IGNORECASE,
+)
+# "X là Y": dạng định nghĩa tiếng Việt đủ chắc để lưu vào chỉ mục thuật ngữ
+_LA_DEFINITION_RE = re.compile(r"^\s*[\"”’)]?\s*(?:,\s*)?là(?![\w])", re.IGNORECASE)
+_PAREN_AFTER_RE = re.compile(r"^\s*[\(\[]([^()\[\]]{3,120})[\)\]]")
+_BEFORE_RE = re.compile(
+    r"(?:" + _alternation(_DEFINITION_BEFORE) + r")\s*[\"“‘(]?\s*$",
+    re.IGNORECASE,
+)
+_OPEN_PAREN_BEFORE_RE = re.compile(r"[\(\[]\s*$")
+_WEAK_CUE_RE = re.compile(r"(?<![\w])(?:" + _alternation(_WEAK_CUES) + r")(?![\w])", re.IGNORECASE)
+_WEAK_CUE_WINDOW = 40  # ký tự sau thuật ngữ
+
+
+@dataclass
+class TermOccurrence:
+    """Lần xuất hiện đầu tiên của một thuật ngữ + kết quả kiểm tra định nghĩa."""
+
+    term: str
+    kind: str
+    paragraph_index: int
+    sentence_index: int
+    sentence: str
+    ambiguous: bool = False
+    is_defined: bool = False
+    definition_found: Optional[str] = None
+    # "acronym" | "la" | "paren" | "after" | "before": dạng định nghĩa đã khớp
+    definition_cue: Optional[str] = None
+    weak_cue: bool = False
+    from_glossary: bool = False
+    positions: List[Tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def first_appeared(self) -> str:
+        return f"Paragraph {self.paragraph_index + 1}, Sentence {self.sentence_index + 1}"
+
+
+def normalize_term_key(term: str) -> str:
+    """Key so khớp thuật ngữ: gộp khoảng trắng + viết thường"""
+    return " ".join((term or "").split()).lower()
+
+
+def _is_vietnamese(sentence: str) -> bool:
+    lowered = sentence.lower()
+    return any(ch in _VI_CHARS for ch in lowered)
+
+
+def _is_vietnamese_word(word: str) -> bool:
+    """Từ ASCII viết thường có thể là tiếng Việt gõ không dấu ("theo", "khi", "nhanh")"""
+    if _VI_SYLLABLE_RE.fullmatch(word):
+        return True
+    model = get_diacritic_model()
+    return model is not None and bool(model.candidates(word))
+
+
+def _foreign_phrases(sentence: str) -> Iterator[Tuple[int, int]]:
+    """Span của các cụm 2-3 từ không phải tiếng Việt đứng liền nhau trong câu"""
+    run: List[Tuple[int, int]] = []
+
+    def _flush() -> Iterator[Tuple[int, int]]:
+        if len(run) >= 2:
+            yield run[0][0], run[-1][1]
+
+    for m in _ASCII_WORD_RE.finditer(sentence):
+        word = m.group()
+        if word in COMMON_ENGLISH_WORDS or _is_vietnamese_word(word):
+            yield from _flush()
+            run = []
+            continue
+        if run and (
+            not _PHRASE_GAP_RE.fullmatch(sentence[run[-1][1]:m.start()]) or len(run) == _MAX_PHRASE_WORDS
+        ):
+            yield from _flush()
+            run = []
+        run.append(m.span())
+    yield from _flush()
+
+
+def _strip_sentence_start(term: str, start: int) -> Optional[str]:
+    """Cụm Title Case ở đầu câu: bỏ từ đầu nếu là stopword (The, This, ...)"""
+    words = term.split()
+    if words[0] in _LEADING_STOPWORDS:
+        words = words[1:]
+    elif start == 0 and len(words) == 2:
+        # Đầu câu 2 từ viết hoa, vd. "Hybrid search" → không đủ tin cậy
+        return None
+    return " ".join(words) if len(words) >= 2 else None
+
+
+def extract_candidates(sentence: str) -> List[Tuple[str, str, int, bool]]:
+    """
+    Trích ứng viên thuật ngữ của 1 câu.
+
+    Returns:
+        List[(term, kind, start, ambiguous)]
+    """
+    candidates: List[Tuple[str, str, int, bool]] = []
+    taken: List[Tuple[int, int]] = []
+
+    def _overlaps(span: Tuple[int, int]) -> bool:
+        return any(span[0] < e and s < span[1] for s, e in taken)
+
+    for m in _TITLE_NGRAM_RE.finditer(sentence):
+        term = _strip_sentence_start(m.group(1), m.start(1))
+        if term:
+            start = sentence.index(term, m.start(1))
+            candidates.append((term, "phrase", start, False))
+            taken.append((start, start + len(term)))
+
+    for m in _ACRONYM_RE.finditer(sentence):
+        term = m.group(1)
+        if term in COMMON_ACRONYMS or term.isdigit() or sum(c.isalpha() for c in term) < 2:
+            continue
+        if not _overlaps(m.span(1)):
+            candidates.append((term, "acronym", m.start(1), False))
+            taken.append(m.span(1))
+
+    for m in _MIXED_CASE_RE.finditer(sentence):
+        # Số nhiều của acronym phổ biến ("GPUs") không phải identifier
+        if m.group(1).endswith("s") and m.group(1)[:-1] in COMMON_ACRONYMS:
+            continue
+        if not _overlaps(m.span(1)):
+            candidates.append((m.group(1), "identifier", m.start(1), False))
+            taken.append(m.span(1))
+
+    if _is_vietnamese(sentence):
+        for span in _foreign_phrases(sentence):
+            if not _overlaps(span):
+                candidates.append((sentence[span[0]:span[1]], "foreign_phrase", span[0], True))
+                taken.append(span)
+
+    candidates.sort(key=lambda c: c[2])
+    return candidates
+
+
+def _acronym_letters(acronym: str) -> str:
+    return "".join(c for c in acronym.upper() if c.isalpha())
+
+
+def _acronym_matches_long_form(acronym: str, long_form: str) -> bool:
+    words = [w for w in re.split(r"[\s-]+", long_form.strip()) if w]
+    initials = "".join(w[0].upper() for w in words if w[0].isalpha())
+    letters = _acronym_letters(acronym)
+    return bool(letters) and letters in initials
+
+
+def _long_form_before(acronym: str, before: str) -> Optional[str]:
+    """"Natural Language Inference (" + "NLI" → "Natural Language Inference" nếu khớp chữ cái đầu"""
+    if not _OPEN_PAREN_BEFORE_RE.search(before):
+        return None
+    letters = _acronym_letters(acronym)
+    words = _OPEN_PAREN_BEFORE_RE.sub("", before).split()
+    for n in range(len(letters), max(len(letters) - 2, 0), -1):
+        candidate = words[-n:] if n <= len(words) else []
+        parts = [p for w in candidate for p in w.split("-") if p]
+        if candidate and "".join(p[0].upper() for p in parts if p[0].isalpha()) == letters:
+            return " ".join(candidate)
+    return None
+
+
+def _check_definition(occ: TermOccurrence, paragraph_sentences: List[str]) -> None:
+    """Tìm pattern định nghĩa quanh mọi lần xuất hiện của term trong đoạn đầu tiên"""
+    term_re = re.compile(r"(?<![\w-])" + re.escape(occ.term) + r"s?(?![\w-])")
+    for sentence in paragraph_sentences:
+        for m in term_re.finditer(sentence):
+            before, after = sentence[:m.start()], sentence[m.end():]
+
+            paren = _PAREN_AFTER_RE.match(after)
+            if paren:
+                inner = paren.group(1).strip()
+                # "NLI (Natural Language Inference)", "X (viết tắt của ...)"; "(NLI)" sau cụm dài thì không tính
+                spelled_out = occ.kind == "acronym" and _acronym_matches_long_form(occ.term, inner)
+                if spelled_out or len(inner.split()) >= 2:
+                    occ.is_defined = True
+                    occ.definition_found = inner
+                    occ.definition_cue = "acronym" if spelled_out else "paren"
+                    return
+                if occ.kind == "phrase" and _acronym_matches_long_form(inner, occ.term):
+                    # Dạng đầy đủ của acronym: có thể đã đủ rõ nghĩa, để LLM quyết định
+                    occ.weak_cue = True
+
+            # "Natural Language Inference (NLI)"
+            if occ.kind == "acronym":
+                long_form = _long_form_before(occ.term, before)
+                if long_form:
+                    occ.is_defined = True
+                    occ.definition_found = long_form
+                    occ.definition_cue = "acronym"
+                    return
+
+            if _AFTER_RE.match(after) or (
+                _SENTENCE_START_RE.match(before) and _COPULA_DEFINITION_RE.match(after)
+            ):
+                occ.is_defined = True
+                occ.definition_found = after.strip(" ,:-–").strip()[:200]
+                occ.definition_cue = "la" if _LA_DEFINITION_RE.match(after) else "after"
+                return
+
+            if _BEFORE_RE.search(before):
+                occ.is_defined = True
+                occ.definition_found = before.strip()[-200:]
+                occ.definition_cue = "before"
+                return
+
+            if _WEAK_CUE_RE.search(after[:_WEAK_CUE_WINDOW]):
+                occ.weak_cue = True
+
+
+def find_terms(content: str, known_terms: Optional[Dict[str, Dict[str, Any]]] = None) -> List[TermOccurrence]:
+    """
+    Quét văn bản 1 lượt: lần xuất hiện đầu tiên của mỗi thuật ngữ + trạng thái định nghĩa.
+
+    Args:
+        known_terms: Glossary của user {normalize_term_key(term): {"definition", ...}}
+    """
+    paragraphs = [extract_sentences(p) or [p] for p in extract_paragraphs(content or "")]
+    return find_terms_in_paragraphs(paragraphs, known_terms)
+
+
+def find_terms_in_paragraphs(
+    paragraphs: List[List[str]],
+    known_terms: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> List[TermOccurrence]:
+    """Giống find_terms nhưng nhận đoạn đã tách câu sẵn (vd. từ DocumentCanvasSyncService)"""
+    known_terms = known_terms or {}
+
+    first_seen: Dict[str, TermOccurrence] = {}
+    for p_idx, sentences in enumerate(paragraphs):
+        for s_idx, sentence in enumerate(sentences):
+            for term, kind, start, ambiguous in extract_candidates(sentence):
+                key = term.lower().rstrip("s") if kind == "acronym" else term.lower()
+                if key in first_seen:
+                    continue
+                first_seen[key] = TermOccurrence(
+                    term=term,
+                    kind=kind,
+                    paragraph_index=p_idx,
+                    sentence_index=s_idx,
+                    sentence=sentence,
+                    ambiguous=ambiguous,
+                    positions=[(start, start + len(term))],
+                )
+
+    for occ in first_seen.values():
+        known = known_terms.get(normalize_term_key(occ.term))
+        if known is not None:
+            occ.is_defined = True
+            occ.from_glossary = True
+            occ.definition_found = known.get("definition")
+            continue
+        _check_definition(occ, paragraphs[occ.paragraph_index])
+        # Có cue yếu gần đó nhưng không khớp pattern → để LLM xác nhận
+        if not occ.is_defined and occ.weak_cue:
+            occ.ambiguous = True
+
+    return list(first_seen.values())
+
+
+_INDEXED_CUES = frozenset({"acronym", "la"})
+
+
+def build_term_index(paragraphs: List[List[str]]) -> Dict[str, Any]:
+    """
+    Chỉ mục thuật ngữ gọn để lưu vào Document.structure_json.
+
+    Chỉ lưu các định nghĩa chắc chắn: acronym kèm dạng đầy đủ khớp chữ cái đầu
+    ("Natural Language Inference (NLI)", "NLI (Natural Language Inference)")
+    và dạng "X là Y". Các cue khác dễ nhầm nên chỉ dùng khi phân tích trực tiếp.
+
+    Args:
+        paragraphs: Danh sách đoạn, mỗi đoạn là danh sách câu (theo thứ tự p_index, s_index)
+
+    Returns:
+        {
+            "terms": {term_key: {"term", "kind", "p", "s", "start", "end",
+                                 "defined", "definition", "ambiguous"}},
+            "acronyms": {"NLP": "Natural Language Processing", ...}
+        }
+        "p"/"s" là chỉ số 0-based của đoạn/câu; "start"/"end" là offset ký tự
+        của lần xuất hiện đầu tiên trong câu đó.
+    """
+    terms: Dict[str, Dict[str, Any]] = {}
+    acronyms: Dict[str, str] = {}
+    for occ in find_terms_in_paragraphs(paragraphs):
+        if occ.definition_cue not in _INDEXED_CUES:
+            continue
+        start, end = occ.positions[0]
+        terms[normalize_term_key(occ.term)] = {
+            "term": occ.term,
+            "kind": occ.kind,
+            "p": occ.paragraph_index,
+            "s": occ.sentence_index,
+            "start": start,
+            "end": end,
+            "defined": occ.is_defined,
+            "definition": occ.definition_found,
+            "ambiguous": occ.ambiguous,
+        }
+        if occ.definition_cue == "acronym":
+            acronyms[occ.term] = occ.definition_found
+    return {"terms": terms, "acronyms": acronyms}
+
+
+def _snippet(sentence: str, position: Tuple[int, int], width: int = 80) -> str:
+    start = max(position[0] - width // 2, 0)
+    end = min(position[1] + width // 2, len(sentence))
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if end < len(sentence) else ""
+    return f"{prefix}{sentence[start:end].strip()}{suffix}"
+
+
+_REASONS = {
+    "acronym": "Acronym is used without its full form or an explanation at first mention.",
+    "identifier": "Technical name is used without a short explanation at first mention.",
+    "phrase": "Specialized term is introduced without a definition at first mention.",
+    "foreign_phrase": "English technical phrase is used without a Vietnamese explanation.",
+}
+
+
+def check_undefined_terms_local(
+    context: Optional[Dict[str, Any]],
+    content: str,
+    known_terms: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Phiên bản local của check_undefined_terms: cùng format kết quả, chạy trong vài ms.
+
+    Mỗi item có thêm "ambiguous": True nếu luật không đủ chắc chắn
+    (nên được LLM xác nhận lại) và "source": "document" | "glossary".
+    """
+    result = {
+        "success": False,
+        "content": content,
+        "context": context or {},
+        "total_terms_found": 0,
+        "total_undefined": 0,
+        "undefined_terms": [],
+        "defined_terms": [],
+        "metadata": {
+            "analyzed_at": datetime.utcnow().isoformat(),
+            "model": ENGINE_NAME,
+            "error": None
+        }
+    }
+
+    if not content or not content.strip():
+        result["metadata"]["error"] = "Content is empty"
+        return result
+
+    try:
+        for occ in find_terms(content, known_terms):
+            item = {
+                "term": occ.term,
+                "first_appeared": occ.first_appeared,
+                "context_snippet": _snippet(occ.sentence, occ.positions[0]),
+                "is_defined": occ.is_defined,
+                "ambiguous": occ.ambiguous,
+                "source": "glossary" if occ.from_glossary else "document",
+            }
+            if occ.is_defined:
+                item["definition_found"] = occ.definition_found
+                result["defined_terms"].append(item)
+            else:
+                item["reason"] = _REASONS.get(occ.kind, _REASONS["phrase"])
+                result["undefined_terms"].append(item)
+
+        result["success"] = True
+        result["total_undefined"] = len(result["undefined_terms"])
+        result["total_terms_found"] = result["total_undefined"] + len(result["defined_terms"])
+
+    except Exception as e:
+        result["metadata"]["error"] = f"Error during analysis: {str(e)}"
+        print(f"Error: {e}")
+
+    return result
+
+
+__all__ = [
+    "TermOccurrence",
+    "build_term_index",
+    "check_undefined_terms_local",
+    "extract_candidates",
+    "find_terms",
+    "find_terms_in_paragraphs",
+    "normalize_term_key",
+]
@@ -11,13 +11,27 @@ Mục tiêu:
     * term_mappings
     * normalized_text
     * original_text
+
+Toàn bộ từ điển thay thế được build sẵn thành 1 automaton Aho–Corasick
+(không phân biệt hoa thường) → quét văn bản đúng 1 lượt, bất kể từ điển lớn
+cỡ nào. Automaton chỉ build lại khi BASIC_REPLACEMENTS_EN/_VI thay đổi.
+
+Sau đó, nếu có mô hình khôi phục dấu (diacritics.py), các đoạn tiếng Việt gõ
+không dấu được thêm dấu (reason = "diacritic_restoration"); cuối cùng, nếu có
+lexicon chính tả (spell_lexicon.py), mọi từ không nằm trong lexicon được sửa
+bằng gợi ý SymSpell tốt nhất (reason = "lexicon_correction").
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Dict, Any
 import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+
+from .diacritics import find_restorations, get_diacritic_model
+from .spell_lexicon import SpellLexicon, get_spell_lexicon
 
 
 @dataclass
@@ -88,52 +102,263 @@ BASIC_REPLACEMENTS_VI: Dict[str, str] = {
 }
 
 
+def _fold(ch: str) -> str:
+    """Lower-case 1 ký tự nhưng giữ nguyên độ dài (để offset khớp chuỗi gốc)"""
+    lowered = ch.lower()
+    return lowered if len(lowered) == 1 else ch
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class ReplacementAutomaton:
+    """
+    Aho–Corasick automaton trên các key của từ điển thay thế.
+
+    - Match không phân biệt hoa thường, offset tính trên chuỗi gốc.
+    - Chỉ nhận match đứng riêng thành từ: ký tự ngay trước/sau span không phải chữ/số
+      ("nghiên cứ" không match bên trong "nghiên cứu").
+    - Chồng lấn: ưu tiên match bắt đầu sớm nhất, rồi match dài nhất.
+    - Các key chỉ khác hoa thường ("Aritificial Inteligence" / "aritificial inteligence")
+      dùng chung 1 pattern; khi thay thế ưu tiên biến thể trùng đúng chữ hoa/thường.
+    """
+
+    def __init__(self, replacements: Dict[str, str]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._lengths: List[int] = []
+        self._variants: List[Dict[str, str]] = []
+
+        pattern_ids: Dict[str, int] = {}
+        for wrong, correct in replacements.items():
+            if not wrong:
+                continue
+            key = "".join(_fold(ch) for ch in wrong)
+            pid = pattern_ids.get(key)
+            if pid is None:
+                pid = pattern_ids[key] = len(self._lengths)
+                self._lengths.append(len(key))
+                self._variants.append({})
+                self._insert(key, pid)
+            self._variants[pid][wrong] = correct
+
+        self._build_failure_links()
+
+    def _insert(self, key: str, pid: int) -> None:
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(pid)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                # Gộp output của suffix link để lúc quét không phải lần theo chuỗi fail
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """Trả về các match không chồng lấn [(start, end, pattern_id)] theo thứ tự vị trí"""
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        # best[start] = match dài nhất bắt đầu tại start
+        best: Dict[int, Tuple[int, int]] = {}
+        node = 0
+        size = len(text)
+        for i, ch in enumerate(text):
+            ch = _fold(ch)
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node] or (i + 1 < size and _is_word_char(text[i + 1])):
+                continue
+            for pid in out[node]:
+                start = i + 1 - lengths[pid]
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                current = best.get(start)
+                if current is None or lengths[pid] > lengths[current[1]]:
+                    best[start] = (i + 1, pid)
+
+        matches: List[Tuple[int, int, int]] = []
+        last_end = 0
+        for start in sorted(best):
+            if start < last_end:
+                continue
+            end, pid = best[start]
+            matches.append((start, end, pid))
+            last_end = end
+        return matches
+
+    def replacement_for(self, pid: int, matched: str) -> str:
+        variants = self._variants[pid]
+        correct = variants.get(matched)
+        if correct is not None:
+            return correct
+        correct = next(iter(variants.values()))
+        # "Embeding" → "Embedding": giữ chữ hoa đầu câu của người viết
+        if matched[:1].isupper() and correct[:1].islower():
+            correct = correct[:1].upper() + correct[1:]
+        return correct
+
+
+_automaton_lock = threading.Lock()
+_automaton_cache: Optional[Tuple[int, ReplacementAutomaton]] = None
+
+
+def _get_automaton(replacements: Dict[str, str]) -> ReplacementAutomaton:
+    """Automaton cho từ điển hiện tại; chỉ build lại khi nội dung từ điển đổi."""
+    global _automaton_cache
+    fingerprint = hash(frozenset(replacements.items()))
+    cached = _automaton_cache
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+    with _automaton_lock:
+        if _automaton_cache is None or _automaton_cache[0] != fingerprint:
+            _automaton_cache = (fingerprint, ReplacementAutomaton(replacements))
+        return _automaton_cache[1]
+
+
 def _apply_basic_replacements(text: str, replacements: Dict[str, str]) -> NormalizationResult:
     """
-    Áp dụng rule thay thế cơ bản trên chuỗi `text`.
+    Áp dụng rule thay thế cơ bản trên chuỗi `text` (1 lượt quét qua automaton).
     Trả về NormalizationResult với:
       - normalized_text: text sau khi thay
-      - spelling_corrections / term_mappings / mappings: log các thay thế.
+      - spelling_corrections / term_mappings / mappings: log các thay thế,
+        start_pos / end_pos tính trên chuỗi gốc.
     """
     original_text = text
-    normalized_text = text
+    automaton = _get_automaton(replacements)
 
     spelling_corrections: List[Dict[str, Any]] = []
     term_mappings: List[Dict[str, Any]] = []
     mappings: List[Dict[str, Any]] = []
+    pieces: List[str] = []
+    cursor = 0
 
-    for wrong, correct in replacements.items():
-        # regex ignore-case, tìm vị trí để báo về FE
-        for m in re.finditer(re.escape(wrong), original_text, flags=re.IGNORECASE):
-            start = m.start()
-            end = m.end()
+    for start, end, pid in automaton.find(original_text):
+        matched = original_text[start:end]
+        correct = automaton.replacement_for(pid, matched)
 
-            record = {
-                "original": original_text[start:end],
-                "normalized": correct,
-                "start_pos": start,
-                "end_pos": end,
-                "reason": "basic_replacement",
-            }
+        record = {
+            "original": matched,
+            "normalized": correct,
+            "start_pos": start,
+            "end_pos": end,
+            "reason": "basic_replacement",
+        }
 
-            # MVP: coi tất cả là spelling correction + term mapping
-            spelling_corrections.append(record)
-            term_mappings.append(record)
-            mappings.append(record)
+        # MVP: coi tất cả là spelling correction + term mapping
+        spelling_corrections.append(record)
+        term_mappings.append(record)
+        mappings.append(record)
 
-        # Thực hiện thay trong normalized_text (case-sensitive để đơn giản)
-        normalized_text = normalized_text.replace(wrong, correct)
+        pieces.append(original_text[cursor:start])
+        pieces.append(correct)
+        cursor = end
+
+    pieces.append(original_text[cursor:])
 
     return NormalizationResult(
         original_text=original_text,
-        normalized_text=normalized_text,
+        normalized_text="".join(pieces),
         spelling_corrections=spelling_corrections,
         term_mappings=term_mappings,
         mappings=mappings,
     )
 
 
-def normalize_text(text: str, language: str = "vi") -> NormalizationResult:
+# Token chữ (EN + VI, không số / gạch dưới) để kiểm tra với lexicon
+_WORD_RE = re.compile(r"[^\W\d_]+")
+_SENTENCE_END_RE = re.compile(r"[.!?…:]\s*$")
+MIN_LEXICON_WORD_LEN = 3
+
+
+def _max_edit_for(word: str) -> int:
+    # Từ ngắn chỉ cho sửa 1 ký tự, tránh "sửa" thành 1 từ hoàn toàn khác
+    return 1 if len(word) <= 5 else 2
+
+
+def _apply_lexicon_corrections(
+    text: str,
+    lexicon: SpellLexicon,
+    taken: List[Tuple[int, int]],
+) -> List[Dict[str, Any]]:
+    """
+    Sửa các từ không có trong lexicon bằng gợi ý gần nhất (SymSpell).
+
+    Bỏ qua: từ đã bị rule cơ bản thay, từ quá ngắn, acronym / camelCase,
+    và từ viết hoa giữa câu (thường là tên riêng).
+    """
+    corrections: List[Dict[str, Any]] = []
+    taken_idx = 0
+    for m in _WORD_RE.finditer(text):
+        word = m.group()
+        start, end = m.span()
+
+        while taken_idx < len(taken) and taken[taken_idx][1] <= start:
+            taken_idx += 1
+        if taken_idx < len(taken) and taken[taken_idx][0] < end:
+            continue
+        if len(word) < MIN_LEXICON_WORD_LEN or any(c.isupper() for c in word[1:]):
+            continue
+        if word[0].isupper() and start > 0 and not _SENTENCE_END_RE.search(text[max(start - 3, 0):start]):
+            continue
+        if word in lexicon:
+            continue
+
+        suggestions = lexicon.suggest(word, max_edit=_max_edit_for(word), limit=1)
+        if not suggestions:
+            continue
+        correct = suggestions[0].term
+        if word[0].isupper():
+            correct = correct[:1].upper() + correct[1:]
+
+        corrections.append(
+            {
+                "original": word,
+                "normalized": correct,
+                "start_pos": start,
+                "end_pos": end,
+                "reason": "lexicon_correction",
+            }
+        )
+    return corrections
+
+
+def _render(text: str, records: List[Dict[str, Any]]) -> str:
+    """Dựng normalized_text từ các thay thế không chồng lấn (đã sort theo start_pos)"""
+    pieces: List[str] = []
+    cursor = 0
+    for record in records:
+        pieces.append(text[cursor:record["start_pos"]])
+        pieces.append(record["normalized"])
+        cursor = record["end_pos"]
+    pieces.append(text[cursor:])
+    return "".join(pieces)
+
+
+def normalize_text(
+    text: str,
+    language: str = "vi",
+    use_lexicon: bool = True,
+    restore_diacritics: bool = True,
+) -> NormalizationResult:
     """
     Hàm gọi chính — dùng trong Analysis.py
 
@@ -141,6 +366,9 @@ def normalize_text(text: str, language: str = "vi") -> NormalizationResult:
       khớp với CHUỖI GỐC mà user gửi.
     - Chủ yếu dùng để:
         + Gợi ý các lỗi chính tả / cụm sai phổ biến (EN + VI)
+        + Thêm dấu cho đoạn tiếng Việt không dấu (chỉ khi language="vi", có mô hình
+          và restore_diacritics=True; văn bản tiếng Anh không bao giờ bị thêm dấu)
+        + Sửa chính tả theo lexicon local (nếu có và use_lexicon=True)
         + Log lại vị trí để FE có thể highlight nếu muốn.
     """
     if not text:
@@ -164,11 +392,36 @@ def normalize_text(text: str, language: str = "vi") -> NormalizationResult:
 
     basic = _apply_basic_replacements(working, all_replacements)
 
-    # Trả về: original_text là đúng văn bản gốc, normalized_text là bản đã sửa nhẹ
+    diacritic_model = get_diacritic_model() if restore_diacritics and language == "vi" else None
+    lexicon = get_spell_lexicon() if use_lexicon else None
+    if diacritic_model is None and lexicon is None:
+        # Trả về: original_text là đúng văn bản gốc, normalized_text là bản đã sửa nhẹ
+        return NormalizationResult(
+            original_text=original_text,
+            normalized_text=basic.normalized_text,
+            spelling_corrections=basic.spelling_corrections,
+            term_mappings=basic.term_mappings,
+            mappings=basic.mappings,
+        )
+
+    # Mỗi bước sau chỉ xét phần văn bản chưa bị bước trước sửa → các span không chồng lấn
+    extra: List[Dict[str, Any]] = []
+    taken = [(r["start_pos"], r["end_pos"]) for r in basic.mappings]
+    if diacritic_model is not None:
+        extra.extend(find_restorations(working, diacritic_model, taken))
+        taken = sorted(taken + [(r["start_pos"], r["end_pos"]) for r in extra])
+    if lexicon is not None:
+        extra.extend(_apply_lexicon_corrections(working, lexicon, taken))
+
+    mappings = sorted(basic.mappings + extra, key=lambda r: r["start_pos"])
+
     return NormalizationResult(
         original_text=original_text,
-        normalized_text=basic.normalized_text,
-        spelling_corrections=basic.spelling_corrections,
+        normalized_text=_render(working, mappings),
+        spelling_corrections=sorted(
+            basic.spelling_corrections + extra, key=lambda r: r["start_pos"]
+        ),
+        # Sửa dấu / sửa theo lexicon là lỗi chính tả thuần, không phải ánh xạ thuật ngữ
         term_mappings=basic.term_mappings,
-        mappings=basic.mappings,
+        mappings=mappings,
     )
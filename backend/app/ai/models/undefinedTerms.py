@@ -28,20 +28,29 @@ Subtask 2: Undefined Terms (Thuật ngữ chưa định nghĩa)
         "is_defined": false
     }
     ]
+
+- Engine:
+    "local" : chỉ dùng bộ luật trong term_detector.py (vài ms, không gọi LLM)
+    "hybrid": bộ luật local + Gemini chỉ xác nhận các thuật ngữ "ambiguous"
+    "llm"   : gửi toàn bộ văn bản cho Gemini như trước (mặc định)
 """
 
 import google.generativeai as genai
 import json
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 from dotenv import load_dotenv
 
+from app.utils.helpers import parse_llm_json
+
 # Import from same directory
 try:
-    from .promptStore import prompt_undefined_terms
+    from .promptStore import prompt_confirm_undefined_terms, prompt_undefined_terms
+    from .term_detector import ENGINE_NAME as LOCAL_ENGINE_NAME, check_undefined_terms_local
 except ImportError:
-    from promptStore import prompt_undefined_terms
+    from promptStore import prompt_confirm_undefined_terms, prompt_undefined_terms
+    from term_detector import ENGINE_NAME as LOCAL_ENGINE_NAME, check_undefined_terms_local
 
 # Load environment variables
 load_dotenv()
@@ -55,7 +64,12 @@ if not GEMINI_API_KEY_UNDEFINED_TERMS:
 genai.configure(api_key=GEMINI_API_KEY_UNDEFINED_TERMS)
 
 
-def check_undefined_terms(context: Dict[str, Any], content: str) -> Dict[str, Any]:
+def check_undefined_terms(
+    context: Dict[str, Any],
+    content: str,
+    engine: str = "llm",
+    known_terms: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
     """
     Phân tích văn bản để tìm các thuật ngữ chưa được định nghĩa
     
@@ -66,6 +80,9 @@ def check_undefined_terms(context: Dict[str, Any], content: str) -> Dict[str, An
             - criteria: Danh sách tiêu chí
             - constraints: Các ràng buộc
         content: Nội dung văn bản cần phân tích
+        engine: "local" | "hybrid" | "llm" (xem docstring của module)
+        known_terms: Glossary của user (GlossaryService.known_terms); các thuật ngữ này
+            được coi là đã định nghĩa, chỉ gửi cho LLM dưới dạng context rút gọn
         
     Returns:
         Dict[str, Any]: Kết quả phân tích
@@ -100,6 +117,10 @@ def check_undefined_terms(context: Dict[str, Any], content: str) -> Dict[str, An
             }
         }
     """
+    if engine == "local":
+        return check_undefined_terms_local(context, content, known_terms)
+    if engine == "hybrid":
+        return _check_undefined_terms_hybrid(context, content, known_terms)
     
     result = {
         "success": False,
@@ -127,7 +148,7 @@ def check_undefined_terms(context: Dict[str, Any], content: str) -> Dict[str, An
             return result
         
         # Generate prompt using promptStore function
-        prompt = prompt_undefined_terms(context, content)
+        prompt = prompt_undefined_terms(context, content, known_terms)
         
         # Initialize Gemini model
         model = genai.GenerativeModel(GEMINI_MODEL)
@@ -174,4 +195,58 @@ def check_undefined_terms(context: Dict[str, Any], content: str) -> Dict[str, An
         result["metadata"]["error"] = f"Error during analysis: {str(e)}"
         print(f"Error: {e}")
     
-    return result
\ No newline at end of file
+    return result
+
+def _check_undefined_terms_hybrid(
+    context: Dict[str, Any],
+    content: str,
+    known_terms: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Chạy bộ luật local, chỉ gửi các thuật ngữ "ambiguous" cho Gemini xác nhận.
+    Nếu Gemini lỗi → giữ nguyên kết quả local.
+    """
+    result = check_undefined_terms_local(context, content, known_terms)
+    if not result["success"]:
+        return result
+    
+    ambiguous = [
+        t for t in result["undefined_terms"] + result["defined_terms"] if t.get("ambiguous")
+    ]
+    if not ambiguous:
+        return result
+    
+    try:
+        prompt = prompt_confirm_undefined_terms(context or {}, ambiguous)
+        model = genai.GenerativeModel(GEMINI_MODEL)
+        response = model.generate_content(prompt)
+        confirmations = {
+            str(c.get("term", "")).lower(): c
+            for c in parse_llm_json(response.text).get("confirmations", [])
+            if isinstance(c, dict)
+        }
+    except Exception as e:
+        result["metadata"]["error"] = f"LLM confirmation skipped: {str(e)}"
+        print(f"Error: {e}")
+        return result
+    
+    undefined_terms, defined_terms = [], []
+    for item in result["undefined_terms"] + result["defined_terms"]:
+        confirmation = confirmations.get(item["term"].lower()) if item.get("ambiguous") else None
+        if confirmation is not None:
+            if not confirmation.get("is_term", True):
+                continue
+            item = {**item, "ambiguous": False, "is_defined": bool(confirmation.get("is_defined"))}
+            if item["is_defined"]:
+                item["definition_found"] = confirmation.get("definition_found") or item.get("definition_found")
+                item.pop("reason", None)
+            else:
+                item["reason"] = confirmation.get("reason") or item.get("reason")
+        (defined_terms if item["is_defined"] else undefined_terms).append(item)
+    
+    result["undefined_terms"] = undefined_terms
+    result["defined_terms"] = defined_terms
+    result["total_undefined"] = len(undefined_terms)
+    result["total_terms_found"] = len(undefined_terms) + len(defined_terms)
+    result["metadata"]["model"] = f"{LOCAL_ENGINE_NAME}+{GEMINI_MODEL}"
+    return result
@@ -27,6 +27,11 @@ Context (ngữ cảnh)
         "suggestion": "Add source, data, or example to support this claim."
     }
     ]
+
+- Engine:
+    "local" : classifier local trong claim_classifier.py (dưới 1 giây, không gọi LLM)
+    "hybrid": classifier local + Gemini chỉ xác nhận các claim "borderline"
+    "llm"   : gửi toàn bộ văn bản cho Gemini như trước (mặc định)
 """
 
 import google.generativeai as genai
@@ -36,11 +41,15 @@ from typing import Dict, Any, List
 from datetime import datetime
 from dotenv import load_dotenv
 
+from app.utils.helpers import parse_llm_json
+
 # Import from same directory
 try:
-    from .promptStore import prompt_unsupported_claims
+    from .promptStore import prompt_confirm_unsupported_claims, prompt_unsupported_claims
+    from .claim_classifier import ENGINE_NAME as LOCAL_ENGINE_NAME, check_unsupported_claims_local
 except ImportError:
-    from promptStore import prompt_unsupported_claims
+    from promptStore import prompt_confirm_unsupported_claims, prompt_unsupported_claims
+    from claim_classifier import ENGINE_NAME as LOCAL_ENGINE_NAME, check_unsupported_claims_local
 
 # Load environment variables
 load_dotenv()
@@ -54,7 +63,7 @@ if not GEMINI_API_KEY_UNSUPPORTED_CLAIMS:
 genai.configure(api_key=GEMINI_API_KEY_UNSUPPORTED_CLAIMS)
 
 
-def check_unsupported_claims(context: Dict[str, Any], content: str) -> Dict[str, Any]:
+def check_unsupported_claims(context: Dict[str, Any], content: str, engine: str = "llm") -> Dict[str, Any]:
     """
     Phân tích văn bản để tìm các luận điểm thiếu chứng cứ
     
@@ -65,6 +74,7 @@ def check_unsupported_claims(context: Dict[str, Any], content: str) -> Dict[str,
             - criteria: Danh sách tiêu chí
             - constraints: Các ràng buộc
         content: Nội dung văn bản cần phân tích
+        engine: "local" | "hybrid" | "llm" (xem docstring của module)
         
     Returns:
         Dict[str, Any]: Kết quả phân tích
@@ -100,6 +110,10 @@ def check_unsupported_claims(context: Dict[str, Any], content: str) -> Dict[str,
             }
         }
     """
+    if engine == "local":
+        return check_unsupported_claims_local(context, content)
+    if engine == "hybrid":
+        return _check_unsupported_claims_hybrid(context, content)
     
     result = {
         "success": False,
@@ -175,3 +189,54 @@ def check_unsupported_claims(context: Dict[str, Any], content: str) -> Dict[str,
         print(f"Error: {e}")
     
     return result
+
+
+def _check_unsupported_claims_hybrid(context: Dict[str, Any], content: str) -> Dict[str, Any]:
+    """
+    Chạy classifier local, chỉ gửi các claim "borderline" cho Gemini xác nhận.
+    Nếu Gemini lỗi → giữ nguyên kết quả local.
+    """
+    result = check_unsupported_claims_local(context, content)
+    if not result["success"]:
+        return result
+    
+    borderline = [
+        c for c in result["unsupported_claims"] + result["supported_claims"] if c.get("borderline")
+    ]
+    if not borderline:
+        return result
+    
+    try:
+        prompt = prompt_confirm_unsupported_claims(context or {}, borderline)
+        model = genai.GenerativeModel(GEMINI_MODEL)
+        response = model.generate_content(prompt)
+        confirmations = {
+            str(c.get("claim", "")).strip(): c
+            for c in parse_llm_json(response.text).get("confirmations", [])
+            if isinstance(c, dict)
+        }
+    except Exception as e:
+        result["metadata"]["error"] = f"LLM confirmation skipped: {str(e)}"
+        print(f"Error: {e}")
+        return result
+    
+    unsupported_claims, supported_claims = [], []
+    for item in result["unsupported_claims"] + result["supported_claims"]:
+        confirmation = confirmations.get(item["claim"].strip()) if item.get("borderline") else None
+        if confirmation is not None:
+            if not confirmation.get("is_claim", True):
+                continue
+            status = "supported" if confirmation.get("status") == "supported" else "unsupported"
+            item = {**item, "status": status, "borderline": False}
+            if confirmation.get("reason"):
+                item["reason"] = confirmation["reason"]
+            if status == "supported" and confirmation.get("evidence"):
+                item["evidence"] = confirmation["evidence"]
+        (supported_claims if item["status"] == "supported" else unsupported_claims).append(item)
+    
+    result["unsupported_claims"] = unsupported_claims
+    result["supported_claims"] = supported_claims
+    result["total_unsupported"] = len(unsupported_claims)
+    result["total_claims_found"] = len(unsupported_claims) + len(supported_claims)
+    result["metadata"]["model"] = f"{LOCAL_ENGINE_NAME}+{GEMINI_MODEL}"
+    return result
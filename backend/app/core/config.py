@@ -1,5 +1,27 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Any, Dict
+
+
+# Giá trị mặc định theo DB_PROFILE; đặt biến DB_* riêng lẻ để ghi đè từng giá trị
+DB_PROFILES: Dict[str, Dict[str, Any]] = {
+    "development": {
+        "echo": True,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_recycle_seconds": -1,
+        "statement_timeout_ms": 0,
+        "lock_timeout_ms": 0,
+    },
+    "production": {
+        "echo": False,
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_recycle_seconds": 1800,
+        "statement_timeout_ms": 30000,
+        "lock_timeout_ms": 5000,
+    },
+}
 
 
 class Settings(BaseSettings):
@@ -7,6 +29,21 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    # "development" (log mọi câu SQL, không timeout) hoặc "production" (xem DB_PROFILES)
+    DB_PROFILE: str = "development"
+    DB_ECHO: bool | None = None
+    # Mỗi engine (sync + async) có pool riêng: tổng kết nối/worker = 2 * (POOL_SIZE + MAX_OVERFLOW)
+    DB_POOL_SIZE: int | None = None
+    DB_MAX_OVERFLOW: int | None = None
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int | None = None
+    # 0 = không giới hạn
+    DB_STATEMENT_TIMEOUT_MS: int | None = None
+    DB_LOCK_TIMEOUT_MS: int | None = None
+    # Đi qua PgBouncer (transaction pooling): tắt prepared statement cache, timeout đặt theo transaction
+    DB_PGBOUNCER: bool = False
+    # Câu SQL chậm hơn ngưỡng này được log và đếm trong /metrics
+    DB_SLOW_QUERY_MS: int = 500
     
     # Security
     SECRET_KEY: str
@@ -22,6 +59,49 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: str
     GEMINI_MODEL: str = "gemini-2.5-flash"  # có thể đổi sang phiên bản pro nếu cần chất lượng cao hơn
     
+    # Local models - preload + warmup lúc khởi động (tắt mặc định để bản Gemini-only nhẹ RAM)
+    PRELOAD_MODELS: bool = False
+    # Comma-separated NLI modes to preload: "base", "finetuned"
+    PRELOAD_NLI_MODES: str = "finetuned"
+    PRELOAD_EMBEDDING_MODEL: str | None = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    WARMUP_BATCH_SIZE: int = 8
+    WARMUP_MAX_LENGTH: int = 128
+    
+    # Canvas HTML parser: "bs4" (chuẩn) hoặc "selectolax" (C/lexbor, nhanh; chỉ giống hệt bs4 với HTML
+    # hợp lệ của TipTap, HTML lỗi thì được chuẩn hóa theo HTML5). Thiếu selectolax thì tự fallback bs4
+    HTML_PARSER_BACKEND: str = "bs4"
+    
+    # Autosave buffer: gộp các lần lưu liên tục, ghi DB sau khi ngừng gõ N giây (0 = ghi ngay)
+    AUTOSAVE_DEBOUNCE_SECONDS: float = 2.0
+    # Đang gõ liên tục thì vẫn ghi ít nhất mỗi N giây
+    AUTOSAVE_MAX_DELAY_SECONDS: float = 10.0
+    
+    # Structural sync (section/paragraph/sentence): "inline" trong request hoặc "background" (worker thread)
+    STRUCTURE_SYNC_MODE: str = "inline"
+    
+    @property
+    def db_options(self) -> Dict[str, Any]:
+        """DB_PROFILE defaults with every DB_* override that is set applied on top"""
+        profile = self.DB_PROFILE.lower()
+        if profile not in DB_PROFILES:
+            raise ValueError(f"Unknown DB_PROFILE '{profile}'. Use one of: {', '.join(DB_PROFILES)}")
+        options = dict(DB_PROFILES[profile])
+        overrides = {
+            "echo": self.DB_ECHO,
+            "pool_size": self.DB_POOL_SIZE,
+            "max_overflow": self.DB_MAX_OVERFLOW,
+            "pool_recycle_seconds": self.DB_POOL_RECYCLE_SECONDS,
+            "statement_timeout_ms": self.DB_STATEMENT_TIMEOUT_MS,
+            "lock_timeout_ms": self.DB_LOCK_TIMEOUT_MS,
+        }
+        options.update({key: value for key, value in overrides.items() if value is not None})
+        options.update(
+            pool_timeout_seconds=self.DB_POOL_TIMEOUT_SECONDS,
+            pgbouncer=self.DB_PGBOUNCER,
+            slow_query_ms=self.DB_SLOW_QUERY_MS,
+        )
+        return options
+    
     class Config:
         env_file = ".env"
         extra = "allow"
@@ -1,20 +1,113 @@
-from sqlalchemy import create_engine
+import uuid
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import get_settings
+from app.core.db_metrics import DatabaseMetrics
 
 settings = get_settings()
+db_options = settings.db_options
+
+# Pool checkout wait, checked-out connections và slow query (GET /metrics)
+db_metrics = DatabaseMetrics(slow_query_seconds=db_options["slow_query_ms"] / 1000)
+
+
+def _async_database_url(url: str) -> URL:
+    """Same database through asyncpg (DATABASE_URL stays the psycopg2 URL)."""
+    parsed = make_url(url).set(drivername="postgresql+asyncpg")
+    # asyncpg không hiểu sslmode=..., tham số tương ứng là ssl=...
+    sslmode = parsed.query.get("sslmode")
+    if sslmode is not None:
+        parsed = parsed.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    return parsed
+
+
+def _server_timeouts(options: Dict[str, Any]) -> Dict[str, str]:
+    timeouts = {
+        "statement_timeout": options["statement_timeout_ms"],
+        "lock_timeout": options["lock_timeout_ms"],
+    }
+    return {name: str(int(value)) for name, value in timeouts.items() if value}
+
+
+def _pool_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "echo": options["echo"],
+        "pool_pre_ping": True,
+        "pool_size": options["pool_size"],
+        "max_overflow": options["max_overflow"],
+        "pool_timeout": options["pool_timeout_seconds"],
+        "pool_recycle": options["pool_recycle_seconds"],
+    }
+
+
+def _set_timeouts_per_transaction(engine: Engine, timeouts: Dict[str, str]) -> None:
+    """PgBouncer (transaction pooling) drops session settings: re-apply them with SET LOCAL semantics."""
+    columns = ", ".join(f"set_config('{name}', '{value}', true)" for name, value in timeouts.items())
+
+    @event.listens_for(engine, "begin")
+    def _apply(conn):  # noqa: ANN001
+        conn.exec_driver_sql(f"SELECT {columns}")
 
-# Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=True,  # Set to False in production
-    pool_pre_ping=True,
-)
+
+def _create_sync_engine(options: Dict[str, Any]) -> Engine:
+    timeouts = _server_timeouts(options)
+    connect_args: Dict[str, Any] = {}
+    if timeouts and not options["pgbouncer"]:
+        connect_args["options"] = " ".join(f"-c {name}={value}" for name, value in timeouts.items())
+    sync_engine = create_engine(
+        settings.DATABASE_URL,
+        poolclass=db_metrics.pool_class(QueuePool, "sync"),
+        connect_args=connect_args,
+        **_pool_options(options),
+    )
+    if timeouts and options["pgbouncer"]:
+        _set_timeouts_per_transaction(sync_engine, timeouts)
+    db_metrics.instrument(sync_engine, "sync")
+    return sync_engine
+
+
+def _create_async_engine(options: Dict[str, Any]):
+    timeouts = _server_timeouts(options)
+    connect_args: Dict[str, Any] = {}
+    if options["pgbouncer"]:
+        # Prepared statement của asyncpg không sống qua các transaction của PgBouncer
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid.uuid4()}__",
+        )
+    elif timeouts:
+        connect_args["server_settings"] = timeouts
+    new_engine = create_async_engine(
+        _async_database_url(settings.DATABASE_URL),
+        poolclass=db_metrics.pool_class(AsyncAdaptedQueuePool, "async"),
+        connect_args=connect_args,
+        **_pool_options(options),
+    )
+    if timeouts and options["pgbouncer"]:
+        _set_timeouts_per_transaction(new_engine.sync_engine, timeouts)
+    db_metrics.instrument(new_engine.sync_engine, "async")
+    return new_engine
+
+
+# Create database engine (echo, pool and timeouts come from DB_PROFILE, see config.py)
+engine = _create_sync_engine(db_options)
+
+# Async engine cho các router async (asyncpg, chạy chung event loop với LLM calls)
+async_engine = _create_async_engine(db_options)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Objects stay usable after commit: lazy refresh is not possible in async code
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
@@ -26,3 +119,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Sequence, Tuple, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+# Bucket (giây) cho thời gian chờ lấy connection và thời gian chạy câu SQL
+CHECKOUT_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+# Câu SQL chậm chỉ log tối đa bấy nhiêu ký tự
+SLOW_QUERY_LOG_CHARS = 300
+
+
+class _Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense (not thread-safe on its own)."""
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * len(self.bounds)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        buckets, running = [], 0
+        for bound, count in zip(self.bounds, self.counts):
+            running += count
+            buckets.append((repr(bound), running))
+        buckets.append(("+Inf", self.count))
+        return buckets
+
+
+class _EngineStats:
+    __slots__ = ("engine", "checkout_wait", "checkout_timeouts", "queries", "slow_queries")
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.checkout_wait = _Histogram(CHECKOUT_WAIT_BUCKETS)
+        self.checkout_timeouts = 0
+        self.queries = _Histogram(QUERY_BUCKETS)
+        self.slow_queries = 0
+
+
+class DatabaseMetrics:
+    """Pool and query metrics for the sync and async engines.
+
+    ``pool_class`` returns a pool subclass that times every checkout (queue
+    wait plus opening a new connection when the pool may overflow) and counts
+    checkouts that hit ``pool_timeout``. ``instrument`` hooks cursor events to
+    time statements and log the ones slower than ``slow_query_seconds``.
+    Gauges (checked-out connections, pool size, overflow) are read from the
+    pools when rendered, so they cost nothing per request.
+    """
+
+    def __init__(self, slow_query_seconds: float = 0.5) -> None:
+        self.slow_query_seconds = slow_query_seconds
+        self._lock = threading.Lock()
+        self._engines: Dict[str, _EngineStats] = {}
+
+    # ------------------------------------------------------------------
+    # Wiring
+    # ------------------------------------------------------------------
+    def pool_class(self, base: Type[Pool], label: str) -> Type[Pool]:
+        metrics = self
+
+        class InstrumentedPool(base):  # type: ignore[misc, valid-type]
+            def _do_get(self):  # noqa: ANN202 - SQLAlchemy pool internals
+                start = time.perf_counter()
+                try:
+                    return super()._do_get()
+                except exc.TimeoutError:
+                    metrics._record_timeout(label)
+                    raise
+                finally:
+                    metrics._observe(label, "checkout_wait", time.perf_counter() - start)
+
+        InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+        InstrumentedPool.__qualname__ = InstrumentedPool.__name__
+        return InstrumentedPool
+
+    def instrument(self, engine: Engine, label: str) -> None:
+        """Register ``engine`` (the ``sync_engine`` of an AsyncEngine) under ``label``."""
+        with self._lock:
+            self._engines[label] = _EngineStats(engine)
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _start(conn, cursor, statement, parameters, context, executemany):  # noqa: ANN001
+            if context is not None:
+                context._lg_started = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _stop(conn, cursor, statement, parameters, context, executemany):  # noqa: ANN001
+            self._finish(label, statement, context)
+
+        @event.listens_for(engine, "handle_error")
+        def _failed(exception_context):  # noqa: ANN001
+            # Statements cancelled by statement_timeout only end up here
+            if exception_context.statement is not None:
+                self._finish(label, exception_context.statement, exception_context.execution_context)
+
+    def _finish(self, label: str, statement: str, context: Any) -> None:
+        started = getattr(context, "_lg_started", None)
+        if started is None:
+            return
+        context._lg_started = None
+        elapsed = time.perf_counter() - started
+        self._observe(label, "queries", elapsed)
+        if self.slow_query_seconds > 0 and elapsed >= self.slow_query_seconds:
+            with self._lock:
+                self._engines[label].slow_queries += 1
+            sql = " ".join(statement.split())[:SLOW_QUERY_LOG_CHARS]
+            print(f"🐢 Slow query ({label}, {elapsed * 1000:.0f} ms): {sql}")
+
+    def _observe(self, label: str, histogram: str, value: float) -> None:
+        with self._lock:
+            stats = self._engines.get(label)
+            if stats is not None:
+                getattr(stats, histogram).observe(value)
+
+    def _record_timeout(self, label: str) -> None:
+        with self._lock:
+            stats = self._engines.get(label)
+            if stats is not None:
+                stats.checkout_timeouts += 1
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _pool_gauges(pool: Pool) -> Dict[str, int]:
+        gauges = {}
+        for name in ("checkedout", "size", "overflow"):
+            reader = getattr(pool, name, None)
+            if callable(reader):
+                gauges[name] = reader()
+        return gauges
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                label: {
+                    **self._pool_gauges(stats.engine.pool),
+                    "checkout_wait_count": stats.checkout_wait.count,
+                    "checkout_wait_seconds_sum": round(stats.checkout_wait.total, 6),
+                    "checkout_wait_seconds_max": round(stats.checkout_wait.max, 6),
+                    "checkout_timeouts": stats.checkout_timeouts,
+                    "queries": stats.queries.count,
+                    "query_seconds_sum": round(stats.queries.total, 6),
+                    "slow_queries": stats.slow_queries,
+                }
+                for label, stats in self._engines.items()
+            }
+
+    def render_prometheus(self, prefix: str = "logicguard_db") -> str:
+        """Metrics in the Prometheus text exposition format (served at GET /metrics)."""
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_text: str) -> str:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            return f"{prefix}_{name}"
+
+        def histogram(name: str, help_text: str, attr: str) -> None:
+            metric = header(name, "histogram", help_text)
+            for label, stats in engines:
+                data: _Histogram = getattr(stats, attr)
+                for bound, count in data.cumulative():
+                    lines.append(f'{metric}_bucket{{engine="{label}",le="{bound}"}} {count}')
+                lines.append(f'{metric}_sum{{engine="{label}"}} {data.total:.6f}')
+                lines.append(f'{metric}_count{{engine="{label}"}} {data.count}')
+
+        with self._lock:
+            engines = list(self._engines.items())
+            gauges = {label: self._pool_gauges(stats.engine.pool) for label, stats in engines}
+
+            for key, name, help_text in (
+                ("checkedout", "pool_checked_out", "Connections currently checked out of the pool"),
+                ("size", "pool_size", "Configured pool size"),
+                ("overflow", "pool_overflow", "Overflow connections in use (negative while the pool is not full)"),
+            ):
+                metric = header(name, "gauge", help_text)
+                for label, _ in engines:
+                    if key in gauges[label]:
+                        lines.append(f'{metric}{{engine="{label}"}} {gauges[label][key]}')
+
+            histogram("pool_checkout_wait_seconds", "Time to obtain a connection from the pool", "checkout_wait")
+            metric = header("pool_checkout_timeouts_total", "counter", "Checkouts that gave up after pool_timeout")
+            for label, stats in engines:
+                lines.append(f'{metric}{{engine="{label}"}} {stats.checkout_timeouts}')
+
+            histogram("query_duration_seconds", "Statement execution time", "queries")
+            metric = header("slow_queries_total", "counter", "Statements slower than DB_SLOW_QUERY_MS")
+            for label, stats in engines:
+                lines.append(f'{metric}{{engine="{label}"}} {stats.slow_queries}')
+
+        return "\n".join(lines) + "\n"
+
+
+__all__ = ["DatabaseMetrics"]
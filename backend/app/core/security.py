@@ -4,8 +4,10 @@ from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db
 from app.models.user import User
 from app.core.config import get_settings
 
@@ -55,28 +57,47 @@ def decode_access_token(token: str) -> dict:
         )
 
 
+def _user_id_from_token(credentials: HTTPAuthorizationCredentials) -> str:
+    payload = decode_access_token(credentials.credentials)
+    user_id: str = payload.get("sub")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user_id
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
     """Get the current authenticated user from the JWT token"""
-    token = credentials.credentials
-    payload = decode_access_token(token)
+    user_id = _user_id_from_token(credentials)
     
-    user_id: str = payload.get("sub")
-    if user_id is None:
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
+            detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    return user
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Same as get_current_user for async routes (the user is loaded in the route's AsyncSession)"""
+    user_id = _user_id_from_token(credentials)
+    user = await db.scalar(select(User).where(User.id == user_id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
     return user
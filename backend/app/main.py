@@ -2,8 +2,9 @@ from contextlib import asynccontextmanager
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from app.core.database import Base, engine
+from app.core.database import Base, async_engine, db_metrics, db_options, engine
 from app.core.config import get_settings
 from app.routers import (
     analysis,
@@ -17,6 +18,9 @@ from app.routers import (
     writing_types,
     ai_functions,  # ✅ THÊM ROUTER AI FUNCTIONS
 )
+from app.services.autosave import get_autosave_buffer
+from app.services.model_warmup import start_model_warmup, warmup_state
+from app.services.structure_sync import get_structure_sync_worker
 
 settings = get_settings()
 
@@ -49,8 +53,25 @@ def get_allowed_origins():
 async def lifespan(app: FastAPI):
     print("📌 Creating tables on startup...")
     print(f"🌐 Allowed CORS origins: {get_allowed_origins()}")
+    print(
+        f"🗄️ DB profile {settings.DB_PROFILE}: pool {db_options['pool_size']}+{db_options['max_overflow']}, "
+        f"statement timeout {db_options['statement_timeout_ms']} ms, pgbouncer={db_options['pgbouncer']}"
+    )
     Base.metadata.create_all(bind=engine)
+    if settings.PRELOAD_MODELS:
+        print(f"🔥 Preloading models (NLI modes: {settings.PRELOAD_NLI_MODES})...")
+        start_model_warmup(settings)
+    structure_sync = get_structure_sync_worker()
+    structure_sync.start()
+    autosave_buffer = get_autosave_buffer()
+    autosave_buffer.start()
     yield
+    flushed = autosave_buffer.stop()
+    print(f"💾 Flushed {flushed} buffered autosaves.")
+    left = structure_sync.stop()
+    if left:
+        print(f"⚠️ {left} structural syncs left for the next startup.")
+    await async_engine.dispose()
     print("🧹 Shutdown complete.")
 
 
@@ -115,6 +136,19 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness probe: 503 until every preloaded model is warm."""
+    state = warmup_state.snapshot()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape target: pool checkout wait/timeouts, checked-out connections, slow queries."""
+    return db_metrics.render_prometheus()
+
+
 # Optional: local dev mode
 if __name__ == "__main__":
     import uvicorn
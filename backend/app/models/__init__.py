@@ -7,6 +7,7 @@ from app.models.document import Document, DocumentSection, Paragraph, Sentence
 from app.models.analysis import AnalysisRun, WritingSession
 from app.models.error import LogicError
 from app.models.feedback import Feedback, UserErrorPattern
+from app.models.glossary import UserGlossaryTerm
 
 __all__ = [
     "User",
@@ -23,4 +24,5 @@ __all__ = [
     "LogicError",
     "Feedback",
     "UserErrorPattern",
+    "UserGlossaryTerm",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Index
+from sqlalchemy import Column, Integer, Text, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY, REAL
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -30,8 +30,12 @@ class Document(Base):
     goal_id = Column(UUID(as_uuid=True), ForeignKey("GOAL.id", ondelete="SET NULL"))
     title = Column(Text, nullable=False, default='Untitled')
     content_full = Column(Text, nullable=False, default='')
+    # ProseMirror JSON from the editor; when set, content_full is rendered from it lazily
+    content_json = Column(JSONB)
     structure_json = Column(JSONB, nullable=False, server_default='{}')
     version = Column(Integer, nullable=False, default=1)
+    # Version whose content the section/paragraph/sentence rows reflect (see StructureSyncWorker)
+    structure_version = Column(Integer, nullable=False, default=0)
     word_count = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -61,7 +65,8 @@ class DocumentSection(Base):
     order_index = Column(Integer, nullable=False, default=0)
 
     __table_args__ = (
-        Index('ix_doc_section_order', 'document_id', 'order_index', unique=True),
+        # Deferrable so sections can be reordered in place within one transaction
+        UniqueConstraint('document_id', 'order_index', name='uq_doc_section_order', deferrable=True, initially='IMMEDIATE'),
     )
 
     # Relationships
@@ -84,7 +89,7 @@ class Paragraph(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     __table_args__ = (
-        Index('ix_paragraph_doc_index', 'document_id', 'p_index', unique=True),
+        UniqueConstraint('document_id', 'p_index', name='uq_paragraph_doc_index', deferrable=True, initially='IMMEDIATE'),
         Index('ix_paragraph_hash', 'hash'),
     )
 
@@ -108,7 +113,7 @@ class Sentence(Base):
     confidence_score = Column(Integer)
 
     __table_args__ = (
-        Index('ix_sentence_para_index', 'paragraph_id', 's_index', unique=True),
+        UniqueConstraint('paragraph_id', 's_index', name='uq_sentence_para_index', deferrable=True, initially='IMMEDIATE'),
         Index('ix_sentence_hash', 'hash'),
     )
 
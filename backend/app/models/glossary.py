@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+import uuid
+from app.core.database import Base
+
+
+class UserGlossaryTerm(Base):
+    __tablename__ = "USER_GLOSSARY_TERM"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("USER.id", ondelete="CASCADE"), nullable=False)
+    term = Column(Text, nullable=False)
+    term_key = Column(Text, nullable=False)  # lowercased term, unique per user
+    definition_text = Column(Text)
+    source_document_id = Column(UUID(as_uuid=True), ForeignKey("DOCUMENT.id", ondelete="SET NULL"))
+    first_defined_at = Column(Text)  # "Paragraph 2, Sentence 1" of the first definition
+    times_seen = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('ix_glossary_user_term', 'user_id', 'term_key', unique=True),
+    )
+
+    # Relationships
+    user = relationship("User", back_populates="glossary_terms")
@@ -19,3 +19,4 @@ class User(Base):
     goals = relationship("Goal", back_populates="user", cascade="all, delete-orphan")
     writing_sessions = relationship("WritingSession", back_populates="user", cascade="all, delete-orphan")
     error_patterns = relationship("UserErrorPattern", back_populates="user", cascade="all, delete-orphan")
+    glossary_terms = relationship("UserGlossaryTerm", back_populates="user", cascade="all, delete-orphan")
@@ -1,31 +1,42 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import UUID
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import get_async_db, get_db
+from app.core.security import get_current_user, get_current_user_async
 from app.models.user import User
 from app.models.document import Document
 from app.models.analysis import AnalysisRun, AnalysisType, AnalysisStatus
-from app.schemas.analysis import AnalysisRunCreate, AnalysisRunResponse
+from app.schemas.analysis import (
+    AnalysisRunCreate,
+    AnalysisRunResponse,
+    ContradictionAnalysisCreate,
+    ContradictionAnalysisResponse,
+    DocumentClaimsResponse,
+)
+from app.services.claim_evidence import ClaimEvidenceService
+from app.services.document_contradictions import DocumentContradictionService
+from app.services.structure_sync import get_structure_sync_worker
 
 router = APIRouter()
 
 
 @router.post("/documents/{document_id}/analyze", response_model=AnalysisRunResponse, status_code=status.HTTP_201_CREATED)
-def analyze_document(
+async def analyze_document(
     document_id: UUID,
     analysis_data: AnalysisRunCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Trigger analysis on a document"""
     # Verify document belongs to user
-    document = db.query(Document).filter(
+    version = await db.scalar(select(Document.version).where(
         Document.id == document_id,
         Document.user_id == current_user.id
-    ).first()
+    ))
     
-    if not document:
+    if version is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
@@ -34,16 +45,77 @@ def analyze_document(
     # Create analysis run
     analysis_run = AnalysisRun(
         document_id=document_id,
-        doc_version=document.version,
+        doc_version=version,
         analysis_type=AnalysisType.FULL,
         trigger_source=analysis_data.trigger_source,
         status=AnalysisStatus.QUEUED
     )
     
     db.add(analysis_run)
-    db.commit()
-    db.refresh(analysis_run)
+    await db.commit()
+    await db.refresh(analysis_run)
     
     # TODO: Queue the actual analysis task (e.g., with Celery or background task)
     
     return analysis_run
+
+
+@router.post(
+    "/documents/{document_id}/contradictions",
+    response_model=ContradictionAnalysisResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def analyze_document_contradictions(
+    document_id: UUID,
+    analysis_data: ContradictionAnalysisCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Run contradiction detection on the document's stored sentences and persist LogicErrors
+
+    Stays a sync route: NLI inference is CPU-bound and must not run on the event loop.
+    """
+    document = db.query(Document).filter(
+        Document.id == document_id,
+        Document.user_id == current_user.id
+    ).first()
+    
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    
+    # Sentences are read from the structure rows: bring them up to date first
+    sync_worker = get_structure_sync_worker()
+    with sync_worker.lock(document.id):
+        if sync_worker.sync_now(db, document):
+            db.commit()
+
+    options = analysis_data.model_dump(exclude={"trigger_source"})
+    return DocumentContradictionService(db).analyze(
+        document,
+        trigger_source=analysis_data.trigger_source,
+        **options
+    )
+
+
+@router.post("/documents/{document_id}/claims", response_model=DocumentClaimsResponse)
+def analyze_document_claims(
+    document_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Label stored sentences as claim/evidence/neutral (saved to Sentence.role) and flag unsupported claims"""
+    document = db.query(Document).filter(
+        Document.id == document_id,
+        Document.user_id == current_user.id
+    ).first()
+    
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    
+    return ClaimEvidenceService(db).label_document(document)
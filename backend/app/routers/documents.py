@@ -1,29 +1,132 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import List
 from uuid import UUID
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import SessionLocal, get_async_db, get_db
+from app.core.security import get_current_user, get_current_user_async
 from app.models.user import User
 from app.models.document import Document, DocumentSection, Paragraph, Sentence
 from app.schemas.document import (
     DocumentCreate, DocumentUpdate, DocumentResponse, DocumentListResponse,
+    DocumentPatch, DocumentPatchResponse, AutosaveResponse,
     SectionResponse, SectionUpdateStatus,
     ParagraphResponse, ParagraphUpdate,
     SentenceResponse
 )
+from app.services.autosave import apply_document_changes, get_autosave_buffer, merge_changes
+from app.services.document_patch import DocumentPatchService, DocumentVersionConflict
 from app.services.document_sync import DocumentCanvasSyncService
+from app.services.prosemirror import render_html
+from app.services.structure_sync import get_structure_sync_worker
 
+# Routes that run the canvas sync pipeline (create, PUT, PATCH paragraphs) stay
+# sync: parsing and diffing are CPU-bound and take per-document thread locks,
+# so they belong on the threadpool. Everything else uses the async session.
 router = APIRouter()
 
 
+async def _ensure_content_full(document: Document, db: AsyncSession) -> None:
+    """Render content_full the first time it is read after a JSON save or a paragraph patch.
+
+    Those saves leave content_full empty; the HTML is produced here once and
+    cached in the row (without bumping updated_at or racing a newer save).
+    """
+    if document.content_full:
+        return
+    structure = None
+    if document.content_json is not None:
+        html = render_html(document.content_json)
+    elif (document.structure_json or {}).get("content_full_stale"):
+        html = await db.run_sync(lambda session: DocumentPatchService(session).render_content_html(document))
+        structure = {k: v for k, v in document.structure_json.items() if k != "content_full_stale"}
+    else:
+        return
+    if html or structure is not None:
+        values = {"content_full": html, "updated_at": Document.updated_at}
+        if structure is not None:
+            # Drop only the flag: the row's structure may have moved on since it was loaded
+            values["structure_json"] = Document.structure_json.op("-")("content_full_stale")
+        await db.execute(
+            update(Document)
+            .where(Document.id == document.id, Document.version == document.version)
+            .values(**values)
+        )
+        await db.commit()
+    set_committed_value(document, "content_full", html)
+    if structure is not None:
+        set_committed_value(document, "structure_json", structure)
+
+
+def _with_pending_autosave(document: Document) -> DocumentResponse | Document:
+    """Overlay edits still waiting in the autosave buffer (read-your-writes)."""
+    pending = get_autosave_buffer().peek(document.id)
+    if not pending:
+        return document
+    overlay = {"pending_autosave": True}
+    if pending.get("title") is not None:
+        overlay["title"] = pending["title"]
+    if pending.get("content_json") is not None:
+        overlay.update(content_json=pending["content_json"], content_full=render_html(pending["content_json"]))
+    elif pending.get("content_full") is not None:
+        overlay.update(content_full=pending["content_full"], content_json=None)
+    if pending.get("goal_id") is not None:
+        overlay["goal_id"] = pending["goal_id"]
+    return DocumentResponse.model_validate(document).model_copy(update=overlay)
+
+
+def _save_document(db: Session, document: Document, changes: dict) -> None:
+    """Write ``changes`` now, together with anything still buffered for the document."""
+    with get_autosave_buffer().claim(document.id) as pending:
+        # A background flush may have committed since the document was loaded
+        db.refresh(document)
+        needs_sync = apply_document_changes(db, document, merge_changes(pending or {}, changes))
+        db.commit()
+    if needs_sync:
+        get_structure_sync_worker().enqueue(document.id)
+
+
+def _save_document_by_id(document_id: UUID, changes: dict) -> int:
+    """``_save_document`` in its own sync session (called from async routes via the threadpool)."""
+    db = SessionLocal()
+    try:
+        document = db.get(Document, document_id)
+        if document is None:
+            # Deleted after the caller looked it up
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found"
+            )
+        _save_document(db, document, changes)
+        return document.version
+    finally:
+        db.close()
+
+
+async def _get_user_document(db: AsyncSession, document_id: UUID, user_id: UUID) -> Document:
+    document = await db.scalar(select(Document).where(
+        Document.id == document_id,
+        Document.user_id == user_id
+    ))
+    
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    return document
+
+
 @router.get("/", response_model=List[DocumentListResponse])
-def list_documents(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def list_documents(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all documents for the current user"""
-    documents = db.query(Document).filter(Document.user_id == current_user.id).all()
+    documents = (await db.scalars(select(Document).where(Document.user_id == current_user.id))).all()
     return documents
 
 
@@ -34,16 +137,23 @@ def create_document(
     db: Session = Depends(get_db)
 ):
     """Create a new document"""
+    content_json = document_data.content_json
     new_document = Document(
         user_id=current_user.id,
         title=document_data.title,
-        content_full=document_data.content_full,
+        # With editor JSON the HTML is rendered lazily on first read
+        content_full=document_data.content_full if content_json is None else "",
+        content_json=content_json,
         goal_id=document_data.goal_id,
     )
     db.add(new_document)
     db.flush()
 
-    DocumentCanvasSyncService(db).sync(new_document, document_data.content_full)
+    # A new document's structure is a handful of inserts: always synced inline
+    DocumentCanvasSyncService(db).sync(
+        new_document, document_data.content_full, is_new=True, content_json=content_json
+    )
+    new_document.structure_version = new_document.version
 
     db.commit()
     db.refresh(new_document)
@@ -51,12 +161,25 @@ def create_document(
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
-def get_document(
+async def get_document(
+    document_id: UUID,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a specific document"""
+    document = await _get_user_document(db, document_id, current_user.id)
+    await _ensure_content_full(document, db)
+    return _with_pending_autosave(document)
+
+
+@router.put("/{document_id}", response_model=DocumentResponse)
+def update_document(
     document_id: UUID,
+    document_data: DocumentUpdate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get a specific document"""
+    """Update a document"""
     document = db.query(Document).filter(
         Document.id == document_id,
         Document.user_id == current_user.id
@@ -68,118 +191,156 @@ def get_document(
             detail="Document not found"
         )
     
+    _save_document(db, document, document_data.model_dump(exclude_none=True))
+    db.refresh(document)
     return document
 
 
-@router.put("/{document_id}", response_model=DocumentResponse)
-def update_document(
+@router.put("/{document_id}/autosave", response_model=AutosaveResponse, status_code=status.HTTP_202_ACCEPTED)
+async def autosave_document(
     document_id: UUID,
     document_data: DocumentUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Update a document"""
-    document = db.query(Document).filter(
+    """Buffer an editor autosave; it is written after a pause in typing, on explicit save or on shutdown"""
+    version = await db.scalar(select(Document.version).where(
         Document.id == document_id,
         Document.user_id == current_user.id
-    ).first()
-    
-    if not document:
+    ))
+
+    if version is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
-    
-    # Update fields
-    if document_data.title is not None:
-        document.title = document_data.title
-    if document_data.content_full is not None:
-        document.content_full = document_data.content_full
-        document.version += 1
-        DocumentCanvasSyncService(db).sync(document, document.content_full)
-    if document_data.goal_id is not None:
-        document.goal_id = document_data.goal_id
-    
-    db.commit()
-    db.refresh(document)
-    return document
 
+    changes = document_data.model_dump(exclude_none=True)
+    buffer = get_autosave_buffer()
+    if not buffer.enabled:
+        version = await run_in_threadpool(_save_document_by_id, document_id, changes)
+        return AutosaveResponse(id=document_id, version=version, pending_edits=0, flushed=True)
 
-@router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_document(
+    pending_edits = buffer.submit(document_id, current_user.id, changes)
+    return AutosaveResponse(id=document_id, version=version, pending_edits=pending_edits)
+
+
+@router.post("/{document_id}/save", response_model=DocumentResponse)
+async def save_document(
     document_id: UUID,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Write buffered autosave edits now (explicit save)"""
+    document = await _get_user_document(db, document_id, current_user.id)
+
+    # The flush writes (and may sync) through the sync pipeline
+    if await run_in_threadpool(get_autosave_buffer().flush, document.id):
+        await db.refresh(document)
+    await _ensure_content_full(document, db)
+    return _with_pending_autosave(document)
+
+
+@router.patch("/{document_id}/paragraphs", response_model=DocumentPatchResponse)
+def patch_document_paragraphs(
+    document_id: UUID,
+    patch: DocumentPatch,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Delete a document"""
+    """Apply paragraph-level operations against base_version (optimistic concurrency)"""
     document = db.query(Document).filter(
         Document.id == document_id,
         Document.user_id == current_user.id
     ).first()
-    
+
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
+
+    # Buffered full-content autosaves land first; the patch must be based on them
+    if get_autosave_buffer().flush(document.id):
+        db.refresh(document)
+
+    sync_worker = get_structure_sync_worker()
+    with sync_worker.lock(document.id):
+        # Operations address paragraph rows, so they must match the stored content
+        sync_worker.sync_now(db, document)
+        try:
+            result = DocumentPatchService(db).apply(
+                document, patch.base_version, [operation.model_dump() for operation in patch.operations]
+            )
+        except DocumentVersionConflict as exc:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "Document was modified; reload and retry", "current_version": exc.current_version}
+            )
+        except ValueError as exc:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=str(exc)
+            )
+
+        response = DocumentPatchResponse(
+            id=document.id, version=document.version, word_count=document.word_count, **result
+        )
+        db.commit()
+    return response
+
+
+@router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_document(
+    document_id: UUID,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delete a document"""
+    document = await _get_user_document(db, document_id, current_user.id)
     
-    db.delete(document)
-    db.commit()
+    get_autosave_buffer().discard(document.id)
+    await db.delete(document)
+    await db.commit()
     return None
 
 
 # Section endpoints
 @router.get("/{document_id}/sections", response_model=List[SectionResponse])
-def list_document_sections(
+async def list_document_sections(
     document_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Retrieve sections and completion state for a document"""
     # Verify document ownership
-    document = db.query(Document).filter(
-        Document.id == document_id,
-        Document.user_id == current_user.id
-    ).first()
-    
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found"
-        )
+    await _get_user_document(db, document_id, current_user.id)
     
-    sections = db.query(DocumentSection).filter(
+    sections = (await db.scalars(select(DocumentSection).where(
         DocumentSection.document_id == document_id
-    ).order_by(DocumentSection.order_index).all()
+    ).order_by(DocumentSection.order_index))).all()
     
     return sections
 
 
 @router.put("/{document_id}/sections/{section_id}", response_model=SectionResponse)
-def update_section_status(
+async def update_section_status(
     document_id: UUID,
     section_id: UUID,
     section_data: SectionUpdateStatus,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark section as complete/incomplete"""
     # Verify document ownership
-    document = db.query(Document).filter(
-        Document.id == document_id,
-        Document.user_id == current_user.id
-    ).first()
-    
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found"
-        )
+    await _get_user_document(db, document_id, current_user.id)
     
-    section = db.query(DocumentSection).filter(
+    section = await db.scalar(select(DocumentSection).where(
         DocumentSection.id == section_id,
         DocumentSection.document_id == document_id
-    ).first()
+    ))
     
     if not section:
         raise HTTPException(
@@ -188,50 +349,41 @@ def update_section_status(
         )
     
     section.is_complete = section_data.is_complete
-    db.commit()
-    db.refresh(section)
+    await db.commit()
+    await db.refresh(section)
     return section
 
 
 # Paragraph endpoints
 @router.get("/{document_id}/paragraphs", response_model=List[ParagraphResponse])
-def get_document_paragraphs(
+async def get_document_paragraphs(
     document_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Retrieve structured paragraphs with text and roles"""
     # Verify document ownership
-    document = db.query(Document).filter(
-        Document.id == document_id,
-        Document.user_id == current_user.id
-    ).first()
-    
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found"
-        )
+    await _get_user_document(db, document_id, current_user.id)
     
-    paragraphs = db.query(Paragraph).filter(
+    paragraphs = (await db.scalars(select(Paragraph).where(
         Paragraph.document_id == document_id
-    ).order_by(Paragraph.p_index).all()
+    ).order_by(Paragraph.p_index))).all()
     
     return paragraphs
 
 
 @router.put("/paragraphs/{paragraph_id}", response_model=ParagraphResponse)
-def update_paragraph(
+async def update_paragraph(
     paragraph_id: UUID,
     paragraph_data: ParagraphUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update paragraph text, embedding, or structure"""
-    paragraph = db.query(Paragraph).join(Document).filter(
+    paragraph = await db.scalar(select(Paragraph).join(Document).where(
         Paragraph.id == paragraph_id,
         Document.user_id == current_user.id
-    ).first()
+    ))
     
     if not paragraph:
         raise HTTPException(
@@ -248,24 +400,24 @@ def update_paragraph(
     if paragraph_data.emb is not None:
         paragraph.emb = paragraph_data.emb
     
-    db.commit()
-    db.refresh(paragraph)
+    await db.commit()
+    await db.refresh(paragraph)
     return paragraph
 
 
 # Sentence endpoints
 @router.get("/paragraphs/{paragraph_id}/sentences", response_model=List[SentenceResponse])
-def get_paragraph_sentences(
+async def get_paragraph_sentences(
     paragraph_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Fetch sentences for paragraph-level analysis"""
     # Verify paragraph ownership through document
-    paragraph = db.query(Paragraph).join(Document).filter(
+    paragraph = await db.scalar(select(Paragraph.id).join(Document).where(
         Paragraph.id == paragraph_id,
         Document.user_id == current_user.id
-    ).first()
+    ))
     
     if not paragraph:
         raise HTTPException(
@@ -273,8 +425,8 @@ def get_paragraph_sentences(
             detail="Paragraph not found"
         )
     
-    sentences = db.query(Sentence).filter(
+    sentences = (await db.scalars(select(Sentence).where(
         Sentence.paragraph_id == paragraph_id
-    ).order_by(Sentence.s_index).all()
+    ).order_by(Sentence.s_index))).all()
     
     return sentences
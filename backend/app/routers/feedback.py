@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import get_async_db
+from app.core.security import get_current_user_async
 from app.models.user import User
 from app.models.document import Document
 from app.models.error import LogicError
@@ -15,17 +16,17 @@ router = APIRouter()
 
 
 @router.get("/documents/{document_id}/errors", response_model=List[LogicErrorResponse])
-def get_document_errors(
+async def get_document_errors(
     document_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all logic errors for a document"""
     # Verify document belongs to user
-    document = db.query(Document).filter(
+    document = await db.scalar(select(Document.id).where(
         Document.id == document_id,
         Document.user_id == current_user.id
-    ).first()
+    ))
     
     if not document:
         raise HTTPException(
@@ -33,22 +34,22 @@ def get_document_errors(
             detail="Document not found"
         )
     
-    errors = db.query(LogicError).filter(
+    errors = (await db.scalars(select(LogicError).where(
         LogicError.document_id == document_id,
         LogicError.is_resolved == False
-    ).all()
+    ))).all()
     
     return errors
 
 
 @router.get("/errors/{error_id}/feedback", response_model=List[FeedbackResponse])
-def get_error_feedback(
+async def get_error_feedback(
     error_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get feedback for a specific error"""
-    error = db.query(LogicError).filter(LogicError.id == error_id).first()
+    error = await db.get(LogicError, error_id)
     
     if not error:
         raise HTTPException(
@@ -57,10 +58,10 @@ def get_error_feedback(
         )
     
     # Verify the error belongs to a document owned by the user
-    document = db.query(Document).filter(
+    document = await db.scalar(select(Document.id).where(
         Document.id == error.document_id,
         Document.user_id == current_user.id
-    ).first()
+    ))
     
     if not document:
         raise HTTPException(
@@ -68,5 +69,5 @@ def get_error_feedback(
             detail="Access denied"
         )
     
-    feedback = db.query(Feedback).filter(Feedback.logic_error_id == error_id).all()
+    feedback = (await db.scalars(select(Feedback).where(Feedback.logic_error_id == error_id))).all()
     return feedback
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from uuid import UUID
 import re
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import get_async_db
+from app.core.security import get_current_user_async
 from app.models.user import User
 from app.models.goal import Goal, RubricCriterion, WritingType
 from app.schemas.goal import GoalCreate, GoalResponse, GoalDetailResponse, GoalUpdate
@@ -68,8 +70,8 @@ def _build_extracted_payload(rubrics: List[str], writing_type_name: Optional[str
     }
 
 
-def _replace_goal_criteria(db: Session, goal: Goal, rubric_items: List[str]):
-    db.query(RubricCriterion).filter(RubricCriterion.goal_id == goal.id).delete()
+async def _replace_goal_criteria(db: AsyncSession, goal: Goal, rubric_items: List[str]):
+    await db.execute(delete(RubricCriterion).where(RubricCriterion.goal_id == goal.id))
     for idx, label in enumerate(rubric_items):
         db.add(
             RubricCriterion(
@@ -83,31 +85,31 @@ def _replace_goal_criteria(db: Session, goal: Goal, rubric_items: List[str]):
         )
 
 
-def _resolve_writing_type_name(db: Session, writing_type_id: Optional[UUID], custom_name: Optional[str]) -> Optional[str]:
+async def _resolve_writing_type_name(db: AsyncSession, writing_type_id: Optional[UUID], custom_name: Optional[str]) -> Optional[str]:
     if writing_type_id:
-        writing_type = db.query(WritingType).filter(WritingType.id == writing_type_id).first()
+        writing_type = await db.get(WritingType, writing_type_id)
         if writing_type:
             return writing_type.display_name
     return custom_name
 
 
 @router.get("/", response_model=List[GoalResponse])
-def get_user_goals(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_user_goals(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all goals created by the user"""
-    goals = db.query(Goal).filter(
+    goals = (await db.scalars(select(Goal).where(
         Goal.user_id == current_user.id
-    ).order_by(Goal.created_at.desc()).all()
+    ).order_by(Goal.created_at.desc()))).all()
     return goals
 
 
 @router.post("/", response_model=GoalDetailResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_goal(
     goal_data: GoalCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new goal without relying on external LLM services."""
     rubric_items = _determine_rubrics(goal_data.rubric_text, goal_data.selected_rubrics)
@@ -117,7 +119,7 @@ async def create_new_goal(
             detail="Either rubric_text or selected_rubrics must be provided"
         )
 
-    writing_type_name = _resolve_writing_type_name(db, goal_data.writing_type_id, goal_data.writing_type_custom)
+    writing_type_name = await _resolve_writing_type_name(db, goal_data.writing_type_id, goal_data.writing_type_custom)
     rubric_text = _build_rubric_text(rubric_items, goal_data.rubric_text)
     extracted_payload = _build_extracted_payload(rubric_items, writing_type_name)
 
@@ -130,27 +132,27 @@ async def create_new_goal(
         extracted_criteria=extracted_payload
     )
     db.add(new_goal)
-    db.flush()
+    await db.flush()
 
-    _replace_goal_criteria(db, new_goal, rubric_items)
-    db.commit()
-    db.refresh(new_goal)
+    await _replace_goal_criteria(db, new_goal, rubric_items)
+    await db.commit()
+    await db.refresh(new_goal, ["created_at", "criteria"])
     return new_goal
 
 
 @router.get("/{goal_id}", response_model=GoalDetailResponse)
-def get_goal_detail(
+async def get_goal_detail(
     goal_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Retrieve goal details including extracted criteria and rubric structure
     """
-    goal = db.query(Goal).filter(
+    goal = await db.scalar(select(Goal).options(selectinload(Goal.criteria)).where(
         Goal.id == goal_id,
         Goal.user_id == current_user.id
-    ).first()
+    ))
     
     if not goal:
         raise HTTPException(
@@ -162,16 +164,16 @@ def get_goal_detail(
 
 
 @router.put("/{goal_id}", response_model=GoalDetailResponse)
-def update_goal(
+async def update_goal(
     goal_id: UUID,
     goal_data: GoalUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    goal = db.query(Goal).filter(
+    goal = await db.scalar(select(Goal).where(
         Goal.id == goal_id,
         Goal.user_id == current_user.id
-    ).first()
+    ))
 
     if not goal:
         raise HTTPException(
@@ -194,28 +196,28 @@ def update_goal(
     )
     goal.rubric_text = rubric_text
 
-    writing_type_name = _resolve_writing_type_name(db, goal.writing_type_id, goal.writing_type_custom)
+    writing_type_name = await _resolve_writing_type_name(db, goal.writing_type_id, goal.writing_type_custom)
     goal.extracted_criteria = _build_extracted_payload(rubric_items, writing_type_name)
 
-    _replace_goal_criteria(db, goal, rubric_items)
-    db.commit()
-    db.refresh(goal)
+    await _replace_goal_criteria(db, goal, rubric_items)
+    await db.commit()
+    await db.refresh(goal, ["criteria"])
     return goal
 
 
 @router.delete("/{goal_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_goal(
+async def delete_goal(
     goal_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Remove a goal and all linked rubric criteria
     """
-    goal = db.query(Goal).filter(
+    goal = await db.scalar(select(Goal).where(
         Goal.id == goal_id,
         Goal.user_id == current_user.id
-    ).first()
+    ))
     
     if not goal:
         raise HTTPException(
@@ -224,15 +226,15 @@ def delete_goal(
         )
     
     # Delete the goal (cascades to rubric criteria)
-    db.delete(goal)
-    db.commit()
+    await db.delete(goal)
+    await db.commit()
     return None
 
 @router.post("/preview", response_model=GoalPreviewResponse)
 async def preview_goal_extraction(
     request: GoalPreviewRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Preview criteria based on manual rubric selections only."""
     rubric_items = _determine_rubrics(request.rubric_text, request.selected_rubrics)
@@ -242,7 +244,7 @@ async def preview_goal_extraction(
             detail="Either rubric_text or selected_rubrics must be provided"
         )
 
-    writing_type_name = _resolve_writing_type_name(db, request.writing_type_id, request.writing_type_custom)
+    writing_type_name = await _resolve_writing_type_name(db, request.writing_type_id, request.writing_type_custom)
 
     criteria_previews = [
         CriterionPreview(
@@ -273,7 +275,7 @@ async def preview_goal_extraction(
 @router.post("/validate", response_model=GoalValidationResponse)
 async def validate_criteria(
     request: GoalValidationRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_async)
 ):
     # Simple local validation: ensure each criterion has a label
     invalid_labels = [c for c in request.criteria if not c.get("label")]
@@ -1,18 +1,28 @@
+import json
 from typing import Any, Dict, Optional, List
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
 
+from app.core.database import get_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.schemas.logic_checks import (
     ContradictionCheckRequest,
     ContradictionCheckResponse,
+    ContradictionStreamRequest,
+    CorpusContradictionCheckRequest,
+    CorpusContradictionCheckResponse,
+    LocalUndefinedTermsRequest,
+    LocalUnsupportedClaimsRequest,
     UndefinedTermsRequest,
     UndefinedTermsResponse,  # hiện chưa dùng trực tiếp cho unified, nhưng cứ import sẵn
     UnsupportedClaimsRequest,
     UnsupportedClaimsResponse,
 )
 from app.ai.models.Analysis import analyze_document
+from app.services.glossary import GlossaryService
 
 router = APIRouter(prefix="/logic-checks", tags=["Logic Checks"])
 
@@ -72,6 +82,7 @@ def _build_context_dict(raw_context: Any, fallback_main_goal: str = "") -> Dict[
 def analyze_unified(
     payload: Dict[str, Any],
     current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
     """
     Unified endpoint được FE gọi:
@@ -96,6 +107,7 @@ def analyze_unified(
             content=content,
             language=language,
             mode=mode,
+            known_terms=GlossaryService(db).known_terms(current_user.id),
         )
     except Exception as exc:
         import traceback
@@ -210,10 +222,41 @@ def analyze_unsupported_claims(
     }
 
 
+@router.post("/unsupported-claims/local", response_model=UnsupportedClaimsResponse)
+def analyze_unsupported_claims_local(
+    payload: LocalUnsupportedClaimsRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """Local claim/evidence classification; Gemini only confirms borderline claims in hybrid mode."""
+    context_dict = _build_context_dict(payload.context)
+
+    if payload.engine == "hybrid":
+        # Import lazily: the Gemini module needs its API key at import time
+        from app.ai.models.unsupportedClaims import check_unsupported_claims
+
+        return _wrap_analysis_call(
+            check_unsupported_claims,
+            context_dict,
+            payload.content,
+            engine="hybrid",
+            error_message="Unsupported claims analysis failed",
+        )
+
+    from app.ai.models.claim_classifier import check_unsupported_claims_local
+
+    return _wrap_analysis_call(
+        check_unsupported_claims_local,
+        context_dict,
+        payload.content,
+        error_message="Unsupported claims analysis failed",
+    )
+
+
 @router.post("/undefined-terms")
 def analyze_undefined_terms(
     payload: UndefinedTermsRequest,
     current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
     """
     Unified endpoint:
@@ -245,6 +288,7 @@ def analyze_undefined_terms(
             payload.content,
             language=language,
             mode=analysis_mode,
+            known_terms=GlossaryService(db).known_terms(current_user.id),
         )
     except Exception as exc:
         # Nếu Gemini/phân tích lỗi nặng → log + trả về success=False nhưng vẫn 200
@@ -383,12 +427,57 @@ def analyze_undefined_terms(
     return response
 
 
+@router.post("/undefined-terms/local", response_model=UndefinedTermsResponse)
+def analyze_undefined_terms_local(
+    payload: LocalUndefinedTermsRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Rule-based undefined-term detection; Gemini only confirms ambiguous terms in hybrid mode.
+    Terms already in the user's glossary count as defined, and newly defined terms are added to it.
+    """
+    context_dict = _build_context_dict(payload.context)
+    glossary = GlossaryService(db)
+    known_terms = glossary.known_terms(current_user.id)
+
+    if payload.engine == "hybrid":
+        # Import lazily: the Gemini module needs its API key at import time
+        from app.ai.models.undefinedTerms import check_undefined_terms
+
+        result = _wrap_analysis_call(
+            check_undefined_terms,
+            context_dict,
+            payload.content,
+            engine="hybrid",
+            known_terms=known_terms,
+            error_message="Undefined term analysis failed",
+        )
+    else:
+        from app.ai.models.term_detector import check_undefined_terms_local
+
+        result = _wrap_analysis_call(
+            check_undefined_terms_local,
+            context_dict,
+            payload.content,
+            known_terms=known_terms,
+            error_message="Undefined term analysis failed",
+        )
+
+    if result.get("success"):
+        glossary.record_definitions(current_user.id, result["defined_terms"], payload.document_id)
+    return result
+
+
 @router.post("/contradictions", response_model=ContradictionCheckResponse)
 def analyze_contradictions(
     payload: ContradictionCheckRequest,
     current_user: User = Depends(get_current_user),
 ):
     """Expose contradiction detection to the frontend."""
+    # Import lazily so torch/transformers are only loaded when this endpoint is used
+    from app.ai.models.contradictions import check_contradictions
+
     return _wrap_analysis_call(
         check_contradictions,
         payload.text,
@@ -401,5 +490,70 @@ def analyze_contradictions(
         sim_max=payload.sim_max,
         batch_size=payload.batch_size,
         max_length=payload.max_length,
+        use_fact_rules=payload.use_fact_rules,
+        cascade=payload.cascade,
+        cascade_low=payload.cascade_low,
+        cascade_high=payload.cascade_high,
         error_message="Contradiction analysis failed",
     )
+
+
+@router.post("/contradictions/stream")
+def stream_contradictions(
+    payload: ContradictionStreamRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream contradictions as NDJSON, one event per line, as each NLI batch completes.
+    Pairs are scored in descending similarity order and the search stops once
+    the time / pair / hit budget is exhausted.
+    """
+    from app.ai.models.contradictions import iter_contradictions
+
+    events = iter_contradictions(
+        payload.text,
+        mode=payload.mode,
+        threshold=payload.threshold,
+        use_embeddings_filter=payload.use_embeddings_filter,
+        embedding_model_name=payload.embedding_model_name,
+        top_k=payload.top_k,
+        sim_min=payload.sim_min,
+        sim_max=payload.sim_max,
+        batch_size=payload.batch_size,
+        max_length=payload.max_length,
+        time_budget_s=payload.time_budget_ms / 1000 if payload.time_budget_ms else None,
+        max_pairs=payload.max_pairs,
+        max_hits=payload.max_hits,
+        hit_confidence=payload.hit_confidence,
+        use_fact_rules=payload.use_fact_rules,
+    )
+
+    return StreamingResponse(
+        (json.dumps(event, ensure_ascii=False) + "\n" for event in events),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.post("/contradictions/corpus", response_model=CorpusContradictionCheckResponse)
+def analyze_corpus_contradictions(
+    payload: CorpusContradictionCheckRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Detect contradictions between the text and the user's other documents."""
+    from app.services.corpus_index import CorpusContradictionService
+
+    return _wrap_analysis_call(
+        CorpusContradictionService(db).check,
+        current_user.id,
+        payload.text,
+        exclude_document_id=payload.document_id,
+        mode=payload.mode,
+        threshold=payload.threshold,
+        corpus_top_k=payload.corpus_top_k,
+        sim_min=payload.sim_min,
+        sim_max=payload.sim_max,
+        batch_size=payload.batch_size,
+        max_length=payload.max_length,
+        error_message="Cross-document contradiction analysis failed",
+    )
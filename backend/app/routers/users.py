@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from typing import List
 from datetime import datetime
-from app.core.database import get_db
-from app.core.security import get_current_user, get_password_hash, verify_password
+from app.core.database import get_async_db
+from app.core.security import get_current_user_async, get_password_hash, verify_password
 from app.models.user import User
 from app.models.document import Document
 from app.models.error import LogicError
@@ -12,14 +13,15 @@ from app.models.feedback import UserErrorPattern
 from app.models.analysis import WritingSession
 from app.schemas.user import UserResponse
 from app.schemas.user_extended import UserUpdate, UserProfileResponse, ErrorPatternResponse
+from app.services.glossary import invalidate_glossary
 
 router = APIRouter()
 
 
 @router.get("/me", response_model=UserProfileResponse)
-def get_user_profile(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_user_profile(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get authenticated user's profile and usage statistics.
@@ -32,22 +34,27 @@ def get_user_profile(
     - Active writing time
     """
     # Get document statistics
-    total_documents = db.query(func.count(Document.id)).filter(
-        Document.user_id == current_user.id
-    ).scalar() or 0
-    
-    total_words = db.query(func.sum(Document.word_count)).filter(
-        Document.user_id == current_user.id
-    ).scalar() or 0
+    document_stats = (await db.execute(
+        select(
+            func.count(Document.id).label('total_documents'),
+            func.sum(Document.word_count).label('total_words')
+        ).where(
+            Document.user_id == current_user.id
+        )
+    )).first()
+    total_documents = document_stats.total_documents or 0
+    total_words = document_stats.total_words or 0
     
     # Get error statistics from writing sessions
-    error_stats = db.query(
-        func.sum(WritingSession.errors_introduced).label('errors_found'),
-        func.sum(WritingSession.errors_fixed).label('errors_fixed'),
-        func.sum(WritingSession.active_time_seconds).label('active_time')
-    ).filter(
-        WritingSession.user_id == current_user.id
-    ).first()
+    error_stats = (await db.execute(
+        select(
+            func.sum(WritingSession.errors_introduced).label('errors_found'),
+            func.sum(WritingSession.errors_fixed).label('errors_fixed'),
+            func.sum(WritingSession.active_time_seconds).label('active_time')
+        ).where(
+            WritingSession.user_id == current_user.id
+        )
+    )).first()
     
     errors_found = error_stats.errors_found if error_stats and error_stats.errors_found else 0
     errors_fixed = error_stats.errors_fixed if error_stats and error_stats.errors_fixed else 0
@@ -66,10 +73,10 @@ def get_user_profile(
 
 
 @router.put("/update", response_model=UserResponse)
-def update_user_profile(
+async def update_user_profile(
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update user profile (email and/or password).
@@ -90,10 +97,10 @@ def update_user_profile(
     # Update email
     if user_update.email and user_update.email != current_user.email:
         # Check if email already exists
-        existing_user = db.query(User).filter(
+        existing_user = await db.scalar(select(User.id).where(
             User.email == user_update.email,
             User.id != current_user.id
-        ).first()
+        ))
         
         if existing_user:
             raise HTTPException(
@@ -112,25 +119,26 @@ def update_user_profile(
                 detail="Current password is required to change password"
             )
         
-        if not verify_password(user_update.current_password, current_user.password_hash):
+        # bcrypt is deliberately slow: keep it off the event loop
+        if not await run_in_threadpool(verify_password, user_update.current_password, current_user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Current password is incorrect"
             )
         
         # Update to new password
-        current_user.password_hash = get_password_hash(user_update.password)
+        current_user.password_hash = await run_in_threadpool(get_password_hash, user_update.password)
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
     
     return UserResponse.from_orm(current_user)
 
 
 @router.get("/error-patterns", response_model=List[ErrorPatternResponse])
-def get_user_error_patterns(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_user_error_patterns(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Fetch user's recurring error patterns and statistics.
@@ -143,9 +151,9 @@ def get_user_error_patterns(
     
     Useful for personalized feedback and learning insights.
     """
-    error_patterns = db.query(UserErrorPattern).filter(
+    error_patterns = (await db.scalars(select(UserErrorPattern).where(
         UserErrorPattern.user_id == current_user.id
-    ).order_by(UserErrorPattern.frequency.desc()).all()
+    ).order_by(UserErrorPattern.frequency.desc()))).all()
     
     # Format response with additional computed fields
     results = []
@@ -163,9 +171,9 @@ def get_user_error_patterns(
 
 
 @router.delete("/delete", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user_account(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def delete_user_account(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete user account permanently.
@@ -173,6 +181,8 @@ def delete_user_account(
     ⚠️ WARNING: This action is irreversible!
     All user data including documents, goals, and analysis will be deleted.
     """
-    db.delete(current_user)
-    db.commit()
+    user_id = current_user.id
+    await db.delete(current_user)
+    await db.commit()
+    invalidate_glossary(user_id)
     return None
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
 from datetime import datetime
 from uuid import UUID
 
@@ -19,3 +19,35 @@ class AnalysisRunResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ContradictionAnalysisCreate(BaseModel):
+    trigger_source: str = "manual"
+    mode: Literal["base", "finetuned"] = "finetuned"
+    threshold: float = Field(default=0.75, ge=0.0, le=1.0)
+    top_k: int = Field(default=50, ge=1)
+    sim_min: float = 0.30
+    sim_max: float = 0.98
+    batch_size: int = Field(default=8, ge=1)
+    max_length: int = Field(default=128, ge=16)
+    use_fact_rules: bool = True
+    cascade: bool = False
+
+
+class ContradictionAnalysisResponse(AnalysisRunResponse):
+    stats: Dict[str, Any] = {}
+    error_message: Optional[str] = None
+    finished_at: Optional[datetime] = None
+
+
+class DocumentClaimsResponse(BaseModel):
+    success: bool
+    document_id: UUID
+    doc_version: int
+    total_sentences: int
+    role_counts: Dict[str, int] = {}
+    total_claims_found: int
+    total_unsupported: int
+    unsupported_claims: List[Dict[str, Any]] = []
+    supported_claims: List[Dict[str, Any]] = []
+    metadata: Dict[str, Any] = {}
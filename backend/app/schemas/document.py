@@ -1,20 +1,64 @@
-from pydantic import BaseModel, field_serializer
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, field_serializer, field_validator
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 from uuid import UUID
 
 
+def _validate_prosemirror_doc(value: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if value is not None and (value.get("type") != "doc" or not isinstance(value.get("content", []), list)):
+        raise ValueError('content_json must be a ProseMirror document: {"type": "doc", "content": [...]}')
+    return value
+
+
 class DocumentCreate(BaseModel):
     title: str = "Untitled"
     content_full: str = ""
+    # TipTap editor.getJSON(); takes precedence over content_full when both are sent
+    content_json: Optional[Dict[str, Any]] = None
     goal_id: Optional[UUID] = None
 
+    @field_validator('content_json')
+    def validate_content_json(cls, value):
+        return _validate_prosemirror_doc(value)
+
 
 class DocumentUpdate(BaseModel):
     title: Optional[str] = None
     content_full: Optional[str] = None
+    content_json: Optional[Dict[str, Any]] = None
     goal_id: Optional[UUID] = None
 
+    @field_validator('content_json')
+    def validate_content_json(cls, value):
+        return _validate_prosemirror_doc(value)
+
+
+class ParagraphOperation(BaseModel):
+    op: Literal["insert", "update", "delete", "move"]
+    # Target paragraph (update/delete/move); insert uses p_index as the new position (default: append)
+    paragraph_id: Optional[UUID] = None
+    p_index: Optional[int] = Field(default=None, ge=1)
+    # New content (insert/update): top-level HTML block(s) or one ProseMirror node
+    html: Optional[str] = None
+    node: Optional[Dict[str, Any]] = None
+    # move: 1-based position in the final order
+    to_index: Optional[int] = Field(default=None, ge=1)
+
+
+class DocumentPatch(BaseModel):
+    base_version: int
+    operations: List[ParagraphOperation] = Field(..., max_length=500)
+
+
+class DocumentPatchResponse(BaseModel):
+    id: UUID
+    version: int
+    word_count: int
+    inserted_ids: List[UUID] = []
+    updated_ids: List[UUID] = []
+    deleted_ids: List[UUID] = []
+    moved_ids: List[UUID] = []
+
 
 class DocumentResponse(BaseModel):
     id: UUID
@@ -22,9 +66,14 @@ class DocumentResponse(BaseModel):
     goal_id: Optional[UUID]
     title: str
     content_full: str
+    content_json: Dict[str, Any] | None = None
     version: int
+    # Paragraph/sentence rows reflect this version; lower than version while a background sync is pending
+    structure_version: int = 0
     word_count: int
     structure_json: Dict[str, Any] | None = None
+    # True when title/content include autosaved edits not yet written to the database
+    pending_autosave: bool = False
     created_at: datetime
     updated_at: datetime
 
@@ -32,6 +81,14 @@ class DocumentResponse(BaseModel):
         from_attributes = True
 
 
+class AutosaveResponse(BaseModel):
+    id: UUID
+    # Last version written to the database; the buffered edits become version + 1
+    version: int
+    pending_edits: int
+    flushed: bool = False
+
+
 class DocumentListResponse(BaseModel):
     id: UUID
     title: str
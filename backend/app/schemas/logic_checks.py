@@ -1,4 +1,5 @@
 from typing import Any, Dict, List, Literal, Optional
+from uuid import UUID
 from pydantic import BaseModel, Field
 
 
@@ -20,6 +21,15 @@ class UnsupportedClaimsRequest(ContextPayload):
     )
 
 
+class LocalUnsupportedClaimsRequest(ContextPayload):
+    """Request body for the local claim/evidence classifier."""
+
+    engine: Literal["local", "hybrid"] = Field(
+        default="local",
+        description='"local": classifier only; "hybrid": LLM confirms borderline claims.',
+    )
+
+
 class UndefinedTermsRequest(ContextPayload):
     """Request body for unified logic analysis (undefined terms + others)."""
 
@@ -29,10 +39,23 @@ class UndefinedTermsRequest(ContextPayload):
     )
 
 
+class LocalUndefinedTermsRequest(ContextPayload):
+    """Request body for the rule-based undefined-term detector."""
+
+    engine: Literal["local", "hybrid"] = Field(
+        default="local",
+        description='"local": rules only; "hybrid": LLM confirms ambiguous terms.',
+    )
+    document_id: Optional[UUID] = Field(
+        default=None, description="Document the content belongs to (recorded in the glossary)"
+    )
+
+
 class Metadata(BaseModel):
     analyzed_at: Optional[str] = None
     model: Optional[str] = None
     threshold: Optional[float] = None
+    cascade: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
 
@@ -45,6 +68,7 @@ class UnsupportedClaimItem(BaseModel):
     suggestion: Optional[str] = None
     evidence_type: Optional[str] = None
     evidence: Optional[str] = None
+    borderline: Optional[bool] = None
 
 
 class UnsupportedClaimsResponse(BaseModel):
@@ -65,6 +89,8 @@ class UndefinedTermItem(BaseModel):
     is_defined: Optional[bool] = None
     reason: Optional[str] = None
     definition_found: Optional[str] = None
+    ambiguous: Optional[bool] = None
+    source: Optional[str] = None
 
 
 class UndefinedTermsResponse(BaseModel):
@@ -91,6 +117,28 @@ class ContradictionCheckRequest(BaseModel):
     sim_max: float = 0.98
     batch_size: int = 8
     max_length: int = 128
+    use_fact_rules: bool = True
+    cascade: bool = Field(
+        default=False,
+        description="Score pairs with the distilled student first; re-score only uncertain pairs",
+    )
+    cascade_low: float = Field(default=0.2, ge=0.0, le=1.0)
+    cascade_high: float = Field(default=0.9, ge=0.0, le=1.0)
+
+
+class ContradictionStreamRequest(ContradictionCheckRequest):
+    """Streaming contradiction search with a latency budget."""
+
+    time_budget_ms: Optional[int] = Field(
+        default=None, ge=1, description="Stop after this many milliseconds"
+    )
+    max_pairs: Optional[int] = Field(
+        default=None, ge=1, description="Score at most this many sentence pairs"
+    )
+    max_hits: Optional[int] = Field(
+        default=None, ge=1, description="Stop once this many high-confidence hits are found"
+    )
+    hit_confidence: float = 0.9
 
 
 class ContradictionItem(BaseModel):
@@ -101,6 +149,7 @@ class ContradictionItem(BaseModel):
     sentence2: Optional[str] = None
     confidence: Optional[float] = None
     boosted: Optional[bool] = None
+    rule: Optional[str] = None
 
 
 class ContradictionCheckResponse(BaseModel):
@@ -110,6 +159,59 @@ class ContradictionCheckResponse(BaseModel):
     text: str
     total_sentences: int
     sentences: List[str]
+    sentence_spans: Optional[List[List[int]]] = None
     total_contradictions: int
     contradictions: List[ContradictionItem]
     metadata: Metadata
+
+
+class CorpusContradictionCheckRequest(BaseModel):
+    """Check a text against the user's other documents."""
+
+    text: str = Field(..., min_length=1)
+    document_id: Optional[UUID] = Field(
+        default=None,
+        description="Document being edited; its own sentences are excluded from the corpus",
+    )
+    mode: Literal["base", "finetuned"] = "finetuned"
+    threshold: float = 0.75
+    corpus_top_k: int = Field(default=5, ge=1, le=50)
+    sim_min: float = 0.30
+    sim_max: float = 0.98
+    batch_size: int = 8
+    max_length: int = 128
+
+
+class CorpusSentenceSource(BaseModel):
+    document_id: Optional[str] = None
+    paragraph_id: Optional[str] = None
+    sentence_id: Optional[str] = None
+    p_index: Optional[int] = None
+    s_index: Optional[int] = None
+
+
+class CorpusContradictionItem(BaseModel):
+    id: Optional[int] = None
+    sentence1_index: Optional[int] = None
+    sentence1: Optional[str] = None
+    sentence2: Optional[str] = None
+    confidence: Optional[float] = None
+    boosted: Optional[bool] = None
+    similarity: Optional[float] = None
+    source: Optional[CorpusSentenceSource] = None
+
+
+class CorpusContradictionCheckResponse(BaseModel):
+    success: bool
+    mode: str
+    model_path: Optional[str] = None
+    text: str
+    total_sentences: int
+    sentences: List[str]
+    sentence_spans: Optional[List[List[int]]] = None
+    total_corpus_sentences: int = 0
+    total_pairs_scored: int = 0
+    cached_pairs: int = 0
+    total_contradictions: int
+    contradictions: List[CorpusContradictionItem]
+    metadata: Metadata
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models.document import Document
+from app.services.structure_sync import get_structure_sync_worker, sync_structure
+
+# Số lock dùng để tuần tự hoá flush theo document (hash document_id → lock)
+FLUSH_LOCK_STRIPES = 64
+# Flush lỗi liên tiếp quá số lần này thì bỏ bản nháp (tránh retry vô hạn)
+MAX_FLUSH_ATTEMPTS = 5
+
+
+def apply_document_changes(db: Session, document: Document, changes: Dict[str, Any]) -> bool:
+    """Apply a DocumentUpdate payload to ``document`` exactly like PUT /documents/{id} (no commit).
+
+    Every content change is one new version. The structure is synced inline,
+    or, in background mode, left to the StructureSyncWorker: the return value
+    tells the caller to ``enqueue`` the document once the commit succeeded.
+    """
+    if changes.get("title") is not None:
+        document.title = changes["title"]
+    if changes.get("goal_id") is not None:
+        document.goal_id = changes["goal_id"]
+    if changes.get("content_json") is not None:
+        document.content_json = changes["content_json"]
+        document.content_full = ""
+    elif changes.get("content_full") is not None:
+        document.content_full = changes["content_full"]
+        document.content_json = None
+    else:
+        return False
+
+    document.version += 1
+    if get_structure_sync_worker().background:
+        return True
+    sync_structure(db, document)
+    return False
+
+
+def merge_changes(older: Dict[str, Any], newer: Dict[str, Any]) -> Dict[str, Any]:
+    """Newer DocumentUpdate fields win; content_full and content_json replace each other."""
+    merged = dict(older)
+    if "content_json" in newer:
+        merged.pop("content_full", None)
+    elif "content_full" in newer:
+        merged.pop("content_json", None)
+    merged.update(newer)
+    return merged
+
+
+@dataclass
+class PendingSave:
+    document_id: UUID
+    user_id: UUID
+    changes: Dict[str, Any]
+    first_buffered_at: float
+    last_buffered_at: float
+    edits: int = 1
+    attempts: int = 0
+
+    def merge(self, changes: Dict[str, Any], now: float) -> None:
+        self.changes = merge_changes(self.changes, changes)
+        self.last_buffered_at = now
+        self.edits += 1
+
+
+@dataclass
+class AutosaveStats:
+    submitted: int = 0
+    flushed: int = 0
+    failed: int = 0
+    edits_flushed: int = 0
+
+
+class AutosaveBuffer:
+    """Per-document write-coalescing buffer for editor autosaves.
+
+    ``submit`` only merges the update into memory. A background thread writes
+    a document once it has been quiet for ``debounce_seconds`` (or has been
+    dirty for ``max_delay_seconds`` while the user keeps typing), as a single
+    transaction with one ``version += 1`` and one structural sync. ``flush``
+    forces the write for an explicit save; ``stop`` flushes everything on
+    shutdown.
+
+    The buffer lives in the worker process, so with several workers the
+    autosave requests of one document must be routed to the same worker
+    (sticky sessions), as for any in-process cache.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        debounce_seconds: float = 2.0,
+        max_delay_seconds: float = 10.0,
+    ) -> None:
+        self._session_factory = session_factory
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._pending: Dict[UUID, PendingSave] = {}
+        self._lock = threading.Lock()
+        self._flush_locks = [threading.Lock() for _ in range(FLUSH_LOCK_STRIPES)]
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = AutosaveStats()
+
+    @property
+    def enabled(self) -> bool:
+        return self.debounce_seconds > 0
+
+    # ------------------------------------------------------------------
+    # Request side
+    # ------------------------------------------------------------------
+    def submit(self, document_id: UUID, user_id: UUID, changes: Dict[str, Any]) -> int:
+        """Buffer an update; returns how many edits are now waiting for this document."""
+        now = time.monotonic()
+        with self._lock:
+            self._stats.submitted += 1
+            entry = self._pending.get(document_id)
+            if entry is None:
+                entry = PendingSave(document_id, user_id, dict(changes), now, now)
+                self._pending[document_id] = entry
+            else:
+                entry.merge(changes, now)
+            return entry.edits
+
+    def peek(self, document_id: UUID) -> Optional[Dict[str, Any]]:
+        """Buffered changes not yet written (for read-your-writes on GET)."""
+        with self._lock:
+            entry = self._pending.get(document_id)
+            return dict(entry.changes) if entry else None
+
+    @contextmanager
+    def claim(self, document_id: UUID) -> Iterator[Optional[Dict[str, Any]]]:
+        """Hand the buffered changes to a synchronous save.
+
+        Holds the document's flush lock for the duration, so the save cannot
+        interleave with a background flush of older state.
+        """
+        with self._flush_lock(document_id):
+            with self._lock:
+                entry = self._pending.pop(document_id, None)
+            try:
+                yield entry.changes if entry else None
+            except BaseException:
+                if entry is not None:
+                    self._requeue(entry)
+                raise
+
+    def discard(self, document_id: UUID) -> None:
+        with self._lock:
+            self._pending.pop(document_id, None)
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+    def flush(self, document_id: UUID) -> bool:
+        """Write the buffered state of one document now; True if anything was written."""
+        with self._flush_lock(document_id):
+            with self._lock:
+                entry = self._pending.pop(document_id, None)
+            if entry is None:
+                return False
+            return self._write(entry)
+
+    def flush_due(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                document_id
+                for document_id, entry in self._pending.items()
+                if now - entry.last_buffered_at >= self.debounce_seconds
+                or now - entry.first_buffered_at >= self.max_delay_seconds
+            ]
+        return sum(self.flush(document_id) for document_id in due)
+
+    def flush_all(self) -> int:
+        with self._lock:
+            document_ids = list(self._pending)
+        return sum(self.flush(document_id) for document_id in document_ids)
+
+    def _flush_lock(self, document_id: UUID) -> threading.Lock:
+        return self._flush_locks[hash(document_id) % FLUSH_LOCK_STRIPES]
+
+    def _write(self, entry: PendingSave) -> bool:
+        db = self._session_factory()
+        try:
+            document = db.query(Document).filter(
+                Document.id == entry.document_id,
+                Document.user_id == entry.user_id,
+            ).first()
+            if document is None:
+                # Deleted while buffered: nothing left to save
+                return False
+            needs_sync = apply_document_changes(db, document, entry.changes)
+            db.commit()
+        except Exception as exc:  # noqa: BLE001 - retried on the next tick
+            db.rollback()
+            entry.attempts += 1
+            with self._lock:
+                self._stats.failed += 1
+            if entry.attempts < MAX_FLUSH_ATTEMPTS:
+                self._requeue(entry)
+                print(f"⚠️ Autosave flush failed for document {entry.document_id}: {exc}")
+            else:
+                print(f"❌ Autosave dropped {entry.edits} edits of document {entry.document_id} after {entry.attempts} failed flushes: {exc}")
+            return False
+        finally:
+            db.close()
+
+        if needs_sync:
+            get_structure_sync_worker().enqueue(entry.document_id)
+        with self._lock:
+            self._stats.flushed += 1
+            self._stats.edits_flushed += entry.edits
+        return True
+
+    def _requeue(self, entry: PendingSave) -> None:
+        """Put a failed write back, under any newer edits that arrived meanwhile."""
+        with self._lock:
+            newer = self._pending.get(entry.document_id)
+            if newer is not None:
+                entry.merge(newer.changes, newer.last_buffered_at)
+                entry.edits += newer.edits - 1
+            self._pending[entry.document_id] = entry
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self) -> Optional[threading.Thread]:
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return self._thread
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="autosave-flusher", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> int:
+        """Stop the flusher and write everything still buffered (lifespan shutdown hook)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self.debounce_seconds, 1.0) * 2)
+            self._thread = None
+        return self.flush_all()
+
+    def _run(self) -> None:
+        tick = min(self.debounce_seconds / 2, 0.5)
+        while not self._stop.wait(tick):
+            try:
+                self.flush_due()
+            except Exception as exc:  # noqa: BLE001 - keep the flusher alive
+                print(f"⚠️ Autosave flusher error: {exc}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "submitted": self._stats.submitted,
+                "flushed": self._stats.flushed,
+                "failed": self._stats.failed,
+                "edits_per_flush": round(self._stats.edits_flushed / self._stats.flushed, 2) if self._stats.flushed else None,
+            }
+
+
+_autosave_buffer: Optional[AutosaveBuffer] = None
+
+
+def get_autosave_buffer() -> AutosaveBuffer:
+    global _autosave_buffer
+    if _autosave_buffer is None:
+        from app.core.config import get_settings
+        from app.core.database import SessionLocal
+
+        settings = get_settings()
+        _autosave_buffer = AutosaveBuffer(
+            SessionLocal,
+            debounce_seconds=settings.AUTOSAVE_DEBOUNCE_SECONDS,
+            max_delay_seconds=settings.AUTOSAVE_MAX_DELAY_SECONDS,
+        )
+    return _autosave_buffer
+
+
+__all__ = ["AutosaveBuffer", "PendingSave", "apply_document_changes", "get_autosave_buffer", "merge_changes"]
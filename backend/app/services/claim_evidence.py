@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.document import Document, Sentence
+from app.services.corpus_index import load_document_sentences
+
+
+class ClaimEvidenceService:
+    """Label a document's stored sentences as claim/evidence/neutral.
+
+    Labels are written to SENTENCE.role with one executemany UPDATE, and the
+    ±2 sentence support rule is applied on top of them to report unsupported
+    claims.
+    """
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def label_document(self, document: Document) -> Dict[str, Any]:
+        # Import lazily: the classifier may need the embedding model
+        from app.ai.models.claim_classifier import ENGINE_NAME, analyze_claims
+
+        rows, embeddings = load_document_sentences(self.db, [str(document.id)]).get(
+            str(document.id), ([], None)
+        )
+        analysis = analyze_claims(
+            [row["text"] for row in rows],
+            [row["p_index"] for row in rows],
+            [row["s_index"] for row in rows],
+            embeddings,
+        )
+
+        if rows:
+            self.db.execute(
+                update(Sentence),
+                [
+                    {"id": UUID(row["sentence_id"]), "role": label}
+                    for row, label in zip(rows, analysis["labels"])
+                ],
+            )
+            self.db.commit()
+
+        for item in analysis["unsupported_claims"] + analysis["supported_claims"]:
+            row = rows[item.pop("sentence_position")]
+            item["sentence_id"] = row["sentence_id"]
+            item["paragraph_id"] = row["paragraph_id"]
+
+        role_counts: Dict[str, int] = {}
+        for label in analysis["labels"]:
+            role_counts[label] = role_counts.get(label, 0) + 1
+
+        return {
+            "success": True,
+            "document_id": str(document.id),
+            "doc_version": document.version,
+            "total_sentences": len(rows),
+            "role_counts": role_counts,
+            "total_claims_found": len(analysis["unsupported_claims"]) + len(analysis["supported_claims"]),
+            "total_unsupported": len(analysis["unsupported_claims"]),
+            "unsupported_claims": analysis["unsupported_claims"],
+            "supported_claims": analysis["supported_claims"],
+            "metadata": {
+                "analyzed_at": datetime.utcnow().isoformat(),
+                "model": ENGINE_NAME,
+                "error": None,
+            },
+        }
+
+
+__all__ = ["ClaimEvidenceService"]
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.document import Document, Paragraph, Sentence
+
+# Số user tối đa giữ index trong RAM (LRU)
+MAX_CACHED_USERS = 64
+
+
+class UserSentenceIndex:
+    """In-memory embedding index over every persisted sentence of one user.
+
+    Rows are grouped per document and tagged with the document's
+    ``structure_version`` (the version its sentence rows reflect), so a
+    refresh only reloads documents whose sentences were rebuilt since.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.doc_versions: Dict[str, int] = {}
+        self._docs: Dict[str, Tuple[List[Dict[str, Any]], np.ndarray]] = {}
+        self._snapshot: Optional[Tuple[List[Dict[str, Any]], np.ndarray, np.ndarray]] = None
+
+    def replace_document(self, document_id: str, version: int, rows: List[Dict[str, Any]], embeddings: np.ndarray) -> None:
+        self._docs[document_id] = (rows, embeddings)
+        self.doc_versions[document_id] = version
+        self._snapshot = None
+
+    def drop_document(self, document_id: str) -> None:
+        self._docs.pop(document_id, None)
+        self.doc_versions.pop(document_id, None)
+        self._snapshot = None
+
+    def snapshot(self) -> Tuple[List[Dict[str, Any]], np.ndarray, np.ndarray]:
+        """Return (rows, embedding matrix, document id per row); rebuilt only after changes."""
+        if self._snapshot is None:
+            rows: List[Dict[str, Any]] = []
+            blocks: List[np.ndarray] = []
+            for doc_rows, embeddings in self._docs.values():
+                if doc_rows:
+                    rows.extend(doc_rows)
+                    blocks.append(embeddings)
+            matrix = np.vstack(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+            doc_ids = np.array([row["document_id"] for row in rows], dtype=object)
+            self._snapshot = (rows, matrix, doc_ids)
+        return self._snapshot
+
+
+_indexes: "OrderedDict[str, UserSentenceIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _get_user_index(user_id: str) -> UserSentenceIndex:
+    with _indexes_lock:
+        index = _indexes.get(user_id)
+        if index is None:
+            index = UserSentenceIndex()
+            _indexes[user_id] = index
+        _indexes.move_to_end(user_id)
+        while len(_indexes) > MAX_CACHED_USERS:
+            _indexes.popitem(last=False)
+        return index
+
+
+class CorpusContradictionService:
+    """Check a text against the sentences of a user's other documents."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def check(
+        self,
+        user_id: UUID,
+        text: str,
+        exclude_document_id: Optional[UUID] = None,
+        **options: Any,
+    ) -> Dict[str, Any]:
+        # Import lazily: torch/transformers are only needed for this endpoint
+        from app.ai.models.contradictions import check_cross_document_contradictions
+
+        index = self.refresh_index(user_id)
+        # Persist embeddings computed while refreshing before the NLI pass
+        self.db.commit()
+        with index.lock:
+            rows, matrix, doc_ids = index.snapshot()
+
+        exclude_mask = None
+        if exclude_document_id is not None and len(rows):
+            exclude_mask = doc_ids == str(exclude_document_id)
+
+        return check_cross_document_contradictions(
+            text,
+            rows,
+            matrix,
+            exclude_mask=exclude_mask,
+            **options,
+        )
+
+    def refresh_index(self, user_id: UUID) -> UserSentenceIndex:
+        """Bring the user's index up to date, reloading only changed documents."""
+        index = _get_user_index(str(user_id))
+        # Not Document.version: background sync bumps it before the sentences are rebuilt
+        current_versions = {
+            str(doc_id): version
+            for doc_id, version in self.db.query(Document.id, Document.structure_version)
+            .filter(Document.user_id == user_id)
+            .all()
+        }
+
+        with index.lock:
+            for doc_id in [d for d in index.doc_versions if d not in current_versions]:
+                index.drop_document(doc_id)
+
+            stale = [d for d, v in current_versions.items() if index.doc_versions.get(d) != v]
+            if not stale:
+                return index
+
+            loaded = self._load_sentences(stale)
+            for doc_id in stale:
+                rows, embeddings = loaded.get(doc_id, ([], np.zeros((0, 0), dtype=np.float32)))
+                index.replace_document(doc_id, current_versions[doc_id], rows, embeddings)
+
+        return index
+
+    def _load_sentences(self, document_ids: List[str]) -> Dict[str, Tuple[List[Dict[str, Any]], np.ndarray]]:
+        return load_document_sentences(self.db, document_ids)
+
+
+def load_document_sentences(
+    db: Session, document_ids: List[str]
+) -> Dict[str, Tuple[List[Dict[str, Any]], np.ndarray]]:
+    """Load persisted sentences of the given documents with their embeddings.
+
+    Returns ``{document_id: (rows, embedding matrix)}`` in paragraph/sentence
+    order; sentences without a stored embedding are embedded and written to
+    ``db`` (flushed, not committed).
+    """
+    records = (
+        db.query(
+            Sentence.id,
+            Sentence.text,
+            Sentence.hash,
+            Sentence.emb,
+            Sentence.s_index,
+            Paragraph.id,
+            Paragraph.p_index,
+            Paragraph.document_id,
+        )
+        .join(Paragraph, Sentence.paragraph_id == Paragraph.id)
+        .filter(Paragraph.document_id.in_([UUID(str(d)) for d in document_ids]))
+        .order_by(Paragraph.document_id, Paragraph.p_index, Sentence.s_index)
+        .all()
+    )
+
+    records = [r for r in records if (r[1] or "").strip()]
+    embeddings = _ensure_embeddings(db, records)
+
+    grouped: Dict[str, Tuple[List[Dict[str, Any]], List[np.ndarray]]] = {}
+    for record, emb in zip(records, embeddings):
+        sentence_id, text, text_hash, _, s_index, paragraph_id, p_index, document_id = record
+        rows, vectors = grouped.setdefault(str(document_id), ([], []))
+        rows.append(
+            {
+                "text": text,
+                "hash": text_hash,
+                "document_id": str(document_id),
+                "paragraph_id": str(paragraph_id),
+                "sentence_id": str(sentence_id),
+                "p_index": p_index,
+                "s_index": s_index,
+            }
+        )
+        vectors.append(emb)
+
+    return {
+        doc_id: (rows, np.vstack(vectors).astype(np.float32))
+        for doc_id, (rows, vectors) in grouped.items()
+    }
+
+
+def _ensure_embeddings(db: Session, records: List[Any]) -> List[np.ndarray]:
+    """Use SENTENCE.emb when present; embed the missing ones and flush them in one batch.
+
+    Committing is left to the caller's transaction.
+    """
+    from app.ai.models.contradictions import encode_sentences
+
+    embeddings: List[Optional[np.ndarray]] = [
+        np.asarray(r[3], dtype=np.float32) if r[3] else None for r in records
+    ]
+    missing = [i for i, emb in enumerate(embeddings) if emb is None]
+    if missing:
+        computed = encode_sentences([records[i][1] for i in missing])
+        for row, i in enumerate(missing):
+            embeddings[i] = computed[row]
+        db.execute(
+            update(Sentence),
+            [{"id": records[i][0], "emb": computed[row].tolist()} for row, i in enumerate(missing)],
+        )
+        db.flush()
+    return embeddings  # type: ignore[return-value]
+
+
+__all__ = ["CorpusContradictionService", "UserSentenceIndex", "load_document_sentences"]
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, FrozenSet, List
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.analysis import AnalysisRun, AnalysisStatus, AnalysisType
+from app.models.document import Document, Paragraph
+from app.models.error import ErrorCategory, ErrorType, LogicError, Severity
+from app.services.corpus_index import load_document_sentences
+
+# Mâu thuẫn có confidence từ ngưỡng này được đánh dấu critical
+CRITICAL_CONFIDENCE = 0.9
+
+
+class DocumentContradictionService:
+    """Run contradiction detection over a document's persisted sentences.
+
+    Sentences and their cached embeddings come straight from the SENTENCE
+    table, so nothing is re-parsed. Findings are stored as LogicError rows
+    of one AnalysisRun. A contradiction already reported for the same
+    sentence pair by an earlier run keeps its row (and its FEEDBACK) and is
+    moved to the new run; earlier ones no longer found are marked resolved.
+    """
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def analyze(
+        self,
+        document: Document,
+        trigger_source: str = "manual",
+        **options: Any,
+    ) -> AnalysisRun:
+        # Import lazily: torch/transformers are only needed for this analysis
+        from app.ai.models.contradictions import check_sentence_contradictions
+
+        # The sentence rows reflect structure_version, which may lag behind version
+        version = document.structure_version
+        rows, embeddings = load_document_sentences(self.db, [str(document.id)]).get(
+            str(document.id), ([], None)
+        )
+        # Persist embeddings computed while loading before the NLI pass
+        self.db.commit()
+
+        run = AnalysisRun(
+            id=uuid.uuid4(),
+            document_id=document.id,
+            doc_version=version,
+            analysis_type=AnalysisType.FULL,
+            trigger_source=trigger_source,
+            status=AnalysisStatus.RUNNING,
+            started_at=datetime.now(timezone.utc),
+            paragraphs_analyzed=sorted({row["paragraph_id"] for row in rows}),
+        )
+        self.db.add(run)
+        self.db.flush()
+
+        result = check_sentence_contradictions(
+            [row["text"] for row in rows],
+            embeddings,
+            [row["hash"] for row in rows],
+            **options,
+        )
+
+        run.finished_at = datetime.now(timezone.utc)
+        if not result.get("success"):
+            run.status = AnalysisStatus.FAILED
+            run.error_message = result.get("error") or result["metadata"].get("error")
+            self.db.commit()
+            self.db.refresh(run)
+            return run
+
+        self._store_errors(document, run, self._build_errors(run, rows, result["contradictions"]))
+
+        self.db.execute(
+            update(Paragraph)
+            .where(Paragraph.document_id == document.id)
+            .values(last_analyzed_version=version)
+        )
+
+        run.status = AnalysisStatus.COMPLETED
+        run.stats = {
+            "total_sentences": result["total_sentences"],
+            "total_pairs_scored": result["total_pairs_scored"],
+            "total_contradictions": result["total_contradictions"],
+            "model_path": result["model_path"],
+            "duration_seconds": round((run.finished_at - run.started_at).total_seconds(), 3),
+        }
+        self.db.commit()
+        self.db.refresh(run)
+        return run
+
+    def _store_errors(self, document: Document, run: AnalysisRun, errors: List[Dict[str, Any]]) -> None:
+        """Match findings with the unresolved contradictions of earlier runs by sentence pair.
+
+        Matched rows are updated in place (FEEDBACK hangs off LogicError.id),
+        new pairs are inserted and unmatched earlier rows are resolved.
+        """
+        previous: Dict[FrozenSet[str], Any] = {}
+        stale_ids = []
+        for error_id, sentence_id, meta in self.db.execute(
+            select(LogicError.id, LogicError.sentence_id, LogicError.meta).where(
+                LogicError.document_id == document.id,
+                LogicError.error_type == ErrorType.CONTRADICTION,
+                LogicError.is_resolved.is_(False),
+            )
+        ):
+            related_id = (meta or {}).get("related_sentence_id")
+            key = frozenset((str(sentence_id), str(related_id)))
+            if sentence_id is None or related_id is None or key in previous:
+                stale_ids.append(error_id)
+            else:
+                previous[key] = error_id
+
+        inserts, updates = [], []
+        for error in errors:
+            error_id = previous.pop(self._pair_key(error), None)
+            if error_id is None:
+                inserts.append(error)
+            else:
+                updates.append({**error, "id": error_id})
+        stale_ids.extend(previous.values())
+
+        if inserts:
+            self.db.execute(insert(LogicError), inserts)
+        if updates:
+            self.db.execute(update(LogicError), updates)
+        if stale_ids:
+            self.db.execute(
+                update(LogicError)
+                .where(LogicError.id.in_(stale_ids))
+                .values(
+                    is_resolved=True,
+                    resolved_at=datetime.now(timezone.utc),
+                    resolved_by_doc_version=run.doc_version,
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+    @staticmethod
+    def _pair_key(error: Dict[str, Any]) -> FrozenSet[str]:
+        return frozenset((str(error["sentence_id"]), error["meta"]["related_sentence_id"]))
+
+    @staticmethod
+    def _build_errors(
+        run: AnalysisRun,
+        rows: List[Dict[str, Any]],
+        contradictions: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """One LogicError row per contradiction, anchored at its first sentence."""
+        errors: List[Dict[str, Any]] = []
+        for item in contradictions:
+            first = rows[item["sentence1_index"]]
+            second = rows[item["sentence2_index"]]
+            confidence = item["confidence"]
+            errors.append(
+                {
+                    "id": uuid.uuid4(),
+                    "analysis_run_id": run.id,
+                    "document_id": run.document_id,
+                    "paragraph_id": uuid.UUID(first["paragraph_id"]),
+                    "sentence_id": uuid.UUID(first["sentence_id"]),
+                    "error_type": ErrorType.CONTRADICTION,
+                    "error_category": ErrorCategory.LOGIC,
+                    "severity": Severity.CRITICAL if confidence >= CRITICAL_CONFIDENCE else Severity.MEDIUM,
+                    "message": f'"{first["text"]}" mâu thuẫn với "{second["text"]}"',
+                    "meta": {
+                        "confidence": confidence,
+                        "boosted": item.get("boosted", False),
+                        "rule": item.get("rule"),
+                        "related_sentence_id": second["sentence_id"],
+                        "related_paragraph_id": second["paragraph_id"],
+                        "related_p_index": second["p_index"],
+                        "related_s_index": second["s_index"],
+                    },
+                    "p_index": first["p_index"],
+                    "s_index": first["s_index"],
+                    "is_resolved": False,
+                }
+            )
+        return errors
+
+
+__all__ = ["DocumentContradictionService"]
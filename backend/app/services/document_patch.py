@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import html as html_lib
+import re
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import Row, delete, func, insert, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.document import Document, Paragraph, Sentence
+from app.services.document_sync import DocumentCanvasSyncService
+from app.services.html_parsers import get_html_parser
+from app.services.parsed_document import ParsedDocument
+from app.services.prosemirror import iter_blocks as iter_prosemirror_blocks
+
+# List items are stored as <p data-list-type="..."> (see the HTML parser backends)
+_LIST_ITEM_RE = re.compile(r'^<p data-list-type="(bullet|ordered)">(.*)</p>$', re.DOTALL)
+_LIST_TAGS = {"bullet": "ul", "ordered": "ol"}
+# Placeholder that sync() adds to sections without paragraphs
+_PLACEHOLDER_HTML = "<p></p>"
+
+
+class DocumentVersionConflict(Exception):
+    """The patch was computed against an older version of the document."""
+
+    def __init__(self, current_version: int) -> None:
+        super().__init__(f"Document is at version {current_version}")
+        self.current_version = current_version
+
+
+class DocumentPatchService(DocumentCanvasSyncService):
+    """Apply paragraph-level edits without re-parsing or re-diffing the whole canvas.
+
+    Each operation touches only its own paragraph and sentence rows plus one
+    set-based UPDATE that shifts the ``p_index`` of the paragraphs after it.
+    ``content_full`` is not rewritten here; it is flagged stale and rendered
+    from the stored paragraphs the next time it is read (see
+    ``render_content_html``).
+
+    Documents stored as ProseMirror JSON (``content_json``) cannot be patched:
+    their tree is the source of truth and is only replaced by full saves.
+
+    Operations are dicts with ``op`` ("insert" | "update" | "delete" | "move"),
+    a target given by ``paragraph_id`` or 1-based ``p_index``, the new content
+    as ``html`` or a ProseMirror ``node``, and ``to_index`` for moves.
+    """
+
+    # Columns needed to apply an operation to its target paragraph
+    TARGET_COLUMNS = (Paragraph.id, Paragraph.section_id, Paragraph.p_index, Paragraph.text, Paragraph.hash, Paragraph.word_count)
+
+    def apply(self, document: Document, base_version: int, operations: Sequence[Dict[str, Any]]) -> Dict[str, List[UUID]]:
+        """Apply ``operations`` in order; raises DocumentVersionConflict or ValueError.
+
+        The caller owns the transaction and must roll back on error.
+        """
+        structure = dict(document.structure_json or {})
+        sections = [dict(section, paragraph_ids=list(section["paragraph_ids"])) for section in structure.get("sections") or []]
+        if not sections:
+            raise ValueError("Document has no synchronized structure yet; save the full content first")
+
+        if document.structure_version < document.version:
+            raise ValueError("Document structure is not synced with its content yet; retry shortly")
+        if document.content_json is not None:
+            # Paragraph rows do not map back onto the editor's node tree
+            raise ValueError("Document is stored as editor JSON; save the full content_json instead")
+
+        self._claim_version(document, base_version)
+        # Patched rows are the structure of the new version
+        document.structure_version = document.version
+        self._document_id = document.id
+        self._sections = sections
+        self._count = self.db.scalar(
+            select(func.count()).select_from(Paragraph).where(Paragraph.document_id == document.id)
+        )
+        self._word_delta = 0
+
+        result: Dict[str, List[UUID]] = {"inserted_ids": [], "updated_ids": [], "deleted_ids": [], "moved_ids": []}
+        handlers = {"insert": self._insert, "update": self._update, "delete": self._delete, "move": self._move}
+        for position, operation in enumerate(operations):
+            handler = handlers.get(operation.get("op"))
+            if handler is None:
+                raise ValueError(f"operations[{position}]: unknown op {operation.get('op')!r}")
+            try:
+                handler(operation, result)
+            except ValueError as exc:
+                raise ValueError(f"operations[{position}]: {exc}") from exc
+
+        structure["sections"] = sections
+        # Definitions/usages shift with every edit; the next full sync rebuilds the index
+        structure.pop("terms", None)
+        structure["content_full_stale"] = True
+        structure["patched_at"] = datetime.utcnow().isoformat()
+        document.structure_json = structure
+        document.content_full = ""
+        document.word_count = max(0, (document.word_count or 0) + self._word_delta)
+        return result
+
+    def render_content_html(self, document: Document) -> str:
+        """Rebuild canvas HTML from the stored headings and paragraph HTML (lists are regrouped)."""
+        texts = {
+            str(row.id): row.text
+            for row in self.db.execute(
+                select(Paragraph.id, Paragraph.text).where(Paragraph.document_id == document.id)
+            )
+        }
+        out: List[str] = []
+        for position, section in enumerate((document.structure_json or {}).get("sections") or []):
+            if "heading_html" in section:
+                heading = section["heading_html"]
+            else:
+                # Structure synced before headings were kept
+                heading = f"<h2>{html_lib.escape(section['label'], quote=False)}</h2>" if position else None
+            if heading:
+                out.append(heading)
+
+            paragraphs = [texts[pid] for pid in section["paragraph_ids"] if pid in texts]
+            if paragraphs == [_PLACEHOLDER_HTML]:
+                continue
+            open_list: Optional[str] = None
+            for paragraph_html in paragraphs:
+                match = _LIST_ITEM_RE.match(paragraph_html)
+                list_type = match.group(1) if match else None
+                if list_type != open_list:
+                    if open_list:
+                        out.append(f"</{_LIST_TAGS[open_list]}>")
+                    if list_type:
+                        out.append(f"<{_LIST_TAGS[list_type]}>")
+                    open_list = list_type
+                out.append(f"<li>{match.group(2)}</li>" if match else paragraph_html)
+            if open_list:
+                out.append(f"</{_LIST_TAGS[open_list]}>")
+        return "".join(out)
+
+    # ---------------------------------------------------------------------
+    # Operations
+    # ---------------------------------------------------------------------
+    def _insert(self, operation: Dict[str, Any], result: Dict[str, List[UUID]]) -> None:
+        p_index = operation.get("p_index") or self._count + 1
+        if not 1 <= p_index <= self._count + 1:
+            raise ValueError(f"p_index must be between 1 and {self._count + 1}")
+        parsed = self._parse_content(operation)
+        if not len(parsed):
+            raise ValueError("insert needs non-empty html or node")
+
+        section_id, after_id = self._placement(self._row_at(p_index - 1), self._row_at(p_index))
+        self._defer_order_constraints()
+        self._shift(p_index, None, len(parsed))
+
+        paragraph_rows: List[Dict[str, object]] = []
+        sentence_rows: List[Dict[str, object]] = []
+        for offset in range(len(parsed)):
+            paragraph_id = uuid.uuid4()
+            paragraph_rows.append(
+                {
+                    "id": paragraph_id,
+                    "document_id": self._document_id,
+                    "section_id": section_id,
+                    "p_index": p_index + offset,
+                    "text": parsed.html[offset],
+                    "hash": parsed.paragraph_hash(offset),
+                    "word_count": parsed.word_counts[offset],
+                }
+            )
+            sentence_rows.extend(self._new_sentences(paragraph_id, parsed, offset))
+            self._word_delta += parsed.word_counts[offset]
+        self.db.execute(insert(Paragraph), paragraph_rows)
+        if sentence_rows:
+            self.db.execute(insert(Sentence), sentence_rows)
+
+        new_ids = [row["id"] for row in paragraph_rows]
+        self._structure_insert(section_id, after_id, new_ids)
+        self._count += len(new_ids)
+        result["inserted_ids"].extend(new_ids)
+
+    def _update(self, operation: Dict[str, Any], result: Dict[str, List[UUID]]) -> None:
+        row = self._resolve(operation)
+        parsed = self._parse_content(operation)
+        if len(parsed) != 1:
+            raise ValueError("update must produce exactly one paragraph; use insert for the others")
+        paragraph_hash = parsed.paragraph_hash(0)
+        word_count = parsed.word_counts[0]
+
+        changes: Dict[str, object] = {}
+        if row.text != parsed.html[0]:
+            changes["text"] = parsed.html[0]
+        if row.hash != paragraph_hash:
+            changes.update(
+                hash=paragraph_hash,
+                word_count=word_count,
+                emb=None,
+                last_analyzed_version=None,
+            )
+            self._word_delta += word_count - row.word_count
+        if changes:
+            self.db.execute(update(Paragraph), [{"id": row.id, **changes}])
+
+        old_sentences = self.db.execute(
+            select(Sentence.id, Sentence.paragraph_id, Sentence.s_index, Sentence.hash)
+            .where(Sentence.paragraph_id == row.id)
+            .order_by(Sentence.s_index)
+        ).all()
+        sentence_updates: List[Dict[str, object]] = []
+        sentence_inserts: List[Dict[str, object]] = []
+        stale_sentence_ids: List[UUID] = []
+        self._diff_sentences(
+            row.id, old_sentences, parsed, 0, sentence_updates, sentence_inserts, stale_sentence_ids
+        )
+        if sentence_inserts or any("s_index" in u for u in sentence_updates):
+            self._defer_order_constraints()
+        if stale_sentence_ids:
+            self.db.execute(delete(Sentence).where(Sentence.id.in_(stale_sentence_ids)))
+        if sentence_updates:
+            self.db.execute(update(Sentence), sentence_updates)
+        if sentence_inserts:
+            self.db.execute(insert(Sentence), sentence_inserts)
+        result["updated_ids"].append(row.id)
+
+    def _delete(self, operation: Dict[str, Any], result: Dict[str, List[UUID]]) -> None:
+        row = self._resolve(operation)
+        self._defer_order_constraints()
+        self.db.execute(delete(Sentence).where(Sentence.paragraph_id == row.id))
+        self.db.execute(delete(Paragraph).where(Paragraph.id == row.id))
+        self._shift(row.p_index + 1, None, -1)
+
+        self._structure_remove(row.id)
+        self._count -= 1
+        self._word_delta -= row.word_count
+        result["deleted_ids"].append(row.id)
+
+    def _move(self, operation: Dict[str, Any], result: Dict[str, List[UUID]]) -> None:
+        row = self._resolve(operation)
+        to_index = operation.get("to_index")
+        if to_index is None or not 1 <= to_index <= self._count:
+            raise ValueError(f"to_index must be between 1 and {self._count}")
+        if to_index == row.p_index:
+            return
+
+        # Neighbours in the final order, looked up before anything shifts
+        if to_index > row.p_index:
+            before, after = self._row_at(to_index), self._row_at(to_index + 1)
+        else:
+            before, after = self._row_at(to_index - 1), self._row_at(to_index)
+        section_id, after_id = self._placement(before, after)
+
+        self._defer_order_constraints()
+        if to_index > row.p_index:
+            self._shift(row.p_index + 1, to_index, -1)
+        else:
+            self._shift(to_index, row.p_index - 1, 1)
+        changes: Dict[str, object] = {"id": row.id, "p_index": to_index}
+        if row.section_id != section_id:
+            changes["section_id"] = section_id
+        self.db.execute(update(Paragraph), [changes])
+
+        self._structure_remove(row.id)
+        self._structure_insert(section_id, after_id, [row.id])
+        result["moved_ids"].append(row.id)
+
+    # ---------------------------------------------------------------------
+    # Helpers
+    # ---------------------------------------------------------------------
+    def _claim_version(self, document: Document, base_version: int) -> None:
+        """Bump the version only if nobody saved since ``base_version`` (row stays locked until commit)."""
+        new_version = self.db.scalar(
+            update(Document)
+            .where(Document.id == document.id, Document.version == base_version)
+            .values(version=Document.version + 1)
+            .returning(Document.version)
+        )
+        if new_version is None:
+            current = self.db.scalar(select(Document.version).where(Document.id == document.id))
+            raise DocumentVersionConflict(current if current is not None else document.version)
+        set_committed_value(document, "version", new_version)
+
+    def _parse_content(self, operation: Dict[str, Any]) -> ParsedDocument:
+        if operation.get("node") is not None:
+            blocks = iter_prosemirror_blocks({"content": [operation["node"]]})
+        elif operation.get("html") is not None:
+            blocks = get_html_parser().iter_blocks(operation["html"].strip())
+        else:
+            raise ValueError(f"{operation.get('op')} needs html or node")
+
+        parsed = ParsedDocument()
+        for block in blocks:
+            if block.kind == "heading":
+                raise ValueError("headings change the section structure; save the full content instead")
+            parsed.add_paragraph(block.html, block.text, metadata=block.metadata)
+        return parsed.finish()
+
+    def _resolve(self, operation: Dict[str, Any]) -> Row:
+        if operation.get("paragraph_id") is not None:
+            condition = Paragraph.id == operation["paragraph_id"]
+        elif operation.get("p_index") is not None:
+            condition = Paragraph.p_index == operation["p_index"]
+        else:
+            raise ValueError(f"{operation.get('op')} needs paragraph_id or p_index")
+        row = self.db.execute(
+            select(*self.TARGET_COLUMNS).where(Paragraph.document_id == self._document_id, condition)
+        ).first()
+        if row is None:
+            raise ValueError("paragraph not found")
+        return row
+
+    def _row_at(self, p_index: int) -> Optional[Row]:
+        if p_index < 1 or p_index > self._count:
+            return None
+        return self.db.execute(
+            select(Paragraph.id, Paragraph.section_id)
+            .where(Paragraph.document_id == self._document_id, Paragraph.p_index == p_index)
+        ).first()
+
+    def _placement(self, before: Optional[Row], after: Optional[Row]):
+        """Section for a paragraph placed between ``before`` and ``after``, and the ID it follows.
+
+        A paragraph joins the section of the paragraph before it (like typing
+        at the end of a section); at the very top it joins the first section.
+        """
+        if before is not None:
+            return before.section_id, before.id
+        if after is not None:
+            return after.section_id, None
+        return UUID(self._sections[0]["section_id"]), None
+
+    def _shift(self, start: int, end: Optional[int], delta: int) -> None:
+        stmt = update(Paragraph).where(Paragraph.document_id == self._document_id, Paragraph.p_index >= start)
+        if end is not None:
+            stmt = stmt.where(Paragraph.p_index <= end)
+        self.db.execute(stmt.values(p_index=Paragraph.p_index + delta))
+
+    def _structure_remove(self, paragraph_id: UUID) -> None:
+        key = str(paragraph_id)
+        for section in self._sections:
+            if key in section["paragraph_ids"]:
+                section["paragraph_ids"].remove(key)
+                return
+
+    def _structure_insert(self, section_id: Optional[UUID], after_id: Optional[UUID], paragraph_ids: List[UUID]) -> None:
+        keys = [str(pid) for pid in paragraph_ids]
+        section = next((s for s in self._sections if s["section_id"] == str(section_id)), self._sections[0])
+        ids = section["paragraph_ids"]
+        position = ids.index(str(after_id)) + 1 if after_id is not None and str(after_id) in ids else 0
+        ids[position:position] = keys
+
+
+__all__ = ["DocumentPatchService", "DocumentVersionConflict"]
@@ -1,16 +1,20 @@
 from __future__ import annotations
 
-import hashlib
-import re
+import uuid
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
 
-from bs4 import BeautifulSoup, NavigableString, Tag
+from sqlalchemy import Row, delete, insert, select, text, update
 from sqlalchemy.orm import Session
 
-from sqlalchemy import select
-
+from app.ai.models.term_detector import build_term_index
 from app.models.document import Document, DocumentSection, Paragraph, Sentence, SectionType
+from app.services.html_parsers import Block, get_html_parser
+from app.services.parsed_document import ParsedDocument
+from app.services.prosemirror import ProseMirrorNode, iter_blocks as iter_prosemirror_blocks
 
 
 class DocumentCanvasSyncService:
@@ -29,197 +33,401 @@ class DocumentCanvasSyncService:
         "summary": SectionType.CONCLUSION.value,
     }
 
+    # Deferrable unique constraints on the ordering columns (see 010_schema.sql)
+    ORDER_CONSTRAINTS = (
+        '"uq_doc_section_order"',
+        '"uq_paragraph_doc_index"',
+        '"uq_sentence_para_index"',
+    )
+
     def __init__(self, db: Session) -> None:
         self.db = db
+        self._constraints_deferred = False
+
+    def sync(
+        self,
+        document: Document,
+        html_content: Optional[str],
+        is_new: bool = False,
+        content_json: Optional[ProseMirrorNode] = None,
+    ) -> None:
+        """Synchronize DocumentSection/Paragraph/Sentence tables with canvas content.
+
+        The new structure is diffed against the stored rows: unchanged paragraphs
+        keep their IDs, embeddings and last_analyzed_version, and only the rows
+        touched by the edit are inserted, updated, moved or deleted.
+
+        New rows get client-side UUIDs and are written with one executemany
+        INSERT per table, so a fresh document costs three statements in total.
+        Pass ``is_new=True`` for a document that has no structure yet to skip
+        loading the (empty) current structure.
+
+        When the editor sends its ProseMirror JSON (``content_json``) the tree is
+        walked directly and ``html_content`` is ignored; no HTML is parsed.
+        """
+        if content_json is not None:
+            parsed = self._build_document(iter_prosemirror_blocks(content_json))
+        else:
+            parsed = self._parse_document((html_content or "").strip())
+
+        # SET CONSTRAINTS only lasts until the end of the current transaction
+        self._constraints_deferred = False
+        if is_new:
+            old_sections, old_paragraphs, old_sentences = [], [], {}
+        else:
+            old_sections, old_paragraphs, old_sentences = self._load_structure(document.id)
+        section_ids, stale_section_ids = self._sync_sections(document, parsed, old_sections)
+        paragraph_ids = self._sync_paragraphs(
+            document, parsed, section_ids, old_paragraphs, old_sentences, stale_section_ids
+        )
+        paragraph_ids_str = [str(pid) for pid in paragraph_ids]
+
+        summary = [
+            {
+                "section_id": str(section_id),
+                "label": section.label,
+                "type": section.type,
+                "heading_html": section.heading_html,
+                "paragraph_ids": paragraph_ids_str[section.first:section.stop],
+            }
+            for section, section_id in zip(parsed.sections, section_ids)
+        ]
 
-    def sync(self, document: Document, html_content: Optional[str]) -> None:
-        """Synchronize DocumentSection/Paragraph/Sentence tables with canvas content."""
-        normalized_html = (html_content or "").strip()
-        sections = self._parse_sections(normalized_html)
-
-        # Remove previous structure (respect FK constraints by deleting child sentences first)
-        paragraph_subquery = select(Paragraph.id).where(Paragraph.document_id == document.id)
-        self.db.query(Sentence).filter(Sentence.paragraph_id.in_(paragraph_subquery)).delete(synchronize_session=False)
-        self.db.query(Paragraph).filter(Paragraph.document_id == document.id).delete(synchronize_session=False)
-        self.db.query(DocumentSection).filter(DocumentSection.document_id == document.id).delete(synchronize_session=False)
-        self.db.flush()
-
-        total_word_count = 0
-        summary: List[Dict[str, object]] = []
-        paragraph_index = 0
-
-        for order_index, section in enumerate(sections):
-            section_model = DocumentSection(
-                document_id=document.id,
-                section_type=section["type"],
-                section_label=section["label"],
-                order_index=order_index,
-            )
-            self.db.add(section_model)
-            self.db.flush()
-
-            paragraph_ids: List[str] = []
-
-            for paragraph in section["paragraphs"]:
-                paragraph_index += 1
-                para_model = Paragraph(
-                    document_id=document.id,
-                    section_id=section_model.id,
-                    p_index=paragraph_index,
-                    text=paragraph["html"],
-                    hash=paragraph["hash"],
-                    word_count=paragraph["word_count"],
-                )
-                self.db.add(para_model)
-                self.db.flush()
-                paragraph_ids.append(str(para_model.id))
-                total_word_count += paragraph["word_count"]
-
-                for s_index, sentence in enumerate(paragraph["sentences"]):
-                    sent_model = Sentence(
-                        paragraph_id=para_model.id,
-                        s_index=s_index,
-                        text=sentence["text"],
-                        hash=sentence["hash"],
-                        role=None,
-                        confidence_score=None,
-                    )
-                    self.db.add(sent_model)
-
-            summary.append(
-                {
-                    "section_id": str(section_model.id),
-                    "label": section_model.section_label,
-                    "type": section_model.section_type,
-                    "paragraph_ids": paragraph_ids,
-                }
-            )
-
-        document.word_count = total_word_count
+        document.word_count = sum(parsed.word_counts)
         document.structure_json = {
             "sections": summary,
+            "terms": self._build_term_index(parsed, paragraph_ids_str),
             "synchronized_at": datetime.utcnow().isoformat(),
         }
 
     # ---------------------------------------------------------------------
-    # Parsing helpers
+    # Diff helpers
     # ---------------------------------------------------------------------
-    def _parse_sections(self, html: str) -> List[Dict[str, object]]:
-        soup = BeautifulSoup(html or "", "html.parser")
-        container = soup.body or soup
-
-        sections: List[Dict[str, object]] = []
-        current_section = self._new_section("Main Section", SectionType.CUSTOM.value)
-        sections.append(current_section)
-
-        for node in container.children:
-            if isinstance(node, NavigableString):
-                text = node.strip()
-                if not text:
-                    continue
-                current_section["paragraphs"].extend(self._paragraph_from_text(text))
+    def _load_structure(self, document_id: UUID):
+        """Current sections, paragraphs and sentences (only the columns the diff needs)."""
+        old_sections = self.db.execute(
+            select(DocumentSection.id, DocumentSection.section_type, DocumentSection.section_label, DocumentSection.order_index)
+            .where(DocumentSection.document_id == document_id)
+            .order_by(DocumentSection.order_index)
+        ).all()
+        old_paragraphs = self.db.execute(
+            select(Paragraph.id, Paragraph.section_id, Paragraph.p_index, Paragraph.text, Paragraph.hash)
+            .where(Paragraph.document_id == document_id)
+            .order_by(Paragraph.p_index)
+        ).all()
+
+        old_sentences: Dict[UUID, List[Row]] = {}
+        if old_paragraphs:
+            rows = self.db.execute(
+                select(Sentence.id, Sentence.paragraph_id, Sentence.s_index, Sentence.hash)
+                .join(Paragraph, Paragraph.id == Sentence.paragraph_id)
+                .where(Paragraph.document_id == document_id)
+                .order_by(Sentence.paragraph_id, Sentence.s_index)
+            ).all()
+            for row in rows:
+                old_sentences.setdefault(row.paragraph_id, []).append(row)
+        return old_sections, old_paragraphs, old_sentences
+
+    def _defer_order_constraints(self) -> None:
+        """Let p_index/s_index/order_index swap places within the transaction."""
+        if not self._constraints_deferred:
+            self.db.execute(text(f"SET CONSTRAINTS {', '.join(self.ORDER_CONSTRAINTS)} DEFERRED"))
+            self._constraints_deferred = True
+
+    def _sync_sections(
+        self,
+        document: Document,
+        parsed: ParsedDocument,
+        old_sections: List[Row],
+    ) -> Tuple[List[UUID], List[UUID]]:
+        """Reuse sections with the same type and label (in order).
+
+        Returns one ID per new section, plus the IDs of sections that are no
+        longer used (deleted once their paragraphs have been reassigned).
+        """
+        pool: Dict[Tuple[str, Optional[str]], deque] = {}
+        for row in old_sections:
+            pool.setdefault((row.section_type, row.section_label), deque()).append(row)
+
+        section_ids: List[UUID] = []
+        inserts: List[Dict[str, object]] = []
+        reorders: List[Dict[str, object]] = []
+        for order_index, section in enumerate(parsed.sections):
+            candidates = pool.get((section.type, section.label))
+            if candidates:
+                row = candidates.popleft()
+                section_ids.append(row.id)
+                if row.order_index != order_index:
+                    reorders.append({"id": row.id, "order_index": order_index})
                 continue
+            section_id = uuid.uuid4()
+            section_ids.append(section_id)
+            inserts.append(
+                {
+                    "id": section_id,
+                    "document_id": document.id,
+                    "section_type": section.type,
+                    "section_label": section.label,
+                    "order_index": order_index,
+                    "is_complete": False,
+                }
+            )
 
-            if not isinstance(node, Tag):
+        stale_section_ids = [row.id for rows in pool.values() for row in rows]
+        if reorders or (inserts and old_sections):
+            self._defer_order_constraints()
+        if reorders:
+            self.db.execute(update(DocumentSection), reorders)
+        if inserts:
+            self.db.execute(insert(DocumentSection), inserts)
+        return section_ids, stale_section_ids
+
+    def _sync_paragraphs(
+        self,
+        document: Document,
+        parsed: ParsedDocument,
+        section_ids: List[UUID],
+        old_paragraphs: List[Row],
+        old_sentences: Dict[UUID, List[Row]],
+        stale_section_ids: List[UUID],
+    ) -> List[UUID]:
+        """Diff paragraphs by hash and position; returns the paragraph ID of every new paragraph."""
+        new_section_ids: List[UUID] = [
+            section_id
+            for section, section_id in zip(parsed.sections, section_ids)
+            for _ in section.paragraph_range
+        ]
+        new_hashes = parsed.paragraph_hashes()
+        matches = self._match_by_hash([row.hash for row in old_paragraphs], new_hashes)
+
+        paragraph_ids: List[UUID] = []
+        paragraph_updates: List[Dict[str, object]] = []
+        paragraph_inserts: List[Dict[str, object]] = []
+        sentence_updates: List[Dict[str, object]] = []
+        sentence_inserts: List[Dict[str, object]] = []
+        stale_sentence_ids: List[UUID] = []
+        matched_old = set()
+
+        for position, section_id in enumerate(new_section_ids):
+            p_index = position + 1
+            html = parsed.html[position]
+            paragraph_hash = new_hashes[position]
+            old_pos = matches.get(position)
+            if old_pos is None:
+                paragraph_id = uuid.uuid4()
+                paragraph_inserts.append(
+                    {
+                        "id": paragraph_id,
+                        "document_id": document.id,
+                        "section_id": section_id,
+                        "p_index": p_index,
+                        "text": html,
+                        "hash": paragraph_hash,
+                        "word_count": parsed.word_counts[position],
+                    }
+                )
+                sentence_inserts.extend(self._new_sentences(paragraph_id, parsed, position))
+                paragraph_ids.append(paragraph_id)
                 continue
 
-            if node.name in {"h1", "h2", "h3"}:
-                label = node.get_text(" ", strip=True) or f"Section {len(sections)}"
-                resolved_type = self._infer_section_type(label)
-                current_section = self._new_section(label, resolved_type)
-                sections.append(current_section)
-                continue
+            old = old_paragraphs[old_pos]
+            matched_old.add(old_pos)
+            paragraph_ids.append(old.id)
+
+            changes: Dict[str, object] = {}
+            if old.p_index != p_index:
+                changes["p_index"] = p_index
+            if old.section_id != section_id:
+                changes["section_id"] = section_id
+            if old.text != html:
+                changes["text"] = html
+            if old.hash != paragraph_hash:
+                # Nội dung đổi: embedding và trạng thái phân tích cũ không còn đúng
+                changes.update(
+                    hash=paragraph_hash,
+                    word_count=parsed.word_counts[position],
+                    emb=None,
+                    last_analyzed_version=None,
+                )
+            if changes:
+                paragraph_updates.append({"id": old.id, **changes})
+
+            self._diff_sentences(
+                old.id,
+                old_sentences.get(old.id, []),
+                parsed,
+                position,
+                sentence_updates,
+                sentence_inserts,
+                stale_sentence_ids,
+            )
 
-            paragraphs = self._extract_paragraphs(node)
-            if paragraphs:
-                current_section["paragraphs"].extend(paragraphs)
-
-        # Ensure each section has at least one placeholder paragraph
-        for section in sections:
-            if not section["paragraphs"]:
-                section["paragraphs"].extend(self._paragraph_from_text(""))
-
-        return sections
-
-    def _extract_paragraphs(self, node: Tag) -> List[Dict[str, object]]:
-        if node.name in {"p", "blockquote"}:
-            return [self._build_paragraph_from_node(node)]
-
-        if node.name in {"ul", "ol"}:
-            list_type = "bullet" if node.name == "ul" else "ordered"
-            paragraphs: List[Dict[str, object]] = []
-            for li in node.find_all("li", recursive=False):
-                paragraphs.append(self._build_paragraph_from_node(li, list_type=list_type))
-            return paragraphs
-
-        if node.name == "hr":
-            return [self._build_paragraph_from_text("", html="<hr />", metadata={"divider": True})]
-
-        if node.name in {"div", "section", "article"}:
-            paragraphs: List[Dict[str, object]] = []
-            for child in node.children:
-                if isinstance(child, (Tag, NavigableString)):
-                    paragraphs.extend(
-                        self._extract_paragraphs(child) if isinstance(child, Tag) else self._paragraph_from_text(child)
-                    )
-            return paragraphs
-
-        text = node.get_text(" ", strip=True)
-        if text:
-            return [self._build_paragraph_from_node(node)]
-
-        return []
-
-    def _build_paragraph_from_node(self, node: Tag, list_type: Optional[str] = None) -> Dict[str, object]:
-        html_repr = self._node_to_html(node, list_type)
-        plain_text = node.get_text(" ", strip=True)
-        return self._build_paragraph_data(html_repr, plain_text)
-
-    def _paragraph_from_text(self, text: NavigableString | str) -> List[Dict[str, object]]:
-        return self._build_paragraph_from_text(str(text))
-
-    def _build_paragraph_from_text(self, text: str, html: Optional[str] = None, metadata: Optional[Dict[str, object]] = None) -> List[Dict[str, object]]:
-        html_repr = html or f"<p>{text}</p>"
-        return [self._build_paragraph_data(html_repr, text, metadata=metadata)]
-
-    def _build_paragraph_data(self, html_repr: str, plain_text: str, metadata: Optional[Dict[str, object]] = None) -> Dict[str, object]:
-        sentences = self._split_sentences(plain_text)
-        sentence_payload = [
+        stale_paragraph_ids = [row.id for pos, row in enumerate(old_paragraphs) if pos not in matched_old]
+        stale_sentence_ids.extend(
+            row.id for paragraph_id in stale_paragraph_ids for row in old_sentences.get(paragraph_id, [])
+        )
+
+        if old_paragraphs and (
+            paragraph_inserts
+            or sentence_inserts
+            or any("p_index" in u for u in paragraph_updates)
+            or any("s_index" in u for u in sentence_updates)
+        ):
+            self._defer_order_constraints()
+
+        if stale_sentence_ids:
+            self.db.execute(delete(Sentence).where(Sentence.id.in_(stale_sentence_ids)))
+        if stale_paragraph_ids:
+            self.db.execute(delete(Paragraph).where(Paragraph.id.in_(stale_paragraph_ids)))
+        if paragraph_updates:
+            self.db.execute(update(Paragraph), paragraph_updates)
+        if stale_section_ids:
+            self.db.execute(delete(DocumentSection).where(DocumentSection.id.in_(stale_section_ids)))
+        if paragraph_inserts:
+            self.db.execute(insert(Paragraph), paragraph_inserts)
+        if sentence_updates:
+            self.db.execute(update(Sentence), sentence_updates)
+        if sentence_inserts:
+            self.db.execute(insert(Sentence), sentence_inserts)
+
+        return paragraph_ids
+
+    def _diff_sentences(
+        self,
+        paragraph_id: UUID,
+        old_rows: List[Row],
+        parsed: ParsedDocument,
+        position: int,
+        updates: List[Dict[str, object]],
+        inserts: List[Dict[str, object]],
+        stale_ids: List[UUID],
+    ) -> None:
+        """Same matching as paragraphs, one level down; rewritten sentences lose role/embedding."""
+        old_hashes = [row.hash for row in old_rows]
+        new_hashes = parsed.sentence_hashes(position)
+        if old_hashes == new_hashes:
+            return
+
+        numbers = parsed.sentence_range(position)
+        matches = self._match_by_hash(old_hashes, new_hashes)
+        matched_old = set()
+        for s_index, sentence_hash in enumerate(new_hashes):
+            old_pos = matches.get(s_index)
+            if old_pos is None:
+                inserts.extend(self._new_sentences(paragraph_id, parsed, position, [s_index]))
+                continue
+            old = old_rows[old_pos]
+            matched_old.add(old_pos)
+            changes: Dict[str, object] = {}
+            if old.s_index != s_index:
+                changes["s_index"] = s_index
+            if old.hash != sentence_hash:
+                changes.update(
+                    text=parsed.sentence_text(numbers[s_index]),
+                    hash=sentence_hash,
+                    role=None,
+                    emb=None,
+                    confidence_score=None,
+                )
+            if changes:
+                updates.append({"id": old.id, **changes})
+        stale_ids.extend(row.id for pos, row in enumerate(old_rows) if pos not in matched_old)
+
+    @staticmethod
+    def _new_sentences(
+        paragraph_id: UUID,
+        parsed: ParsedDocument,
+        position: int,
+        s_indexes: Optional[Iterable[int]] = None,
+    ) -> List[Dict[str, object]]:
+        """Sentence rows for paragraph ``position`` (all of its sentences unless ``s_indexes`` is given)."""
+        numbers = parsed.sentence_range(position)
+        return [
             {
-                "text": sentence,
-                "hash": hashlib.md5(sentence.encode("utf-8")).hexdigest(),
+                "id": uuid.uuid4(),
+                "paragraph_id": paragraph_id,
+                "s_index": s_index,
+                "text": parsed.sentence_text(numbers[s_index]),
+                "hash": parsed.sentence_hash(numbers[s_index]),
                 "role": None,
+                "confidence_score": None,
             }
-            for sentence in sentences
+            for s_index in (range(len(numbers)) if s_indexes is None else s_indexes)
         ]
-        payload: Dict[str, object] = {
-            "html": html_repr,
-            "plain_text": plain_text,
-            "word_count": len(plain_text.split()) if plain_text else 0,
-            "hash": hashlib.md5((plain_text or html_repr).encode("utf-8")).hexdigest(),
-            "sentences": sentence_payload,
-        }
-        if metadata:
-            payload["metadata"] = metadata
-        return payload
 
-    def _split_sentences(self, text: str) -> List[str]:
-        clean = text.strip()
-        if not clean:
-            return []
-        parts = re.split(r"(?<=[.!?])\s+", clean)
-        return [part.strip() for part in parts if part.strip()]
+    @staticmethod
+    def _match_by_hash(old_hashes: List[str], new_hashes: List[str]) -> Dict[int, int]:
+        """
+        Map new positions to old positions.
+
+        1. Runs that are unchanged in place (longest common subsequence blocks).
+        2. Identical content elsewhere → a move, the row is reused.
+        3. Remaining rows inside a replaced block are paired by position → an edit.
+        Anything left is an insert (new side) or a delete (old side).
+        """
+        matcher = SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+        opcodes = matcher.get_opcodes()
+        matches: Dict[int, int] = {}
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == "equal":
+                matches.update(zip(range(j1, j2), range(i1, i2)))
+
+        used_old = set(matches.values())
+        free_old: Dict[str, deque] = {}
+        for pos, value in enumerate(old_hashes):
+            if pos not in used_old:
+                free_old.setdefault(value, deque()).append(pos)
+        for pos, value in enumerate(new_hashes):
+            if pos not in matches and free_old.get(value):
+                matches[pos] = free_old[value].popleft()
+                used_old.add(matches[pos])
+
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag != "replace":
+                continue
+            olds = [i for i in range(i1, i2) if i not in used_old]
+            news = [j for j in range(j1, j2) if j not in matches]
+            for j, i in zip(news, olds):
+                matches[j] = i
+                used_old.add(i)
+        return matches
+
+    def _build_term_index(self, parsed: ParsedDocument, paragraph_ids: List[str]) -> Dict[str, object]:
+        """Index reliable definitions (spelled-out acronyms, "X là Y") from the sentences split above."""
+        index = build_term_index(parsed.sentences(position) for position in range(len(parsed)))
+        for entry in index["terms"].values():
+            entry["paragraph_id"] = paragraph_ids[entry["p"]]
+            entry["p_index"] = entry.pop("p") + 1
+            entry["s_index"] = entry.pop("s")
+        return index
 
-    def _node_to_html(self, node: Tag, list_type: Optional[str]) -> str:
-        if list_type:
-            inner = node.decode_contents().strip()
-            return f"<p data-list-type=\"{list_type}\">{inner}</p>"
+    # ---------------------------------------------------------------------
+    # Parsing helpers
+    # ---------------------------------------------------------------------
+    def _parse_document(self, html: str) -> ParsedDocument:
+        return self._build_document(get_html_parser().iter_blocks(html))
+
+    def _build_document(self, blocks: Iterable[Block]) -> ParsedDocument:
+        parsed = ParsedDocument()
+        parsed.add_heading("Main Section", SectionType.CUSTOM.value)
+
+        for block in blocks:
+            if block.kind == "heading":
+                self._close_section(parsed)
+                label = block.text or f"Section {len(parsed.sections)}"
+                parsed.add_heading(label, self._infer_section_type(label), heading_html=block.html)
+                continue
+            parsed.add_paragraph(block.html, block.text, metadata=block.metadata)
 
-        if node.name in {"p", "blockquote", "li"}:
-            return str(node)
+        self._close_section(parsed)
+        return parsed.finish()
 
-        inner_html = node.decode_contents().strip() or node.get_text(" ", strip=True)
-        return f"<p>{inner_html}</p>"
+    @staticmethod
+    def _close_section(parsed: ParsedDocument) -> None:
+        """Ensure each section has at least one placeholder paragraph."""
+        section = parsed.sections[-1]
+        if section.first == section.stop:
+            parsed.add_paragraph("<p></p>", "")
 
     def _infer_section_type(self, label: str) -> str:
         normalized = label.lower()
@@ -228,8 +436,5 @@ class DocumentCanvasSyncService:
                 return section_value
         return SectionType.CUSTOM.value
 
-    def _new_section(self, label: str, section_type: str) -> Dict[str, object]:
-        return {"label": label, "type": section_type, "paragraphs": []}
-
 
 __all__ = ["DocumentCanvasSyncService"]
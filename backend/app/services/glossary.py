@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.ai.models.term_detector import normalize_term_key as term_key
+from app.models.glossary import UserGlossaryTerm
+
+# Số user tối đa giữ glossary trong RAM (LRU)
+MAX_CACHED_USERS = 256
+
+
+_glossaries: "OrderedDict[str, Dict[str, Dict[str, Any]]]" = OrderedDict()
+_glossaries_lock = threading.Lock()
+
+
+class GlossaryService:
+    """Per-user glossary of terms the user has already defined somewhere.
+
+    The table is the source of truth; each process keeps an LRU of loaded
+    glossaries so lookups after the first one never hit the database. Cached
+    dicts are never mutated: recording new definitions swaps in a new dict, so
+    a glossary returned by ``known_terms`` stays safe to iterate.
+    """
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def known_terms(self, user_id: UUID) -> Dict[str, Dict[str, Any]]:
+        """Return ``{term_key: {"term", "definition", "first_defined_at", "source_document_id"}}``."""
+        key = str(user_id)
+        with _glossaries_lock:
+            glossary = _glossaries.get(key)
+            if glossary is not None:
+                _glossaries.move_to_end(key)
+                return glossary
+
+        rows = (
+            self.db.query(
+                UserGlossaryTerm.term_key,
+                UserGlossaryTerm.term,
+                UserGlossaryTerm.definition_text,
+                UserGlossaryTerm.first_defined_at,
+                UserGlossaryTerm.source_document_id,
+            )
+            .filter(UserGlossaryTerm.user_id == user_id)
+            .all()
+        )
+        glossary = {
+            row.term_key: {
+                "term": row.term,
+                "definition": row.definition_text,
+                "first_defined_at": row.first_defined_at,
+                "source_document_id": str(row.source_document_id) if row.source_document_id else None,
+            }
+            for row in rows
+        }
+        with _glossaries_lock:
+            _glossaries[key] = glossary
+            while len(_glossaries) > MAX_CACHED_USERS:
+                _glossaries.popitem(last=False)
+        return glossary
+
+    def record_definitions(
+        self,
+        user_id: UUID,
+        defined_terms: List[Dict[str, Any]],
+        document_id: Optional[UUID] = None,
+    ) -> int:
+        """Upsert newly defined terms in one statement; returns how many were new.
+
+        Terms without a definition text are skipped. The first
+        definition wins: later sightings only bump ``times_seen``.
+        """
+        known = self.known_terms(user_id)
+        values: Dict[str, Dict[str, Any]] = {}
+        for item in defined_terms:
+            term = (item.get("term") or "").strip()
+            if not term or not item.get("definition_found") or item.get("source") == "glossary":
+                continue
+            values.setdefault(
+                term_key(term),
+                {
+                    "user_id": user_id,
+                    "term": term,
+                    "term_key": term_key(term),
+                    "definition_text": item.get("definition_found"),
+                    "source_document_id": document_id,
+                    "first_defined_at": item.get("first_appeared"),
+                    "times_seen": 1,
+                },
+            )
+        if not values:
+            return 0
+
+        stmt = insert(UserGlossaryTerm).values(list(values.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserGlossaryTerm.user_id, UserGlossaryTerm.term_key],
+            set_={
+                "times_seen": UserGlossaryTerm.times_seen + 1,
+                "updated_at": func.now(),
+            },
+        )
+        self.db.execute(stmt)
+        self.db.commit()
+
+        new_rows = {k: row for k, row in values.items() if k not in known}
+        key = str(user_id)
+        with _glossaries_lock:
+            cached = _glossaries.get(key)
+            if cached is not None:
+                glossary = dict(cached)
+                for k, row in new_rows.items():
+                    glossary.setdefault(
+                        k,
+                        {
+                            "term": row["term"],
+                            "definition": row["definition_text"],
+                            "first_defined_at": row["first_defined_at"],
+                            "source_document_id": str(document_id) if document_id else None,
+                        },
+                    )
+                _glossaries[key] = glossary
+        return len(new_rows)
+
+
+def invalidate_glossary(user_id: UUID) -> None:
+    """Drop a user's cached glossary, e.g. after their rows were deleted."""
+    with _glossaries_lock:
+        _glossaries.pop(str(user_id), None)
+
+
+__all__ = ["GlossaryService", "invalidate_glossary"]
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+from app.core.config import get_settings
+
+HEADING_TAGS = frozenset({"h1", "h2", "h3"})
+CONTAINER_TAGS = frozenset({"div", "section", "article"})
+
+
+class Block(NamedTuple):
+    """One top-level item of the canvas: a section heading or a paragraph."""
+
+    kind: str  # "heading" | "paragraph"
+    html: str
+    text: str
+    metadata: Optional[Dict[str, object]] = None
+
+
+def _text_block(text: str) -> Block:
+    return Block("paragraph", f"<p>{text}</p>", text)
+
+
+def _divider_block() -> Block:
+    return Block("paragraph", "<hr />", "", {"divider": True})
+
+
+class HtmlParserBackend:
+    """Turns TipTap HTML into a flat stream of heading/paragraph blocks.
+
+    For the HTML TipTap produces, every backend must yield exactly what
+    BeautifulSoupBackend yields (same HTML serialization, same plain text), so
+    switching backends never changes paragraph hashes.
+    """
+
+    name = "base"
+
+    def iter_blocks(self, html: str) -> Iterator[Block]:
+        raise NotImplementedError
+
+
+class BeautifulSoupBackend(HtmlParserBackend):
+    """Reference implementation on BeautifulSoup + the stdlib html.parser."""
+
+    name = "bs4"
+
+    def iter_blocks(self, html: str) -> Iterator[Block]:
+        soup = BeautifulSoup(html or "", "html.parser")
+        container = soup.body or soup
+        for node in container.children:
+            if isinstance(node, NavigableString):
+                text = node.strip()
+                if text:
+                    yield _text_block(text)
+                continue
+            if not isinstance(node, Tag):
+                continue
+            if node.name in HEADING_TAGS:
+                yield Block("heading", str(node), node.get_text(" ", strip=True))
+                continue
+            yield from self._paragraphs(node)
+
+    def _paragraphs(self, node: Tag) -> Iterator[Block]:
+        if node.name in {"p", "blockquote"}:
+            yield Block("paragraph", str(node), node.get_text(" ", strip=True))
+        elif node.name in {"ul", "ol"}:
+            list_type = "bullet" if node.name == "ul" else "ordered"
+            for li in node.find_all("li", recursive=False):
+                inner = li.decode_contents().strip()
+                yield Block("paragraph", f"<p data-list-type=\"{list_type}\">{inner}</p>", li.get_text(" ", strip=True))
+        elif node.name == "hr":
+            yield _divider_block()
+        elif node.name in CONTAINER_TAGS:
+            for child in node.children:
+                if isinstance(child, Tag):
+                    yield from self._paragraphs(child)
+                elif isinstance(child, NavigableString):
+                    yield _text_block(str(child))
+        else:
+            text = node.get_text(" ", strip=True)
+            if text:
+                if node.name == "li":
+                    yield Block("paragraph", str(node), text)
+                else:
+                    inner_html = node.decode_contents().strip() or text
+                    yield Block("paragraph", f"<p>{inner_html}</p>", text)
+
+
+class SelectolaxBackend(HtmlParserBackend):
+    """Same output as BeautifulSoupBackend on top of selectolax's C (lexbor) parser.
+
+    Serialization and text extraction are done here rather than with the
+    parser's own helpers so that they match BeautifulSoup's "minimal"
+    formatter byte for byte.
+
+    Parity only holds for well-formed input. lexbor builds the tree with the
+    HTML5 algorithm, html.parser does not, so malformed HTML comes out
+    differently (see EDGE_CASES in benchmark_html_parsers.py):
+
+    - ``<p>a <p>b`` closes the first paragraph (two blocks, bs4 nests them);
+    - ``<p><div>x</div></p>`` splits into ``<p></p>``, ``<p>x</p>``, ``<p></p>``;
+    - tables gain an implied ``<tbody>``;
+    - a comment before the first element is dropped (bs4 keeps its text).
+
+    Hence bs4 stays the default HTML_PARSER_BACKEND.
+    """
+
+    name = "selectolax"
+
+    TEXT_TAG = "-text"
+    COMMENT_TAGS = frozenset({"_comment", "!comment", "-comment"})
+    # BeautifulSoup's HTMLTreeBuilder.empty_element_tags → rendered as <br/>
+    VOID_TAGS = frozenset({
+        "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem",
+        "meta", "param", "source", "track", "wbr", "basefont", "bgsound", "command", "frame",
+        "image", "isindex", "nextid", "spacer",
+    })
+    # Whitespace-separated attributes that BeautifulSoup re-joins with single spaces
+    LIST_ATTRIBUTES = frozenset({"class", "rel", "rev", "accept-charset", "headers", "accesskey", "dropzone"})
+    # Strings that get_text() skips and the formatter does not escape
+    RAW_TEXT_TAGS = frozenset({"script", "style", "template"})
+
+    def __init__(self) -> None:
+        # Import lazily so the dependency is only needed when this backend is selected
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parser_cls = LexborHTMLParser
+
+    def iter_blocks(self, html: str) -> Iterator[Block]:
+        tree = self._parser_cls(html or "")
+        if tree.body is None:
+            return
+        for node in tree.body.iter(include_text=True):
+            tag = node.tag
+            if tag == self.TEXT_TAG or tag in self.COMMENT_TAGS:
+                text = self._raw_string(node).strip()
+                if text:
+                    yield _text_block(text)
+                continue
+            if tag in HEADING_TAGS:
+                yield Block("heading", self._outer_html(node), self._get_text(node))
+                continue
+            yield from self._paragraphs(node)
+
+    def _paragraphs(self, node) -> Iterator[Block]:
+        tag = node.tag
+        if tag in {"p", "blockquote"}:
+            yield Block("paragraph", self._outer_html(node), self._get_text(node))
+        elif tag in {"ul", "ol"}:
+            list_type = "bullet" if tag == "ul" else "ordered"
+            for li in node.iter():
+                if li.tag == "li":
+                    inner = self._inner_html(li).strip()
+                    yield Block("paragraph", f"<p data-list-type=\"{list_type}\">{inner}</p>", self._get_text(li))
+        elif tag == "hr":
+            yield _divider_block()
+        elif tag in CONTAINER_TAGS:
+            for child in node.iter(include_text=True):
+                if child.tag == self.TEXT_TAG or child.tag in self.COMMENT_TAGS:
+                    yield _text_block(self._raw_string(child))
+                else:
+                    yield from self._paragraphs(child)
+        else:
+            text = self._get_text(node)
+            if text:
+                if tag == "li":
+                    yield Block("paragraph", self._outer_html(node), text)
+                else:
+                    inner_html = self._inner_html(node).strip() or text
+                    yield Block("paragraph", f"<p>{inner_html}</p>", text)
+
+    # -- text ---------------------------------------------------------------
+    def _raw_string(self, node) -> str:
+        if node.tag in self.COMMENT_TAGS:
+            return node.html[4:-3]
+        return node.text(deep=False) or ""
+
+    def _get_text(self, node) -> str:
+        """Equivalent of Tag.get_text(" ", strip=True)."""
+        parts: List[str] = []
+        self._collect_text(node, parts)
+        return " ".join(parts)
+
+    def _collect_text(self, node, parts: List[str]) -> None:
+        for child in node.iter(include_text=True):
+            tag = child.tag
+            if tag == self.TEXT_TAG:
+                text = (child.text(deep=False) or "").strip()
+                if text:
+                    parts.append(text)
+            elif tag not in self.COMMENT_TAGS and tag not in self.RAW_TEXT_TAGS:
+                self._collect_text(child, parts)
+
+    # -- serialization ------------------------------------------------------
+    @staticmethod
+    def _escape(value: str) -> str:
+        return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+    def _quoted_attribute(self, name: str, value: Optional[str]) -> str:
+        value = value or ""
+        if name in self.LIST_ATTRIBUTES:
+            value = " ".join(value.split())
+        value = self._escape(value)
+        quote = '"'
+        if '"' in value:
+            if "'" in value:
+                value = value.replace('"', "&quot;")
+            else:
+                quote = "'"
+        return f"{name}={quote}{value}{quote}"
+
+    def _outer_html(self, node) -> str:
+        out: List[str] = []
+        self._serialize(node, out, raw=False)
+        return "".join(out)
+
+    def _inner_html(self, node) -> str:
+        out: List[str] = []
+        raw = node.tag in self.RAW_TEXT_TAGS
+        for child in node.iter(include_text=True):
+            self._serialize(child, out, raw)
+        return "".join(out)
+
+    def _serialize(self, node, out: List[str], raw: bool) -> None:
+        tag = node.tag
+        if tag == self.TEXT_TAG:
+            text = node.text(deep=False) or ""
+            out.append(text if raw else self._escape(text))
+            return
+        if tag in self.COMMENT_TAGS:
+            out.append(node.html)
+            return
+
+        out.append("<" + tag)
+        # BeautifulSoup's formatter emits attributes in sorted order
+        for name, value in sorted(node.attributes.items()):
+            out.append(" " + self._quoted_attribute(name, value))
+        if tag in self.VOID_TAGS:
+            out.append("/>")
+            return
+        out.append(">")
+        child_raw = tag in self.RAW_TEXT_TAGS
+        for child in node.iter(include_text=True):
+            self._serialize(child, out, child_raw)
+        out.append(f"</{tag}>")
+
+
+HTML_PARSER_BACKENDS = {
+    BeautifulSoupBackend.name: BeautifulSoupBackend,
+    SelectolaxBackend.name: SelectolaxBackend,
+}
+
+_backends: Dict[str, HtmlParserBackend] = {}
+
+
+def get_html_parser(name: Optional[str] = None) -> HtmlParserBackend:
+    """Backend named by ``name`` or Settings.HTML_PARSER_BACKEND (falls back to bs4)."""
+    name = (name or get_settings().HTML_PARSER_BACKEND or BeautifulSoupBackend.name).lower()
+    backend = _backends.get(name)
+    if backend is not None:
+        return backend
+
+    backend_cls = HTML_PARSER_BACKENDS.get(name)
+    if backend_cls is None:
+        raise ValueError(f"Unknown HTML parser backend '{name}'. Use one of: {', '.join(HTML_PARSER_BACKENDS)}")
+    try:
+        backend = backend_cls()
+    except ImportError:
+        print(f"⚠️ HTML parser backend '{name}' is not installed; falling back to bs4")
+        backend = BeautifulSoupBackend()
+    _backends[name] = backend
+    return backend
+
+
+__all__ = [
+    "Block",
+    "BeautifulSoupBackend",
+    "HTML_PARSER_BACKENDS",
+    "HtmlParserBackend",
+    "SelectolaxBackend",
+    "get_html_parser",
+]
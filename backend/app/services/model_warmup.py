@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import Settings
+
+
+class ModelWarmupState:
+    """Per-model warm state reported by the readiness endpoint.
+
+    Every model goes through ``pending -> loading -> warm`` (or ``failed``).
+    The worker is ready when preloading is disabled, or when every planned
+    model finished warming up.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.enabled = False
+        self.finished = False
+        self.models: Dict[str, Dict[str, Any]] = {}
+
+    def plan(self, models: List[Tuple[str, str]]) -> None:
+        with self._lock:
+            self.enabled = True
+            self.finished = False
+            self.models = {
+                f"{kind}:{name}": {"kind": kind, "name": name, "status": "pending"}
+                for kind, name in models
+            }
+
+    def update(self, kind: str, name: str, **fields: Any) -> None:
+        with self._lock:
+            self.models.setdefault(f"{kind}:{name}", {"kind": kind, "name": name}).update(fields)
+
+    def finish(self) -> None:
+        with self._lock:
+            self.finished = True
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            if not self.enabled:
+                return True
+            return self.finished and all(m["status"] == "warm" for m in self.models.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        # Model registry is torch-free, safe to import even when preloading is off
+        from app.ai.models.model_registry import model_registry
+
+        with self._lock:
+            models = [dict(m) for m in self.models.values()]
+            enabled, finished = self.enabled, self.finished
+
+        # A warm model can still be evicted later by the registry RAM budget
+        resident = {(m["kind"], m["name"]) for m in model_registry.stats()["models"]}
+        for model in models:
+            model["resident"] = (model["kind"], model["name"]) in resident
+        return {
+            "ready": self.is_ready(),
+            "preload_enabled": enabled,
+            "preload_finished": finished,
+            "models": models,
+        }
+
+
+warmup_state = ModelWarmupState()
+
+
+def planned_models(settings: Settings) -> List[Tuple[str, str]]:
+    """(kind, name) of every model to preload, resolved from settings."""
+    from app.ai.models import contradictions
+
+    models: List[Tuple[str, str]] = []
+    for mode in [m.strip() for m in settings.PRELOAD_NLI_MODES.split(",") if m.strip()]:
+        models.append((contradictions.NLI_KIND, contradictions.resolve_nli_model_path(mode)))
+    if contradictions.STUDENT_MODEL:
+        models.append((contradictions.NLI_KIND, contradictions.STUDENT_MODEL))
+    if settings.PRELOAD_EMBEDDING_MODEL:
+        models.append((contradictions.EMBEDDING_KIND, settings.PRELOAD_EMBEDDING_MODEL))
+    return models
+
+
+def run_model_warmup(settings: Settings) -> None:
+    """Load every planned model and run one synthetic batch through it."""
+    try:
+        # Import lazily: this pulls torch/transformers into the worker
+        from app.ai.models import contradictions
+
+        models = planned_models(settings)
+    except Exception as exc:  # noqa: BLE001 - surfaced through readiness
+        warmup_state.plan([])
+        warmup_state.update("nli", "*", status="failed", error=str(exc))
+        warmup_state.finish()
+        print(f"❌ Model preload failed: {exc}")
+        return
+
+    warmup_state.plan(models)
+    for kind, name in models:
+        warmup_state.update(kind, name, status="loading")
+        started = time.perf_counter()
+        try:
+            if kind == contradictions.NLI_KIND:
+                warmup_seconds = contradictions.warmup_nli_model(
+                    name,
+                    batch_size=settings.WARMUP_BATCH_SIZE,
+                    max_length=settings.WARMUP_MAX_LENGTH,
+                )
+            else:
+                warmup_seconds = contradictions.warmup_embedding_model(name)
+        except Exception as exc:  # noqa: BLE001 - surfaced through readiness
+            warmup_state.update(kind, name, status="failed", error=str(exc))
+            print(f"❌ Warmup failed for {kind} model {name}: {exc}")
+            continue
+
+        total = time.perf_counter() - started
+        warmup_state.update(
+            kind,
+            name,
+            status="warm",
+            total_seconds=round(total, 3),
+            warmup_seconds=round(warmup_seconds, 3),
+            warmed_at=time.time(),
+        )
+        print(f"🔥 Warm {kind} model {name} in {total:.2f}s")
+
+    warmup_state.finish()
+
+
+def start_model_warmup(settings: Settings) -> Optional[threading.Thread]:
+    """Start preloading in a background thread so liveness checks keep answering."""
+    if not settings.PRELOAD_MODELS:
+        return None
+
+    # Mark as not ready before the thread resolves the model list
+    warmup_state.plan([])
+    thread = threading.Thread(
+        target=run_model_warmup, args=(settings,), name="model-warmup", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+__all__ = [
+    "ModelWarmupState",
+    "planned_models",
+    "run_model_warmup",
+    "start_model_warmup",
+    "warmup_state",
+]
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import hashlib
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.utils.nlp import iter_sentence_spans
+
+_DIGEST_SIZE = 16  # md5
+
+
+def _digest(value: str) -> bytes:
+    return hashlib.md5(value.encode("utf-8")).digest()
+
+
+class ParsedSection:
+    """A heading and the range of paragraph positions ``[first, stop)`` under it."""
+
+    __slots__ = ("label", "type", "heading_html", "first", "stop")
+
+    def __init__(self, label: str, section_type: str, heading_html: Optional[str], first: int) -> None:
+        self.label = label
+        self.type = section_type
+        self.heading_html = heading_html
+        self.first = first
+        self.stop = first
+
+    @property
+    def paragraph_range(self) -> range:
+        return range(self.first, self.stop)
+
+
+class ParsedDocument:
+    """Canvas structure held in one text buffer plus offset arrays.
+
+    Paragraph plain text is appended to a single buffer; paragraphs and
+    sentences are ``(start, end)`` pairs into it and their md5 digests are
+    packed 16 bytes apiece. Sentence strings only exist while a caller asks
+    for them (``sentence_text``), so a book-length document costs one copy of
+    its text, its paragraph HTML and a few machine words per sentence instead
+    of a dict per paragraph and per sentence.
+
+    Build it with ``add_heading``/``add_paragraph`` and call ``finish`` once.
+    """
+
+    __slots__ = (
+        "sections",
+        "html",
+        "metadata",
+        "text",
+        "paragraph_bounds",
+        "word_counts",
+        "paragraph_digests",
+        "sentence_offsets",
+        "sentence_bounds",
+        "sentence_digests",
+        "_parts",
+        "_length",
+    )
+
+    def __init__(self) -> None:
+        self.sections: List[ParsedSection] = []
+        self.html: List[str] = []
+        self.metadata: Dict[int, Dict[str, object]] = {}
+        self.text = ""
+        self.paragraph_bounds = array("L")
+        self.word_counts = array("L")
+        self.paragraph_digests = bytearray()
+        # Sentences of paragraph i are sentence_offsets[i] .. sentence_offsets[i + 1]
+        self.sentence_offsets = array("L", [0])
+        self.sentence_bounds = array("L")
+        self.sentence_digests = bytearray()
+        self._parts: List[str] = []
+        self._length = 0
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+    def add_heading(self, label: str, section_type: str, heading_html: Optional[str] = None) -> ParsedSection:
+        section = ParsedSection(label, section_type, heading_html, len(self.html))
+        self.sections.append(section)
+        return section
+
+    def add_paragraph(self, html: str, text: str, metadata: Optional[Dict[str, object]] = None) -> int:
+        position = len(self.html)
+        start = self._length
+        self.html.append(html)
+        if metadata:
+            self.metadata[position] = metadata
+        self.paragraph_bounds.extend((start, start + len(text)))
+        self.word_counts.append(len(text.split()))
+        self.paragraph_digests += _digest(text or html)
+
+        for s_start, s_end in iter_sentence_spans(text):
+            self.sentence_bounds.extend((start + s_start, start + s_end))
+            self.sentence_digests += _digest(text[s_start:s_end])
+        self.sentence_offsets.append(len(self.sentence_bounds) // 2)
+
+        # Paragraphs are separated in the buffer so sentence offsets never touch
+        self._parts.append(text)
+        self._parts.append("\n")
+        self._length += len(text) + 1
+        if self.sections:
+            self.sections[-1].stop = position + 1
+        return position
+
+    def finish(self) -> "ParsedDocument":
+        self.text = "".join(self._parts)
+        self._parts = []
+        return self
+
+    # ------------------------------------------------------------------
+    # Paragraphs
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.html)
+
+    def paragraph_text(self, position: int) -> str:
+        return self.text[self.paragraph_bounds[2 * position]:self.paragraph_bounds[2 * position + 1]]
+
+    def paragraph_hash(self, position: int) -> str:
+        offset = position * _DIGEST_SIZE
+        return self.paragraph_digests[offset:offset + _DIGEST_SIZE].hex()
+
+    def paragraph_hashes(self) -> List[str]:
+        return [self.paragraph_hash(position) for position in range(len(self.html))]
+
+    # ------------------------------------------------------------------
+    # Sentences
+    # ------------------------------------------------------------------
+    def sentence_range(self, position: int) -> range:
+        """Global sentence numbers of a paragraph (``s_index`` = number - range.start)."""
+        return range(self.sentence_offsets[position], self.sentence_offsets[position + 1])
+
+    def sentence_text(self, number: int) -> str:
+        return self.text[self.sentence_bounds[2 * number]:self.sentence_bounds[2 * number + 1]]
+
+    def sentence_hash(self, number: int) -> str:
+        offset = number * _DIGEST_SIZE
+        return self.sentence_digests[offset:offset + _DIGEST_SIZE].hex()
+
+    def sentence_hashes(self, position: int) -> List[str]:
+        return [self.sentence_hash(number) for number in self.sentence_range(position)]
+
+    def sentences(self, position: int) -> List[str]:
+        return [self.sentence_text(number) for number in self.sentence_range(position)]
+
+    def iter_sentences(self, position: int) -> Iterator[Tuple[int, str, str]]:
+        """``(s_index, text, hash)`` for each sentence of a paragraph."""
+        numbers = self.sentence_range(position)
+        for number in numbers:
+            yield number - numbers.start, self.sentence_text(number), self.sentence_hash(number)
+
+
+__all__ = ["ParsedDocument", "ParsedSection"]
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.services.html_parsers import HEADING_TAGS, Block
+
+ProseMirrorNode = Dict[str, Any]
+
+# ProseMirror node type → (tag, ...) wrappers, outermost first
+_NODE_TAGS = {
+    "paragraph": ("p",),
+    "blockquote": ("blockquote",),
+    "bulletList": ("ul",),
+    "orderedList": ("ol",),
+    "taskList": ("ul",),
+    "listItem": ("li",),
+    "taskItem": ("li",),
+    "codeBlock": ("pre", "code"),
+    "table": ("table", "tbody"),
+    "tableRow": ("tr",),
+    "tableCell": ("td",),
+    "tableHeader": ("th",),
+}
+_VOID_NODES = {"horizontalRule": "hr", "hardBreak": "br", "image": "img"}
+_LIST_TYPES = {"bulletList": "bullet", "taskList": "bullet", "orderedList": "ordered"}
+
+_MARK_TAGS = {
+    "bold": "strong",
+    "italic": "em",
+    "strike": "s",
+    "underline": "u",
+    "code": "code",
+    "link": "a",
+    "highlight": "mark",
+    "subscript": "sub",
+    "superscript": "sup",
+    "textStyle": "span",
+}
+
+
+def _escape(value: str) -> str:
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _open_tag(tag: str, attrs: Dict[str, Any], void: bool = False) -> str:
+    parts = [tag]
+    # Sorted like BeautifulSoup's formatter so the HTML matches what the bs4 backend stores
+    for name, value in sorted(attrs.items()):
+        if value is None or value is False:
+            continue
+        value = _escape(str(value))
+        quote = '"'
+        if '"' in value:
+            if "'" in value:
+                value = value.replace('"', "&quot;")
+            else:
+                quote = "'"
+        parts.append(f"{name}={quote}{value}{quote}")
+    return "<" + " ".join(parts) + ("/>" if void else ">")
+
+
+def _node_attrs(node: ProseMirrorNode) -> List[Dict[str, Any]]:
+    """HTML attributes for each wrapper tag of ``node`` (same length as its tag tuple)."""
+    node_type = node.get("type")
+    attrs = node.get("attrs") or {}
+    align = attrs.get("textAlign")
+    style = {"style": f"text-align: {align}"} if align and align != "left" else {}
+
+    if node_type == "codeBlock":
+        language = attrs.get("language")
+        return [{}, {"class": f"language-{language}"} if language else {}]
+    if node_type == "orderedList":
+        start = attrs.get("start")
+        return [{"start": start} if start not in (None, 1) else {}]
+    if node_type in {"taskList", "taskItem"}:
+        extra = {"data-checked": str(bool(attrs.get("checked"))).lower()} if node_type == "taskItem" else {}
+        return [{"data-type": node_type, **extra}]
+    if node_type in {"tableCell", "tableHeader"}:
+        return [{key: attrs[key] for key in ("colspan", "rowspan") if attrs.get(key) not in (None, 1)}]
+    if node_type == "table":
+        return [{}, {}]
+    return [style]
+
+
+def _tags(node: ProseMirrorNode) -> List[Tuple[str, Dict[str, Any]]]:
+    node_type = node.get("type")
+    if node_type == "heading":
+        level = (node.get("attrs") or {}).get("level") or 1
+        return [(f"h{min(max(int(level), 1), 6)}", _node_attrs(node)[0])]
+    tags = _NODE_TAGS.get(node_type)
+    if tags is None:
+        return []
+    return list(zip(tags, _node_attrs(node)))
+
+
+def _render_text(node: ProseMirrorNode, out: List[str]) -> None:
+    marks = node.get("marks") or []
+    closing: List[str] = []
+    for mark in marks:
+        tag = _MARK_TAGS.get(mark.get("type"))
+        if tag is None:
+            continue
+        attrs = mark.get("attrs") or {}
+        if tag == "a":
+            attrs = {key: attrs.get(key) for key in ("href", "target", "rel")}
+        elif tag == "mark":
+            attrs = {"data-color": attrs.get("color")}
+        elif tag == "span":
+            attrs = {"style": f"color: {attrs['color']}" if attrs.get("color") else None}
+        else:
+            attrs = {}
+        out.append(_open_tag(tag, attrs))
+        closing.append(f"</{tag}>")
+    out.append(_escape(node.get("text") or ""))
+    out.extend(reversed(closing))
+
+
+def _render_children(node: ProseMirrorNode, out: List[str]) -> None:
+    for child in node.get("content") or []:
+        _render_node(child, out)
+
+
+def _render_wrapped(node: ProseMirrorNode, tags: List[Tuple[str, Dict[str, Any]]], out: List[str]) -> None:
+    for tag, attrs in tags:
+        out.append(_open_tag(tag, attrs))
+    _render_children(node, out)
+    for tag, _attrs in reversed(tags):
+        out.append(f"</{tag}>")
+
+
+def _render_node(node: ProseMirrorNode, out: List[str]) -> None:
+    node_type = node.get("type")
+    if node_type == "text":
+        _render_text(node, out)
+        return
+    void_tag = _VOID_NODES.get(node_type)
+    if void_tag is not None:
+        attrs = node.get("attrs") or {}
+        img_attrs = {key: attrs.get(key) for key in ("src", "alt", "title")} if void_tag == "img" else {}
+        out.append(_open_tag(void_tag, img_attrs, void=True))
+        return
+    # Unknown node types are transparent: their children are rendered in place
+    _render_wrapped(node, _tags(node), out)
+
+
+def render_html(doc: Optional[ProseMirrorNode]) -> str:
+    """Serialize a TipTap/ProseMirror JSON document to HTML for ``content_full``."""
+    if not doc:
+        return ""
+    out: List[str] = []
+    if doc.get("type") == "doc":
+        _render_children(doc, out)
+    else:
+        _render_node(doc, out)
+    return "".join(out)
+
+
+def _inner_html(node: ProseMirrorNode) -> str:
+    out: List[str] = []
+    _render_wrapped(node, _tags(node)[1:], out)
+    return "".join(out)
+
+
+def _outer_html(node: ProseMirrorNode) -> str:
+    out: List[str] = []
+    _render_node(node, out)
+    return "".join(out)
+
+
+def _iter_text(node: ProseMirrorNode) -> Iterator[str]:
+    if node.get("type") == "text":
+        yield node.get("text") or ""
+        return
+    for child in node.get("content") or []:
+        yield from _iter_text(child)
+
+
+def get_text(node: ProseMirrorNode) -> str:
+    """Same as BeautifulSoup's ``get_text(" ", strip=True)`` on the rendered node."""
+    return " ".join(part for part in (text.strip() for text in _iter_text(node)) if part)
+
+
+def iter_blocks(doc: Optional[ProseMirrorNode]) -> Iterator[Block]:
+    """Walk the document straight into heading/paragraph blocks, without HTML parsing.
+
+    Yields exactly what the HTML parser backends yield for ``render_html(doc)``
+    so paragraph hashes do not depend on which format the editor sent.
+    """
+    for node in (doc or {}).get("content") or []:
+        yield from _blocks(node)
+
+
+def _blocks(node: ProseMirrorNode) -> Iterator[Block]:
+    node_type = node.get("type")
+    tags = _tags(node)
+    outer = tags[0][0] if tags else None
+
+    if node_type == "text":
+        text = (node.get("text") or "").strip()
+        if text:
+            yield Block("paragraph", f"<p>{text}</p>", text)
+    elif outer in HEADING_TAGS:
+        yield Block("heading", _outer_html(node), get_text(node))
+    elif node_type in {"paragraph", "blockquote"}:
+        yield Block("paragraph", _outer_html(node), get_text(node))
+    elif node_type in _LIST_TYPES:
+        list_type = _LIST_TYPES[node_type]
+        for item in node.get("content") or []:
+            inner = _inner_html(item).strip()
+            yield Block("paragraph", f"<p data-list-type=\"{list_type}\">{inner}</p>", get_text(item))
+    elif node_type == "horizontalRule":
+        yield Block("paragraph", "<hr />", "", {"divider": True})
+    elif outer is None and node_type not in _VOID_NODES:
+        # Transparent wrapper: behave like a <div> container
+        for child in node.get("content") or []:
+            yield from _blocks(child)
+    else:
+        text = get_text(node)
+        if text:
+            if outer == "li":
+                yield Block("paragraph", _outer_html(node), text)
+            else:
+                inner_html = _inner_html(node).strip() or text
+                yield Block("paragraph", f"<p>{inner_html}</p>", text)
+
+
+__all__ = ["ProseMirrorNode", "get_text", "iter_blocks", "render_html"]
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.document import Document
+from app.services.document_sync import DocumentCanvasSyncService
+
+# Số lock dùng để tuần tự hoá sync theo document (hash document_id → lock)
+SYNC_LOCK_STRIPES = 64
+
+
+class StructureSyncWorker:
+    """Rebuild DocumentSection/Paragraph/Sentence rows outside the save request.
+
+    In background mode a save only commits the document row (content and
+    ``version``) and calls ``enqueue``. The worker thread syncs the latest
+    content and sets ``Document.structure_version`` to the version it reflects,
+    so readers can tell whether the paragraph tables are current
+    (``structure_version == version``).
+
+    Documents waiting in the queue are kept once: any number of versions saved
+    while a document waits, or while it is being synced, cost one more sync.
+    In inline mode (the default) saves keep syncing in the request and the
+    thread is never started.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], background: bool = False) -> None:
+        self._session_factory = session_factory
+        self.background = background
+        self._pending: "OrderedDict[UUID, None]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._sync_locks = [threading.Lock() for _ in range(SYNC_LOCK_STRIPES)]
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"enqueued": 0, "synced": 0, "skipped": 0, "failed": 0}
+
+    # ------------------------------------------------------------------
+    # Request side
+    # ------------------------------------------------------------------
+    def enqueue(self, document_id: UUID) -> None:
+        """Schedule a sync of the document's latest content (call after the save committed)."""
+        with self._cond:
+            self._stats["enqueued"] += 1
+            self._pending[document_id] = None
+            self._cond.notify()
+
+    @contextmanager
+    def lock(self, document_id: UUID) -> Iterator[None]:
+        """Keep the worker away from a document while the caller edits its structure."""
+        with self._sync_locks[hash(document_id) % SYNC_LOCK_STRIPES]:
+            yield
+
+    def sync_now(self, db: Session, document: Document) -> bool:
+        """Bring a stale structure up to date in the caller's transaction (hold ``lock``).
+
+        Returns True if a sync was needed.
+        """
+        db.refresh(document)
+        if document.structure_version >= document.version:
+            return False
+        sync_structure(db, document)
+        return True
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    def start(self, recover: bool = True) -> Optional[threading.Thread]:
+        if not self.background or (self._thread and self._thread.is_alive()):
+            return self._thread
+        if recover:
+            self._enqueue_stale()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="structure-sync", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 30.0) -> int:
+        """Finish the queued syncs and stop (lifespan shutdown hook); returns how many were left."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        with self._cond:
+            return len(self._pending)
+
+    def _enqueue_stale(self) -> None:
+        """Documents saved before a crash/restart whose structure never caught up."""
+        db = self._session_factory()
+        try:
+            stale = db.execute(select(Document.id).where(Document.structure_version < Document.version)).scalars().all()
+        finally:
+            db.close()
+        for document_id in stale:
+            self.enqueue(document_id)
+        if stale:
+            print(f"🔁 Re-queued structural sync for {len(stale)} documents")
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                document_id, _ = self._pending.popitem(last=False)
+            self.process(document_id)
+
+    def process(self, document_id: UUID) -> bool:
+        """Sync one document if its structure is behind; True if rows were written."""
+        with self.lock(document_id):
+            db = self._session_factory()
+            try:
+                document = db.get(Document, document_id)
+                if document is None or document.structure_version >= document.version:
+                    self._count("skipped")
+                    return False
+                sync_structure(db, document)
+                db.commit()
+            except Exception as exc:  # noqa: BLE001 - next save or restart re-queues it
+                db.rollback()
+                self._count("failed")
+                print(f"⚠️ Structural sync failed for document {document_id}: {exc}")
+                return False
+            finally:
+                db.close()
+        self._count("synced")
+        return True
+
+    def _count(self, key: str) -> None:
+        with self._cond:
+            self._stats[key] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {"background": self.background, "pending": len(self._pending), **self._stats}
+
+
+def sync_structure(db: Session, document: Document) -> None:
+    """Sync the document's current content and mark the structure as matching its version."""
+    DocumentCanvasSyncService(db).sync(document, document.content_full, content_json=document.content_json)
+    document.structure_version = document.version
+
+
+_structure_sync_worker: Optional[StructureSyncWorker] = None
+
+
+def get_structure_sync_worker() -> StructureSyncWorker:
+    global _structure_sync_worker
+    if _structure_sync_worker is None:
+        from app.core.config import get_settings
+        from app.core.database import SessionLocal
+
+        mode = get_settings().STRUCTURE_SYNC_MODE.lower()
+        if mode not in {"inline", "background"}:
+            raise ValueError(f"Unknown STRUCTURE_SYNC_MODE '{mode}'. Use 'inline' or 'background'")
+        _structure_sync_worker = StructureSyncWorker(SessionLocal, background=mode == "background")
+    return _structure_sync_worker
+
+
+__all__ = ["StructureSyncWorker", "get_structure_sync_worker", "sync_structure"]
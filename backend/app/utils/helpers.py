@@ -2,6 +2,8 @@
 Helper utilities
 """
 import hashlib
+import json
+from typing import Any
 
 
 def generate_text_hash(text: str) -> str:
@@ -14,3 +16,15 @@ def truncate_string(text: str, max_length: int = 100) -> str:
     if len(text) <= max_length:
         return text
     return text[:max_length] + "..."
+
+
+def parse_llm_json(response_text: str) -> Any:
+    """Strip a markdown code fence (```json ... ```) around an LLM reply and parse the JSON"""
+    response_text = response_text.strip()
+    if response_text.startswith("```json"):
+        response_text = response_text[7:]
+    elif response_text.startswith("```"):
+        response_text = response_text[3:]
+    if response_text.endswith("```"):
+        response_text = response_text[:-3]
+    return json.loads(response_text.strip())
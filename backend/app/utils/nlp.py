@@ -78,37 +78,128 @@ def analyze_text_logic(text: str) -> dict:
     }
 
 
+# ---------------------------------------------------------------------------
+# Segmenter: paragraph / sentence spans over the ORIGINAL string
+# ---------------------------------------------------------------------------
+# Sentence boundary candidate: terminal punctuation (+ closing quotes/brackets) then whitespace
+_SENTENCE_BOUNDARY_RE = re.compile(r'([.!?…]+["\'”’)\]]*)\s+')
+_PARAGRAPH_BREAK_RE = re.compile(r'\n\n')
+_LINE_BREAK_RE = re.compile(r'\n')
+_LAST_TOKEN_RE = re.compile(r'([^\s(\["“‘\']+)$')
+_DOTTED_ABBREVIATION_RE = re.compile(r'(?:[a-z]\.)+[a-z]')
+_WHITESPACE_RE = re.compile(r'\s+')
+_TRAILING_PUNCT_RE = re.compile(r'[.!?]+$')
+
+# Tokens that end with "." without ending the sentence (compared lower-case, without the dot).
+# Numbering abbreviations ("No. 5", "Fig. 3", "pp. 10", "Q. 1", "p. 7") are left out on
+# purpose: a digit after the dot never starts a sentence, so they stay joined anyway,
+# while "The answer is no. We left." must still split.
+ABBREVIATIONS = frozenset({
+    # EN
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "vs", "al", "approx", "ca",
+    "inc", "ltd", "corp", "dept",
+    # VI
+    "tp", "ths", "ts", "pgs", "gs", "bs", "ks", "cn", "ttg", "tt",
+})
+_SENTENCE_OPENERS = frozenset('"\'“‘([')
+
+
+def _is_abbreviation(token: str) -> bool:
+    lowered = token.lower().rstrip(".")
+    if lowered in ABBREVIATIONS:
+        return True
+    # Initial: "J. Smith", "Nguyễn V. A."
+    if len(lowered) == 1 and token[0].isupper():
+        return True
+    # "e.g.", "i.e." (but "v.v." usually ends a Vietnamese sentence)
+    return lowered != "v.v" and bool(_DOTTED_ABBREVIATION_RE.fullmatch(lowered))
+
+
+def _trimmed(text: str, start: int, end: int):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end) if start < end else None
+
+
+def iter_paragraph_spans(text: str, split_lines: bool = False):
+    """
+    Yield (start, end) of each paragraph in `text`.
+
+    Paragraphs are separated by "\\n\\n", like extract_paragraphs always did.
+    With split_lines=True, text without any "\\n\\n" is split on single
+    newlines instead (one paragraph per line).
+    """
+    separator = _PARAGRAPH_BREAK_RE
+    if split_lines and not _PARAGRAPH_BREAK_RE.search(text):
+        separator = _LINE_BREAK_RE
+    pos = 0
+    for m in separator.finditer(text):
+        span = _trimmed(text, pos, m.start())
+        if span:
+            yield span
+        pos = m.end()
+    span = _trimmed(text, pos, len(text))
+    if span:
+        yield span
+
+
+def iter_sentence_spans(text: str, start: int = 0, end: int = None):
+    """
+    Yield (start, end) of each sentence in text[start:end], offsets into `text`.
+
+    A boundary is terminal punctuation followed by whitespace and a capital
+    letter (Vietnamese capitals included) or an opening quote/bracket.
+    Abbreviations ("Dr.", "e.g.", "TS."), initials ("J. Smith") and
+    decimals ("3.5") do not split.
+    """
+    end = len(text) if end is None else end
+    pos = start
+    for m in _SENTENCE_BOUNDARY_RE.finditer(text, start, end):
+        nxt = m.end()
+        if nxt < end and not (text[nxt].isupper() or text[nxt] in _SENTENCE_OPENERS):
+            continue
+        if text[m.start(1)] == "." and m.group(1).rstrip("\"'”’)]") == ".":
+            token = _LAST_TOKEN_RE.search(text, pos, m.start(1))
+            if token and _is_abbreviation(token.group(1)):
+                continue
+        span = _trimmed(text, pos, m.end(1))
+        if span:
+            yield span
+        pos = nxt
+    span = _trimmed(text, pos, end)
+    if span:
+        yield span
+
+
+def clean_sentence(sentence: str) -> str:
+    """Collapse whitespace and drop trailing . ! ? (the form fed to NLI / embeddings)."""
+    return _TRAILING_PUNCT_RE.sub('', _WHITESPACE_RE.sub(' ', sentence.strip())).strip()
+
+
+def iter_sentences(text: str, min_words: int = 0):
+    """Yield (clean_sentence, start, end) for sentences with at least `min_words` words."""
+    for start, end in iter_sentence_spans(text):
+        sentence = clean_sentence(text[start:end])
+        if sentence and len(sentence.split()) >= min_words:
+            yield sentence, start, end
+
+
 def extract_paragraphs(text: str) -> list:
     """Extract paragraphs from text"""
-    return [p.strip() for p in text.split('\n\n') if p.strip()]
+    return [text[start:end] for start, end in iter_paragraph_spans(text)]
 
 
 def extract_sentences(text: str) -> list:
     """
     Extract sentences from text using improved sentence splitting
     Works better for Vietnamese and English text
+
+    Sentences shorter than 3 words are dropped and trailing punctuation is
+    removed; use iter_sentences / iter_sentence_spans when offsets are needed.
     """
-    import re
-    
-    # Normalize whitespace
-    text = re.sub(r'\s+', ' ', text.strip())
-    
-    # Split by sentence endings: . ! ? followed by space and capital letter or quote
-    # Also handles Vietnamese specific patterns
-    sentences = re.split(r'(?<=[.!?])\s+(?=[A-ZÀÁẠẢÃÂẦẤẬẨẪĂẰẮẶẲẴÈÉẸẺẼÊỀẾỆỂỄÌÍỊỈĨÒÓỌỎÕÔỒỐỘỔỖƠỜỚỢỞỠÙÚỤỦŨƯỪỨỰỬỮỲÝỴỶỸĐ"\'])', text)
-    
-    # Clean and filter
-    result = []
-    for s in sentences:
-        s = s.strip()
-        # Keep sentences with at least 3 words
-        if s and len(s.split()) >= 3:
-            # Remove trailing punctuation for consistency
-            s = re.sub(r'[.!?]+$', '', s).strip()
-            if s:
-                result.append(s)
-    
-    return result
+    return [sentence for sentence, _, _ in iter_sentences(text, min_words=3)]
 
 
 def calculate_word_count(text: str) -> int:
@@ -0,0 +1,131 @@
+"""
+Benchmark - HTML parser backends
+================================
+So sánh tốc độ parse canvas TipTap giữa các backend (bs4 vs selectolax)
+trên tài liệu tổng hợp lớn, đồng thời kiểm tra output giống hệt nhau.
+Cuối cùng in kết quả các ca HTML lỗi (EDGE_CASES), nơi selectolax chuẩn hóa
+theo HTML5 nên khác bs4.
+
+    python benchmark_html_parsers.py --paragraphs 5000 --repeat 5
+"""
+
+import argparse
+import random
+import time
+
+from app.services.html_parsers import HTML_PARSER_BACKENDS, get_html_parser
+
+WORDS = (
+    "logic argument claim evidence premise conclusion suy luận lập luận bằng chứng "
+    "tiền đề kết luận dữ liệu nghiên cứu cho thấy rằng tuy nhiên vì vậy"
+).split()
+
+
+# HTML không hợp lệ (paste từ ngoài / client cũ): lexbor dựng cây theo HTML5, html.parser thì không
+EDGE_CASES = [
+    ("unclosed <p>", "<p>unclosed <p>second"),
+    ("<div> inside <p>", "<p><div>x</div></p>"),
+    ("table without <tbody>", "<table><tr><td>a</td></tr></table>"),
+    ("leading comment", "<!-- c --><p>x</p>"),
+]
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+    # Mark vài từ giống TipTap (bold/italic/link)
+    for _ in range(rng.randint(0, 2)):
+        i = rng.randrange(len(words))
+        mark = rng.choice(["strong", "em", "code"])
+        words[i] = f"<{mark}>{words[i]}</{mark}>"
+    if rng.random() < 0.1:
+        words.append('<a target="_blank" rel="noopener noreferrer nofollow" href="https://example.com/?a=1&amp;b=2">nguồn</a>')
+    return " ".join(words).capitalize() + rng.choice([".", "!", "?"])
+
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(1, 5)))
+
+
+def generate_document(paragraphs: int, seed: int = 42) -> str:
+    """Sinh HTML giống output của TipTap: heading, paragraph, list, quote, hr."""
+    rng = random.Random(seed)
+    parts = []
+    written = 0
+    while written < paragraphs:
+        roll = rng.random()
+        if roll < 0.05:
+            level = rng.choice([1, 2, 3])
+            title = rng.choice(["Introduction", "Analysis", "Discussion", "Kết luận", "Bối cảnh"])
+            parts.append(f"<h{level}>{title} {written}</h{level}>")
+        elif roll < 0.12:
+            tag = rng.choice(["ul", "ol"])
+            items = "".join(f"<li><p>{_sentence(rng)}</p></li>" for _ in range(rng.randint(2, 5)))
+            parts.append(f"<{tag}>{items}</{tag}>")
+            written += 1
+        elif roll < 0.15:
+            parts.append(f"<blockquote><p>{_paragraph(rng)}</p></blockquote>")
+            written += 1
+        elif roll < 0.16:
+            parts.append("<hr>")
+        else:
+            parts.append(f"<p>{_paragraph(rng)}<br></p>" if rng.random() < 0.05 else f"<p>{_paragraph(rng)}</p>")
+            written += 1
+    return "".join(parts)
+
+
+def run(paragraphs: int, repeat: int) -> None:
+    html = generate_document(paragraphs)
+    print(f"Document: {paragraphs} paragraphs, {len(html) / 1024:.0f} KB HTML")
+
+    reference = None
+    reference_name = None
+    for name in HTML_PARSER_BACKENDS:
+        backend = get_html_parser(name)
+        if backend.name != name:
+            print(f"⚠️ {name}: not installed, skipped")
+            continue
+
+        blocks = list(backend.iter_blocks(html))
+        if reference is None:
+            reference, reference_name = blocks, name
+        elif blocks != reference:
+            mismatch = next((i for i, (a, b) in enumerate(zip(blocks, reference)) if a != b), min(len(blocks), len(reference)))
+            print(f"⚠️ {name}: output differs from {reference_name} (first mismatch at block {mismatch})")
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _block in backend.iter_blocks(html):
+                pass
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+        print(f"✅ {name:<10} best {best * 1000:8.1f} ms  ({len(blocks) / best:,.0f} blocks/s)")
+
+
+def check_edge_cases() -> None:
+    backends = [get_html_parser(name) for name in HTML_PARSER_BACKENDS]
+    backends = [b for b, name in zip(backends, HTML_PARSER_BACKENDS) if b.name == name]
+    reference = backends[0]
+    print(f"\nMalformed HTML (reference: {reference.name})")
+    for label, html in EDGE_CASES:
+        expected = list(reference.iter_blocks(html))
+        for backend in backends[1:]:
+            blocks = list(backend.iter_blocks(html))
+            status = "same" if blocks == expected else "DIFFERS"
+            print(f"  {label:<24} {backend.name:<10} {status}: {len(expected)} → {len(blocks)} blocks")
+            if blocks != expected:
+                print(f"      {reference.name}: {[b.html for b in expected]}")
+                print(f"      {backend.name}: {[b.html for b in blocks]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends")
+    parser.add_argument("--paragraphs", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.paragraphs, args.repeat)
+    check_edge_cases()
+
+
+if __name__ == "__main__":
+    main()
@@ -139,8 +139,10 @@ CREATE TABLE "DOCUMENT" (
   "goal_id" uuid,
   "title" text NOT NULL DEFAULT 'Untitled',
   "content_full" text NOT NULL DEFAULT '',
+  "content_json" jsonb,
   "structure_json" jsonb NOT NULL DEFAULT '{}'::jsonb,
   "version" int NOT NULL DEFAULT 1,
+  "structure_version" int NOT NULL DEFAULT 0,
   "word_count" int NOT NULL DEFAULT 0,
   "created_at" timestamptz NOT NULL DEFAULT (now()),
   "updated_at" timestamptz NOT NULL DEFAULT (now())
@@ -287,6 +289,19 @@ CREATE TABLE "USER_ERROR_PATTERN" (
   "avg_time_to_fix_seconds" int
 );
 
+CREATE TABLE "USER_GLOSSARY_TERM" (
+  "id" uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  "user_id" uuid NOT NULL,
+  "term" text NOT NULL,
+  "term_key" text NOT NULL,
+  "definition_text" text,
+  "source_document_id" uuid,
+  "first_defined_at" text,
+  "times_seen" int NOT NULL DEFAULT 1,
+  "created_at" timestamptz NOT NULL DEFAULT (now()),
+  "updated_at" timestamptz NOT NULL DEFAULT (now())
+);
+
 CREATE INDEX ON "WRITING_TYPE" USING GIN ("default_checks");
 
 CREATE INDEX ON "WRITING_TYPE" USING GIN ("structure_template");
@@ -299,13 +314,13 @@ CREATE INDEX ON "DOCUMENT" ("user_id", "updated_at");
 
 CREATE INDEX ON "DOCUMENT" USING GIN ("structure_json");
 
-CREATE UNIQUE INDEX ON "DOCUMENT_SECTION" ("document_id", "order_index");
+ALTER TABLE "DOCUMENT_SECTION" ADD CONSTRAINT "uq_doc_section_order" UNIQUE ("document_id", "order_index") DEFERRABLE INITIALLY IMMEDIATE;
 
-CREATE UNIQUE INDEX ON "PARAGRAPH" ("document_id", "p_index");
+ALTER TABLE "PARAGRAPH" ADD CONSTRAINT "uq_paragraph_doc_index" UNIQUE ("document_id", "p_index") DEFERRABLE INITIALLY IMMEDIATE;
 
 CREATE INDEX ON "PARAGRAPH" ("hash");
 
-CREATE UNIQUE INDEX ON "SENTENCE" ("paragraph_id", "s_index");
+ALTER TABLE "SENTENCE" ADD CONSTRAINT "uq_sentence_para_index" UNIQUE ("paragraph_id", "s_index") DEFERRABLE INITIALLY IMMEDIATE;
 
 CREATE INDEX ON "SENTENCE" ("hash");
 
@@ -341,6 +356,8 @@ CREATE INDEX ON "WRITING_SESSION" ("document_id", "started_at");
 
 CREATE UNIQUE INDEX ON "USER_ERROR_PATTERN" ("user_id", "error_type");
 
+CREATE UNIQUE INDEX ON "USER_GLOSSARY_TERM" ("user_id", "term_key");
+
 COMMENT ON COLUMN "USER"."id" IS 'DEFAULT gen_random_uuid()';
 
 COMMENT ON COLUMN "WRITING_TYPE"."id" IS 'DEFAULT gen_random_uuid()';
@@ -457,6 +474,12 @@ COMMENT ON COLUMN "USER_ERROR_PATTERN"."id" IS 'DEFAULT gen_random_uuid()';
 
 COMMENT ON COLUMN "USER_ERROR_PATTERN"."user_id" IS 'ON DELETE CASCADE';
 
+COMMENT ON COLUMN "USER_GLOSSARY_TERM"."id" IS 'DEFAULT gen_random_uuid()';
+
+COMMENT ON COLUMN "USER_GLOSSARY_TERM"."user_id" IS 'ON DELETE CASCADE';
+
+COMMENT ON COLUMN "USER_GLOSSARY_TERM"."source_document_id" IS 'ON DELETE SET NULL';
+
 ALTER TABLE "GOAL" ADD FOREIGN KEY ("user_id") REFERENCES "USER" ("id");
 
 ALTER TABLE "GOAL" ADD FOREIGN KEY ("writing_type_id") REFERENCES "WRITING_TYPE" ("id");
@@ -507,4 +530,8 @@ ALTER TABLE "WRITING_SESSION" ADD FOREIGN KEY ("document_id") REFERENCES "DOCUME
 
 ALTER TABLE "WRITING_SESSION" ADD FOREIGN KEY ("user_id") REFERENCES "USER" ("id");
 
-ALTER TABLE "USER_ERROR_PATTERN" ADD FOREIGN KEY ("user_id") REFERENCES "USER" ("id");
\ No newline at end of file
+ALTER TABLE "USER_ERROR_PATTERN" ADD FOREIGN KEY ("user_id") REFERENCES "USER" ("id");
+
+ALTER TABLE "USER_GLOSSARY_TERM" ADD FOREIGN KEY ("user_id") REFERENCES "USER" ("id");
+
+ALTER TABLE "USER_GLOSSARY_TERM" ADD FOREIGN KEY ("source_document_id") REFERENCES "DOCUMENT" ("id");
\ No newline at end of file
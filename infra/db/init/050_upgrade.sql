@@ -0,0 +1,64 @@
+-- Nâng cấp database đã tồn tại lên schema hiện tại.
+-- Các file init chỉ chạy khi volume pgdata còn trống, nên DB cũ phải chạy tay:
+--   docker exec -i logicguard_db psql -U app -d logicguard -v ON_ERROR_STOP=1 < init/050_upgrade.sql
+-- Mọi lệnh đều idempotent: chạy lại (hoặc chạy trên DB mới tạo) không đổi gì.
+
+-- DOCUMENT.content_json: nội dung TipTap/ProseMirror JSON của editor
+ALTER TABLE "DOCUMENT" ADD COLUMN IF NOT EXISTS "content_json" jsonb;
+
+-- DOCUMENT.structure_version: version mà các dòng section/paragraph/sentence phản ánh.
+-- Cấu trúc của DB cũ luôn được sync inline, nên lúc thêm cột thì backfill = version.
+-- Chỉ backfill khi cột vừa được thêm: chạy lại sẽ không che mất document đang chờ sync.
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'DOCUMENT' AND column_name = 'structure_version'
+  ) THEN
+    ALTER TABLE "DOCUMENT" ADD COLUMN "structure_version" int NOT NULL DEFAULT 0;
+    UPDATE "DOCUMENT" SET "structure_version" = "version";
+  END IF;
+END $$;
+
+-- Unique theo thứ tự của section/paragraph/sentence: DB cũ có UNIQUE INDEX không tên,
+-- không DEFERRABLE nên "SET CONSTRAINTS ... DEFERRED" của diff sync báo lỗi.
+-- Thay bằng constraint có tên, DEFERRABLE INITIALLY IMMEDIATE như 010_schema.sql.
+DO $$
+DECLARE
+  spec record;
+  old_index text;
+BEGIN
+  FOR spec IN
+    SELECT * FROM (VALUES
+      ('DOCUMENT_SECTION', 'uq_doc_section_order', ARRAY['document_id', 'order_index']),
+      ('PARAGRAPH', 'uq_paragraph_doc_index', ARRAY['document_id', 'p_index']),
+      ('SENTENCE', 'uq_sentence_para_index', ARRAY['paragraph_id', 's_index'])
+    ) AS t(table_name, constraint_name, columns)
+  LOOP
+    IF EXISTS (SELECT 1 FROM pg_constraint WHERE conname = spec.constraint_name) THEN
+      CONTINUE;
+    END IF;
+
+    -- Unique index cũ trên đúng các cột này (không thuộc constraint nào)
+    FOR old_index IN
+      SELECT i.indexrelid::regclass::text
+      FROM pg_index i
+      WHERE i.indrelid = format('%I', spec.table_name)::regclass
+        AND i.indisunique
+        AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+        AND ARRAY(
+          SELECT a.attname::text
+          FROM unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord)
+          JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+          ORDER BY k.ord
+        ) = spec.columns
+    LOOP
+      EXECUTE format('DROP INDEX %s', old_index);
+    END LOOP;
+
+    EXECUTE format(
+      'ALTER TABLE %I ADD CONSTRAINT %I UNIQUE (%I, %I) DEFERRABLE INITIALLY IMMEDIATE',
+      spec.table_name, spec.constraint_name, spec.columns[1], spec.columns[2]
+    );
+  END LOOP;
+END $$;